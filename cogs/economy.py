@@ -16,8 +16,8 @@ class Economy(commands.Cog):
     @app_commands.describe(page="Profile page to view")
     async def profile(self, interaction: discord.Interaction, page: int = 1):
         """Display user profile"""
-        user = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        user = await self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         
         embed = create_embed(f"👤 {interaction.user.display_name}'s Profile", color=EmbedColors.INFO)
         
@@ -67,8 +67,8 @@ class Economy(commands.Cog):
     @app_commands.command(name="daily", description="Claim your daily reward")
     async def daily(self, interaction: discord.Interaction):
         """Daily reward command"""
-        user = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        user = await self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         
         # Check cooldown
         if user.is_on_cooldown('daily'):
@@ -102,8 +102,8 @@ class Economy(commands.Cog):
     @app_commands.command(name="weekly", description="Claim your weekly reward")
     async def weekly(self, interaction: discord.Interaction):
         """Weekly reward command"""
-        user = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        user = await self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         
         if user.is_on_cooldown('weekly'):
             remaining = user.get_cooldown_remaining('weekly')
@@ -133,8 +133,8 @@ class Economy(commands.Cog):
     @app_commands.command(name="monthly", description="Claim your monthly reward")
     async def monthly(self, interaction: discord.Interaction):
         """Monthly reward command"""
-        user = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        user = await self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         
         if user.is_on_cooldown('monthly'):
             remaining = user.get_cooldown_remaining('monthly')
@@ -166,8 +166,8 @@ class Economy(commands.Cog):
     @app_commands.command(name="work", description="Work to earn money")
     async def work(self, interaction: discord.Interaction):
         """Work command"""
-        user = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        user = await self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         
         if user.is_on_cooldown('work'):
             remaining = user.get_cooldown_remaining('work')
@@ -211,8 +211,8 @@ class Economy(commands.Cog):
     @app_commands.command(name="overtime", description="Work overtime for bonus pay")
     async def overtime(self, interaction: discord.Interaction):
         """Overtime work command"""
-        user = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        user = await self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         
         if user.is_on_cooldown('overtime'):
             remaining = user.get_cooldown_remaining('overtime')
@@ -265,28 +265,21 @@ class Economy(commands.Cog):
             )
             return
         
-        sender = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
-        receiver = self.bot.data_manager.get_user(recipient.id, interaction.guild.id)
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         
-        if sender.balance < amount:
+        # Both balances change in one locked, all-or-nothing transfer
+        if not await self.bot.data_manager.transfer(interaction.user.id, recipient.id, amount, interaction.guild.id):
             await interaction.response.send_message(
                 embed=create_error_embed("Insufficient Balance", "You don't have enough money"), 
                 ephemeral=True
             )
             return
         
-        # Transfer money
-        sender.balance -= amount
-        receiver.balance += amount
-        
         embed = create_success_embed("💸 Money Sent!")
         embed.add_field(name="From", value=interaction.user.mention, inline=True)
         embed.add_field(name="To", value=recipient.mention, inline=True)
         embed.add_field(name="Amount", value=format_currency(amount, guild.cashmoji), inline=False)
         
-        self.bot.data_manager.update_user(sender)
-        self.bot.data_manager.update_user(receiver)
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="leaderboard", description="View leaderboards")
@@ -301,7 +294,7 @@ class Economy(commands.Cog):
                          global_scope: bool = False):
         """Display leaderboards"""
         guild_id = None if global_scope else interaction.guild.id
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         
         if leaderboard == "player":
             valid_categories = ["balance", "crypto", "level", "games_won"]
@@ -312,9 +305,12 @@ class Economy(commands.Cog):
                 )
                 return
             
-            top_users = self.bot.data_manager.get_leaderboard(guild_id or interaction.guild.id, category, 10)
-            
-            embed = create_embed(f"🏆 {category.title()} Leaderboard", color=EmbedColors.ECONOMY)
+            if guild_id is None:
+                top_users = await self.bot.data_manager.get_global_leaderboard(category, 10)
+                embed = create_embed(f"🌍 Global {category.title()} Leaderboard", color=EmbedColors.ECONOMY)
+            else:
+                top_users = await self.bot.data_manager.get_leaderboard(guild_id, category, 10)
+                embed = create_embed(f"🏆 {category.title()} Leaderboard", color=EmbedColors.ECONOMY)
             
             if not top_users:
                 embed.add_field(name="No Data", value="No users found", inline=False)
@@ -339,12 +335,58 @@ class Economy(commands.Cog):
                 embed.add_field(name="Top Users", value=leaderboard_text[:1024], inline=False)
         
         await interaction.response.send_message(embed=embed)
-    
+
+    @app_commands.command(name="rank", description="See where you stand on a leaderboard")
+    @app_commands.describe(category="Leaderboard category", member="Member to look up")
+    async def rank(self, interaction: discord.Interaction,
+                   category: str = "balance",
+                   member: discord.Member = None):
+        """Display a user's rank, percentile and neighbours"""
+        valid_categories = ["balance", "crypto", "level", "games_won"]
+        if category not in valid_categories:
+            await interaction.response.send_message(
+                embed=create_error_embed("Invalid Category", f"Valid categories: {', '.join(valid_categories)}"),
+                ephemeral=True
+            )
+            return
+
+        target = member or interaction.user
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
+        result = await self.bot.data_manager.get_rank(target.id, interaction.guild.id, category)
+        if not result:
+            await interaction.response.send_message(
+                embed=create_error_embed("No Data", f"{target.display_name} is not ranked yet"),
+                ephemeral=True
+            )
+            return
+
+        def format_value(value: int) -> str:
+            if category in ["balance", "crypto"]:
+                return format_currency(value, guild.cashmoji if category == "balance" else guild.cryptomoji)
+            return f"{value:,}"
+
+        def format_entry(entry: dict) -> str:
+            user = self.bot.get_user(entry['user_id'])
+            name = user.display_name if user else f"User {entry['user_id']}"
+            return f"#{entry['rank']:,} {name}: {format_value(entry['value'])}"
+
+        embed = create_embed(f"📈 {target.display_name}'s {category.replace('_', ' ').title()} Rank", color=EmbedColors.ECONOMY)
+        embed.add_field(name="Rank", value=f"#{result['rank']:,} of {result['total']:,}", inline=True)
+        embed.add_field(name="Percentile", value=f"Top {100 - result['percentile']:.1f}%", inline=True)
+        embed.add_field(name="Value", value=format_value(result['value']), inline=True)
+
+        neighbours = [format_entry(entry) for entry in result['above']]
+        neighbours.append(f"**#{result['rank']:,} {target.display_name}: {format_value(result['value'])}**")
+        neighbours.extend(format_entry(entry) for entry in result['below'])
+        embed.add_field(name="Nearby", value="\n".join(neighbours)[:1024], inline=False)
+
+        await interaction.response.send_message(embed=embed)
+
     @app_commands.command(name="cooldowns", description="Check your cooldowns")
     @app_commands.describe(detailed="Show detailed cooldown information")
     async def cooldowns(self, interaction: discord.Interaction, detailed: bool = False):
         """Display user cooldowns"""
-        user = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
+        user = await self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
         
         embed = create_embed("⏰ Your Cooldowns", color=EmbedColors.INFO)
         
@@ -352,8 +394,8 @@ class Economy(commands.Cog):
         cooldown_text = ""
         
         for cooldown_type in cooldown_types:
-            if user.is_on_cooldown(cooldown_type):
-                remaining = user.get_cooldown_remaining(cooldown_type)
+            remaining = user.get_cooldown_remaining(cooldown_type)
+            if remaining:
                 cooldown_text += f"❌ **{cooldown_type.title()}**: {format_time_remaining(remaining)}\n"
             else:
                 cooldown_text += f"✅ **{cooldown_type.title()}**: Ready!\n"
@@ -3,18 +3,32 @@ from discord.ext import commands
 from discord import app_commands
 import random
 import asyncio
+import itertools
+import logging
 from datetime import timedelta
 from modules.utils import *
 from config import Config
-from modules.imagegenerator import CasinoImageGenerator
+from modules.gamestates import GameStateStore
+from modules.imagegenerator import CasinoImageGenerator, CrashGraph
+from modules.renderservice import RenderService
+from modules.encoder import image_filename
 
 class Games(commands.Cog):
     """Gaming commands for the Discord bot"""
     
     def __init__(self, bot):
         self.bot = bot
-        self.active_games = {}  # Track active games by user_id
+        # Active games by "guild_id:user_id", persisted so rounds survive restarts
+        self.games = GameStateStore(
+            bot.db_manager, Config.GAME_STATE_TTL, Config.MAX_ACTIVE_GAMES,
+            on_expire=self._on_game_expired
+        )
+        self.game_views = {}  # Live view of each game in self.games
+        self._starting = set()  # Game ids whose command is still setting the game up
         self.image_generator = CasinoImageGenerator()
+        # Pillow work runs in worker processes so it never blocks the event loop
+        self.renderer = RenderService(self.image_generator, Config.RENDER_WORKERS, Config.RENDER_MAX_PENDING)
+        self._warm_task = None
         # Register a callback for real-time achievements
         self.image_generator.set_callback(self.achievement_callback)
 
@@ -23,88 +37,223 @@ class Games(commands.Cog):
         # Example: log, trigger achievement, or notify user
         # This is a stub; implement as needed
         pass
+
+    async def cog_load(self):
+        """Re-attach views for games that were in progress before a restart"""
+        for state in await self.games.load():
+            try:
+                await self._restore_game(state)
+            except Exception as e:
+                logging.error(f"Failed to restore game {state.game_id}: {e}")
+                self.games.delete(state.game_id)
+        self.games.start()
+        # Render every slots and coinflip outcome in the background
+        self._warm_task = asyncio.create_task(self.renderer.warm(self._outcomes()))
+
+    @staticmethod
+    def _outcomes():
+        """Render inputs of every slots and coinflip outcome the commands can produce"""
+        for reels in itertools.product(SLOT_SYMBOLS, repeat=3):
+            won, winnings = calculate_slots_win(list(reels), 1)
+            yield 'create_slot_machine_image', (list(reels), won, slots_multiplier(won, winnings, 1))
+        for result in ('heads', 'tails'):
+            for prediction in ('heads', 'tails'):
+                won = prediction == result
+                yield 'create_coinflip_image', (result, prediction, won, 3.0 if won else 1.0)
+
+    async def cog_unload(self):
+        self.games.stop()
+        if self._warm_task is not None:
+            self._warm_task.cancel()
+        self.renderer.close()
+
+    @staticmethod
+    def game_id(guild_id: int, user_id: int) -> str:
+        return f"{guild_id}:{user_id}"
+
+    def start_game(self, view, channel_id: int, data: dict, ttl: float = None):
+        """Track a game before its view is sent
+
+        Call it right after update_user for the bet, with no await in between,
+        so the bet and the game are written in the same flush. The message is
+        attached once sent, see attach_message.
+        """
+        game_id = self.game_id(view.user.guild_id, view.user.user_id)
+        view._parent_games_cog = self  # Pass reference for saving and cleanup
+        view._game_id = game_id
+        self.game_views[game_id] = view
+        self.games.create(game_id, {
+            **data,
+            "user_id": view.user.user_id,
+            "guild_id": view.user.guild_id,
+            "channel_id": channel_id,
+            "message_id": None,
+        }, ttl=ttl)
+
+    def attach_message(self, view, message: discord.Message):
+        """Record the message a tracked game's view was sent as"""
+        self.save_game(view, message_id=message.id)
+
+    def save_game(self, view, ttl: float = None, **changes):
+        if self.game_views.get(view._game_id) is view:
+            self.games.update(view._game_id, ttl=ttl, **changes)
+
+    def finish_game(self, view):
+        view.game_over = True
+        view.stop()
+        if self.game_views.get(view._game_id) is view:
+            del self.game_views[view._game_id]
+            self.games.delete(view._game_id)
+
+    def _on_game_expired(self, state):
+        view = self.game_views.pop(state.game_id, None)
+        if view is not None:
+            view.game_over = True
+            view.stop()
+
+    async def _restore_game(self, state):
+        user = await self.bot.data_manager.get_user(state.get_data("user_id"), state.get_data("guild_id"))
+        guild = await self.bot.data_manager.get_guild(state.get_data("guild_id"))
+        if state.get_data("message_id") is None:
+            # Stopped before the game was ever shown; give the bet back
+            user.balance += state.get_data("bet")
+            self.bot.data_manager.update_user(user)
+            self.games.delete(state.game_id)
+            return
+        message = self.bot.get_partial_messageable(state.get_data("channel_id")).get_partial_message(state.get_data("message_id"))
+        if state.game_type == "blackjack":
+            view = BlackjackView(
+                self.bot, user, guild,
+                [tuple(card) for card in state.get_data("dealer_cards")],
+                [tuple(card) for card in state.get_data("player_cards")],
+                state.get_data("bet")
+            )
+        elif state.game_type == "crash":
+            view = CrashView(self.bot, user, guild, state.get_data("bet"), state.get_data("crash_multiplier"))
+            view.current_multiplier = state.get_data("current_multiplier", 1.00)
+        else:
+            raise ValueError(f"Unknown game type {state.game_type!r}")
+        view._parent_games_cog = self
+        view._game_id = state.game_id
+        self.game_views[state.game_id] = view
+        self.bot.add_view(view, message_id=message.id)
+        if state.game_type == "crash":
+            view.start_game(message)
+
+    async def _claim_game(self, interaction: discord.Interaction, game_id: str) -> bool:
+        """Reserve the user's game, or reply that one is already running
+        
+        A user plays one tracked game at a time; a second one would replace the
+        first game's state while its view kept paying out. The check and the
+        reservation happen before any await, so racing commands cannot both pass.
+        Discard the id from _starting once the command is done.
+        """
+        if game_id in self.games or game_id in self._starting:
+            await interaction.response.send_message(
+                embed=create_error_embed("Game In Progress", "Finish your current game first."),
+                ephemeral=True
+            )
+            return False
+        self._starting.add(game_id)
+        return True
     
-    async def check_bet_validity(self, interaction: discord.Interaction, bet: int) -> bool:
-        """Check if bet is valid and user has sufficient funds"""
-        user = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
-        
-        is_valid, error_msg = validate_bet_amount(bet, Config.MIN_BET, Config.MAX_BET, user.balance)
+    def _active_game(self, interaction: discord.Interaction):
+        """Data of the user's active game in this guild, or None"""
+        state = self.games.get(self.game_id(interaction.guild.id, interaction.user.id))
+        return state.to_dict() if state else None
+    
+    async def place_bet(self, interaction: discord.Interaction, bet: int):
+        """Take a valid bet from the user, or reply with the reason and return None
+        
+        The balance check and the deduction are one DataManager.debit under the
+        user's lock, so concurrent commands cannot both spend the same balance.
+        The caller marks the user dirty together with the game the bet paid for.
+        """
+        # Limits only; debit checks the balance
+        is_valid, error_msg = validate_bet_amount(bet, Config.MIN_BET, Config.MAX_BET, bet)
+        if is_valid:
+            user = await self.bot.data_manager.debit(interaction.user.id, interaction.guild.id, bet)
+            if user is None:
+                is_valid, error_msg = False, "Insufficient balance"
         if not is_valid:
             await interaction.response.send_message(embed=create_error_embed("Invalid Bet", error_msg), ephemeral=True)
-            return False
+            return None
         
-        return True
+        user.update_stats('total_bet', bet)
+        return user
     
     @app_commands.command(name="blackjack", description="Play blackjack")
     @app_commands.describe(bet="Amount to bet", mode="Game mode (normal/insurance)")
     async def blackjack(self, interaction: discord.Interaction, bet: int, mode: str = "normal"):
         """Blackjack game command"""
-        if not await self.check_bet_validity(interaction, bet):
+        game_id = self.game_id(interaction.guild.id, interaction.user.id)
+        if not await self._claim_game(interaction, game_id):
             return
         
-        user = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
-        
-        # Deduct bet
-        user.balance -= bet
-        user.update_stats('total_bet', bet)
-        
-        # Deal cards
-        dealer_cards = generate_cards(2)
-        player_cards = generate_cards(2)
-        
-        # Calculate values
-        dealer_value = calculate_blackjack_value(dealer_cards)
-        player_value = calculate_blackjack_value(player_cards)
-        
-        # Create game embed
-        embed = create_game_embed("🃏 Blackjack")
-        embed.add_field(
-            name="Your Cards", 
-            value=f"{format_cards(player_cards)}\nValue: {player_value}", 
-            inline=True
-        )
-        embed.add_field(
-            name="Dealer Cards", 
-            value=f"{dealer_cards[0][0]} ❓\nValue: {dealer_cards[0][1]} + ?", 
-            inline=True
-        )
-        embed.add_field(name="Bet", value=format_currency(bet, guild.cashmoji), inline=False)
-        
-        # Check for blackjack
-        if player_value == 21:
-            if dealer_value == 21:
-                # Push
-                user.balance += bet
-                embed.add_field(name="Result", value="Push! Both have blackjack", inline=False)
-                embed.color = EmbedColors.WARNING
-            else:
-                # Player blackjack wins
-                winnings = int(bet * 2.5)
-                user.balance += winnings
-                user.update_stats('games_won', 1)
-                user.update_stats('total_won', winnings)
-                embed.add_field(name="Result", value=f"Blackjack! You win {format_currency(winnings, guild.cashmoji)}", inline=False)
-                embed.color = EmbedColors.SUCCESS
+        try:
+            guild = await self.bot.data_manager.get_guild(interaction.guild.id)
+            # Deduct bet
+            user = await self.place_bet(interaction, bet)
+            if user is None:
+                return
             
-            user.update_stats('games_played', 1)
+            # Deal cards
+            dealer_cards = generate_cards(2)
+            player_cards = generate_cards(2)
+            
+            # Calculate values
+            dealer_value = calculate_blackjack_value(dealer_cards)
+            player_value = calculate_blackjack_value(player_cards)
+            
+            # Create game embed
+            embed = create_game_embed("🃏 Blackjack")
+            embed.add_field(
+                name="Your Cards", 
+                value=f"{format_cards(player_cards)}\nValue: {player_value}", 
+                inline=True
+            )
+            embed.add_field(
+                name="Dealer Cards", 
+                value=f"{dealer_cards[0][0]} ❓\nValue: {dealer_cards[0][1]} + ?", 
+                inline=True
+            )
+            embed.add_field(name="Bet", value=format_currency(bet, guild.cashmoji), inline=False)
+            
+            # Check for blackjack
+            if player_value == 21:
+                if dealer_value == 21:
+                    # Push
+                    user.balance += bet
+                    embed.add_field(name="Result", value="Push! Both have blackjack", inline=False)
+                    embed.color = EmbedColors.WARNING
+                else:
+                    # Player blackjack wins
+                    winnings = int(bet * 2.5)
+                    user.balance += winnings
+                    user.update_stats('games_won', 1)
+                    user.update_stats('total_won', winnings)
+                    embed.add_field(name="Result", value=f"Blackjack! You win {format_currency(winnings, guild.cashmoji)}", inline=False)
+                    embed.color = EmbedColors.SUCCESS
+                
+                user.update_stats('games_played', 1)
+                self.bot.data_manager.update_user(user)
+                await interaction.response.send_message(embed=embed)
+                return
+            
+            # Add action buttons
+            view = BlackjackView(self.bot, user, guild, dealer_cards, player_cards, bet)
             self.bot.data_manager.update_user(user)
-            await interaction.response.send_message(embed=embed)
-            return
-        
-        # Register active game
-        self.active_games[interaction.user.id] = {
-            "type": "blackjack",
-            "player_cards": player_cards,
-            "dealer_cards": dealer_cards,
-            "bet": bet,
-        }
-        
-        # Add action buttons
-        view = BlackjackView(self.bot, user, guild, dealer_cards, player_cards, bet)
-        view._parent_games_cog = self  # Pass reference for cleanup
-        view._user_id = interaction.user.id
-        await interaction.response.send_message(embed=embed, view=view)
+            # Register active game
+            self.start_game(view, interaction.channel_id, {
+                "game_type": "blackjack",
+                "player_cards": player_cards,
+                "dealer_cards": dealer_cards,
+                "bet": bet,
+            })
+            await interaction.response.send_message(embed=embed, view=view)
+            self.attach_message(view, await interaction.original_response())
+        finally:
+            self._starting.discard(game_id)
 
     @app_commands.command(name="coinflip", description="Flip a coin")
     @app_commands.describe(prediction="Heads or tails", bet="Amount to bet")
@@ -117,15 +266,11 @@ class Games(commands.Cog):
             )
             return
         
-        if not await self.check_bet_validity(interaction, bet):
-            return
-        
-        user = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
-        
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         # Deduct bet
-        user.balance -= bet
-        user.update_stats('total_bet', bet)
+        user = await self.place_bet(interaction, bet)
+        if user is None:
+            return
         user.update_stats('games_played', 1)
         
         # Flip coin
@@ -134,11 +279,12 @@ class Games(commands.Cog):
         
         # Generate coinflip image
         try:
-            coinflip_image = self.image_generator.create_coinflip_image(result, prediction, won, multiplier=3.0 if won else 1.0)
-            file = discord.File(coinflip_image, filename="coinflip.png")
+            coinflip_image = await self.renderer.render('create_coinflip_image', result, prediction, won, 3.0 if won else 1.0)
+            filename = image_filename("coinflip", coinflip_image)
+            file = discord.File(coinflip_image, filename=filename)
             
             embed = create_game_embed("🪙 Coinflip")
-            embed.set_image(url="attachment://coinflip.png")
+            embed.set_image(url=f"attachment://{filename}")
             embed.add_field(name="Your Prediction", value=prediction.title(), inline=True)
             embed.add_field(name="Result", value=result.title(), inline=True)
             embed.add_field(name="Bet", value=format_currency(bet, guild.cashmoji), inline=False)
@@ -182,27 +328,24 @@ class Games(commands.Cog):
     @app_commands.describe(bet="Amount to bet")
     async def slots(self, interaction: discord.Interaction, bet: int):
         """Slot machine game command"""
-        if not await self.check_bet_validity(interaction, bet):
-            return
-        
-        user = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
-        
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         # Deduct bet
-        user.balance -= bet
-        user.update_stats('total_bet', bet)
+        user = await self.place_bet(interaction, bet)
+        if user is None:
+            return
         user.update_stats('games_played', 1)
         
         # Spin reels
         reels = create_slots_reels()
         won, winnings = calculate_slots_win(reels, bet)
-        multiplier = winnings // bet if won and bet > 0 else 1.0
+        multiplier = slots_multiplier(won, winnings, bet)
         try:
-            slot_image = self.image_generator.create_slot_machine_image(reels, won, multiplier=multiplier)
-            file = discord.File(slot_image, filename="slots.png")
+            slot_image = await self.renderer.render('create_slot_machine_image', reels, won, multiplier)
+            filename = image_filename("slots", slot_image)
+            file = discord.File(slot_image, filename=filename)
             
             embed = create_game_embed("🎰 Slot Machine")
-            embed.set_image(url="attachment://slots.png")
+            embed.set_image(url=f"attachment://{filename}")
             embed.add_field(name="Reels", value=" | ".join(reels), inline=False)
             embed.add_field(name="Bet", value=format_currency(bet, guild.cashmoji), inline=True)
             
@@ -251,15 +394,11 @@ class Games(commands.Cog):
             )
             return
         
-        if not await self.check_bet_validity(interaction, bet):
-            return
-        
-        user = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
-        
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         # Deduct bet
-        user.balance -= bet
-        user.update_stats('total_bet', bet)
+        user = await self.place_bet(interaction, bet)
+        if user is None:
+            return
         user.update_stats('games_played', 1)
         
         # Spin roulette
@@ -267,14 +406,14 @@ class Games(commands.Cog):
         won, winnings = calculate_roulette_win(prediction.lower(), number, bet)
         multiplier = winnings // bet if won and bet > 0 else 1.0
         # Determine color for display
-        red_numbers = [1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36]
-        color = "🔴" if number in red_numbers else ("⚫" if number != 0 else "🟢")
+        color = ROULETTE_COLOURS[roulette_colour(number)]
         try:
-            roulette_image = self.image_generator.create_roulette_wheel(number, prediction, multiplier=multiplier)
-            file = discord.File(roulette_image, filename="roulette.png")
+            roulette_image = await self.renderer.render('create_roulette_wheel', number, prediction, multiplier)
+            filename = image_filename("roulette", roulette_image)
+            file = discord.File(roulette_image, filename=filename)
             
             embed = create_game_embed("🎡 Roulette")
-            embed.set_image(url="attachment://roulette.png")
+            embed.set_image(url=f"attachment://{filename}")
             embed.add_field(name="Your Prediction", value=prediction.title(), inline=True)
             embed.add_field(name="Result", value=f"{color} {number}", inline=True)
             embed.add_field(name="Bet", value=format_currency(bet, guild.cashmoji), inline=False)
@@ -316,75 +455,81 @@ class Games(commands.Cog):
     @app_commands.describe(bet="Amount to bet", mode="auto or manual")
     async def crash(self, interaction: discord.Interaction, bet: int, mode: str = "manual"):
         """Crash game command"""
-        if not await self.check_bet_validity(interaction, bet):
+        manual = mode.lower() != "auto"
+        game_id = self.game_id(interaction.guild.id, interaction.user.id)
+        if manual and not await self._claim_game(interaction, game_id):
             return
         
-        user = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
-        
-        # Deduct bet
-        user.balance -= bet
-        user.update_stats('total_bet', bet)
-        user.update_stats('games_played', 1)
-        
-        # Generate crash multiplier
-        crash_multiplier = generate_crash_multiplier()
-        
-        if mode.lower() == "auto":
-            # Auto mode - random cash out
-            auto_cashout = round(random.uniform(1.1, min(crash_multiplier + 0.5, 5.0)), 2)
+        try:
+            guild = await self.bot.data_manager.get_guild(interaction.guild.id)
+            # Deduct bet
+            user = await self.place_bet(interaction, bet)
+            if user is None:
+                return
+            user.update_stats('games_played', 1)
             
-            if auto_cashout <= crash_multiplier:
-                winnings = int(bet * auto_cashout)
-                user.balance += winnings
-                user.update_stats('games_won', 1)
-                user.update_stats('total_won', winnings)
+            # Generate crash multiplier
+            crash_multiplier = generate_crash_multiplier()
+            
+            if mode.lower() == "auto":
+                # Auto mode - random cash out
+                auto_cashout = round(random.uniform(1.1, min(crash_multiplier + 0.5, 5.0)), 2)
                 
-                embed = create_success_embed("🚀 Crash - Auto Mode")
-                embed.add_field(name="Auto Cash Out", value=f"{auto_cashout}x", inline=True)
-                embed.add_field(name="Crash Point", value=f"{crash_multiplier}x", inline=True)
-                embed.add_field(name="Result", value=f"Won {format_currency(winnings, guild.cashmoji)}!", inline=False)
+                if auto_cashout <= crash_multiplier:
+                    winnings = int(bet * auto_cashout)
+                    user.balance += winnings
+                    user.update_stats('games_won', 1)
+                    user.update_stats('total_won', winnings)
+                    
+                    embed = create_success_embed("🚀 Crash - Auto Mode")
+                    embed.add_field(name="Auto Cash Out", value=f"{auto_cashout}x", inline=True)
+                    embed.add_field(name="Crash Point", value=f"{crash_multiplier}x", inline=True)
+                    embed.add_field(name="Result", value=f"Won {format_currency(winnings, guild.cashmoji)}!", inline=False)
+                else:
+                    embed = create_error_embed("💥 Crash - Auto Mode")
+                    embed.add_field(name="Auto Cash Out", value=f"{auto_cashout}x", inline=True)
+                    embed.add_field(name="Crash Point", value=f"{crash_multiplier}x", inline=True)
+                    embed.add_field(name="Result", value="Crashed before cash out!", inline=False)
+                    # Optionally generate crash graph with win multiplier
+                    # crash_img = self.image_generator.create_crash_graph(auto_cashout, crashed=False, win_multiplier=auto_cashout)
             else:
-                embed = create_error_embed("💥 Crash - Auto Mode")
-                embed.add_field(name="Auto Cash Out", value=f"{auto_cashout}x", inline=True)
-                embed.add_field(name="Crash Point", value=f"{crash_multiplier}x", inline=True)
-                embed.add_field(name="Result", value="Crashed before cash out!", inline=False)
-                # Optionally generate crash graph with win multiplier
-                # crash_img = self.image_generator.create_crash_graph(auto_cashout, crashed=False, win_multiplier=auto_cashout)
-        else:
-            # Manual mode with view
-            view = CrashView(self.bot, user, guild, bet, crash_multiplier)
-            # Register active game
-            self.active_games[interaction.user.id] = {
-                "type": "crash",
-                "view": view,
-                "crash_multiplier": crash_multiplier,
-            }
-            view._parent_games_cog = self  # Pass reference for cleanup
-            view._user_id = interaction.user.id
-            embed = create_game_embed("🚀 Crash Game")
-            embed.add_field(name="Bet", value=format_currency(bet, guild.cashmoji), inline=True)
-            embed.add_field(name="Current Multiplier", value="1.00x", inline=True)
-            embed.add_field(name="Status", value="🟢 Flying...", inline=False)
-            await interaction.response.send_message(embed=embed, view=view)
-            view.start_game(interaction)
-            return
-        
-        self.bot.data_manager.update_user(user)
-        await interaction.response.send_message(embed=embed)
+                # Manual mode with view
+                view = CrashView(self.bot, user, guild, bet, crash_multiplier)
+                embed = create_game_embed("🚀 Crash Game")
+                embed.add_field(name="Bet", value=format_currency(bet, guild.cashmoji), inline=True)
+                embed.add_field(name="Current Multiplier", value="1.00x", inline=True)
+                embed.add_field(name="Status", value="🟢 Flying...", inline=False)
+                self.bot.data_manager.update_user(user)
+                # Register active game; it lasts until the crash plus time to cash out
+                self.start_game(view, interaction.channel_id, {
+                    "game_type": "crash",
+                    "bet": bet,
+                    "crash_multiplier": crash_multiplier,
+                    "current_multiplier": view.current_multiplier,
+                }, ttl=(crash_multiplier - 1) * 10 + Config.GAME_STATE_TTL)
+                await interaction.response.send_message(embed=embed, view=view)
+                message = await interaction.original_response()
+                self.attach_message(view, message)
+                view.start_game(message)
+                return
+            
+            self.bot.data_manager.update_user(user)
+            await interaction.response.send_message(embed=embed)
+        finally:
+            if manual:
+                self._starting.discard(game_id)
 
     @app_commands.command(name="view_multiplier", description="View your current crash game multiplier")
     async def view_multiplier(self, interaction: discord.Interaction):
         """Show the current crash multiplier for your active crash game"""
-        user_id = interaction.user.id
-        active = self.active_games.get(user_id)
-        if not active or active.get("type") != "crash":
+        active = self._active_game(interaction)
+        if not active or active.get("game_type") != "crash":
             await interaction.response.send_message(
                 embed=create_error_embed("No Active Crash Game", "You are not currently playing a crash game."),
                 ephemeral=True
             )
             return
-        multiplier = active.get("view").current_multiplier if active.get("view") else None
+        multiplier = active.get("current_multiplier")
         crash_point = active.get("crash_multiplier")
         if multiplier is None:
             await interaction.response.send_message(
@@ -400,18 +545,17 @@ class Games(commands.Cog):
     @app_commands.command(name="console_focus", description="Show your current active game")
     async def console_focus(self, interaction: discord.Interaction):
         """Show the user's current active game and its status"""
-        user_id = interaction.user.id
-        active = self.active_games.get(user_id)
+        active = self._active_game(interaction)
         if not active:
             await interaction.response.send_message(
                 embed=create_error_embed("No Active Game", "You are not currently playing any game."),
                 ephemeral=True
             )
             return
-        game_type = active.get("type", "unknown").title()
+        game_type = active.get("game_type", "unknown").title()
         embed = create_embed(f"🎮 Console Focus: {game_type}", color=EmbedColors.GAME)
         if game_type == "Crash":
-            multiplier = active.get("view").current_multiplier if active.get("view") else None
+            multiplier = active.get("current_multiplier")
             crash_point = active.get("crash_multiplier")
             embed.add_field(name="Current Multiplier", value=f"{multiplier:.2f}x" if multiplier else "N/A", inline=True)
             embed.add_field(name="Crash Point", value=f"{crash_point:.2f}x", inline=True)
@@ -426,13 +570,32 @@ class Games(commands.Cog):
             embed.add_field(name="Status", value="Game in progress...", inline=False)
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
-# --- Patch: Remove active game on game end for blackjack and crash ---
+class GameView(discord.ui.View):
+    """Base view for games tracked in Games.games
 
-class BlackjackView(discord.ui.View):
+    Views never time out on their own; the game store expires them instead,
+    and the fixed custom_ids let a restarted bot re-attach them to their message.
+    """
+    
+    def __init__(self):
+        super().__init__(timeout=None)
+    
+    def _lock_user(self):
+        return self.bot.data_manager.lock_users(self.user.guild_id, self.user.user_id)
+    
+    def _save_game(self, ttl: float = None, **changes):
+        if hasattr(self, "_parent_games_cog"):
+            self._parent_games_cog.save_game(self, ttl=ttl, **changes)
+    
+    def _finish_game(self):
+        if hasattr(self, "_parent_games_cog"):
+            self._parent_games_cog.finish_game(self)
+
+class BlackjackView(GameView):
     """View for blackjack game interactions"""
     
     def __init__(self, bot, user, guild, dealer_cards, player_cards, bet):
-        super().__init__(timeout=60)
+        super().__init__()
         self.bot = bot
         self.user = user
         self.guild = guild
@@ -441,106 +604,114 @@ class BlackjackView(discord.ui.View):
         self.bet = bet
         self.game_over = False
     
-    @discord.ui.button(label="Hit", style=discord.ButtonStyle.primary, emoji="👆")
+    @discord.ui.button(label="Hit", style=discord.ButtonStyle.primary, emoji="👆", custom_id="blackjack:hit")
     async def hit(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.game_over or interaction.user.id != self.user.user_id:
-            return
-        
-        # Draw card
-        new_card = generate_cards(1)[0]
-        self.player_cards.append(new_card)
-        player_value = calculate_blackjack_value(self.player_cards)
-        
-        embed = create_game_embed("🃏 Blackjack")
-        embed.add_field(
-            name="Your Cards", 
-            value=f"{format_cards(self.player_cards)}\nValue: {player_value}", 
-            inline=True
-        )
-        embed.add_field(
-            name="Dealer Cards", 
-            value=f"{self.dealer_cards[0][0]} ❓\nValue: {self.dealer_cards[0][1]} + ?", 
-            inline=True
-        )
-        embed.add_field(name="Bet", value=format_currency(self.bet, self.guild.cashmoji), inline=False)
-        
-        if player_value > 21:
-            # Bust
-            self.game_over = True
-            self.user.update_stats('games_played', 1)
-            embed.add_field(name="Result", value="Bust! You lose!", inline=False)
-            embed.color = EmbedColors.ERROR
-            self.clear_items()
-        
-        self.bot.data_manager.update_user(self.user)
+        async with self._lock_user():
+            if self.game_over or interaction.user.id != self.user.user_id:
+                return
+            
+            # Draw card
+            new_card = generate_cards(1)[0]
+            self.player_cards.append(new_card)
+            player_value = calculate_blackjack_value(self.player_cards)
+            
+            embed = create_game_embed("🃏 Blackjack")
+            embed.add_field(
+                name="Your Cards", 
+                value=f"{format_cards(self.player_cards)}\nValue: {player_value}", 
+                inline=True
+            )
+            embed.add_field(
+                name="Dealer Cards", 
+                value=f"{self.dealer_cards[0][0]} ❓\nValue: {self.dealer_cards[0][1]} + ?", 
+                inline=True
+            )
+            embed.add_field(name="Bet", value=format_currency(self.bet, self.guild.cashmoji), inline=False)
+            
+            if player_value > 21:
+                # Bust
+                self.game_over = True
+                self.user.update_stats('games_played', 1)
+                embed.add_field(name="Result", value="Bust! You lose!", inline=False)
+                embed.color = EmbedColors.ERROR
+                self.clear_items()
+                self._finish_game()
+            else:
+                # Each action gives the player a fresh timeout
+                self._save_game(ttl=Config.GAME_STATE_TTL, player_cards=self.player_cards)
+            
+            self.bot.data_manager.update_user(self.user)
+        # Edit with the user's lock released
         await interaction.response.edit_message(embed=embed, view=self)
     
-    @discord.ui.button(label="Stand", style=discord.ButtonStyle.secondary, emoji="✋")
+    @discord.ui.button(label="Stand", style=discord.ButtonStyle.secondary, emoji="✋", custom_id="blackjack:stand")
     async def stand(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.game_over or interaction.user.id != self.user.user_id:
-            return
-        
-        self.game_over = True
-        self.clear_items()
-        
-        # Dealer plays
-        dealer_value = calculate_blackjack_value(self.dealer_cards)
-        while dealer_value < 17:
-            new_card = generate_cards(1)[0]
-            self.dealer_cards.append(new_card)
+        async with self._lock_user():
+            if self.game_over or interaction.user.id != self.user.user_id:
+                return
+            
+            self.game_over = True
+            self.clear_items()
+            self._finish_game()
+            
+            # Dealer plays
             dealer_value = calculate_blackjack_value(self.dealer_cards)
-        
-        player_value = calculate_blackjack_value(self.player_cards)
-        
-        embed = create_game_embed("🃏 Blackjack - Final")
-        embed.add_field(
-            name="Your Cards", 
-            value=f"{format_cards(self.player_cards)}\nValue: {player_value}", 
-            inline=True
-        )
-        embed.add_field(
-            name="Dealer Cards", 
-            value=f"{format_cards(self.dealer_cards)}\nValue: {dealer_value}", 
-            inline=True
-        )
-        embed.add_field(name="Bet", value=format_currency(self.bet, self.guild.cashmoji), inline=False)
-        
-        # Determine winner
-        if dealer_value > 21:
-            # Dealer bust
-            winnings = self.bet * 2
-            self.user.balance += winnings
-            self.user.update_stats('games_won', 1)
-            self.user.update_stats('total_won', winnings)
-            embed.add_field(name="Result", value=f"Dealer bust! You win {format_currency(winnings, self.guild.cashmoji)}", inline=False)
-            embed.color = EmbedColors.SUCCESS
-        elif player_value > dealer_value:
-            # Player wins
-            winnings = self.bet * 2
-            self.user.balance += winnings
-            self.user.update_stats('games_won', 1)
-            self.user.update_stats('total_won', winnings)
-            embed.add_field(name="Result", value=f"You win {format_currency(winnings, self.guild.cashmoji)}!", inline=False)
-            embed.color = EmbedColors.SUCCESS
-        elif player_value == dealer_value:
-            # Push
-            self.user.balance += self.bet
-            embed.add_field(name="Result", value="Push! Bet returned", inline=False)
-            embed.color = EmbedColors.WARNING
-        else:
-            # Dealer wins
-            embed.add_field(name="Result", value="Dealer wins!", inline=False)
-            embed.color = EmbedColors.ERROR
-        
-        self.user.update_stats('games_played', 1)
-        self.bot.data_manager.update_user(self.user)
+            while dealer_value < 17:
+                new_card = generate_cards(1)[0]
+                self.dealer_cards.append(new_card)
+                dealer_value = calculate_blackjack_value(self.dealer_cards)
+            
+            player_value = calculate_blackjack_value(self.player_cards)
+            
+            embed = create_game_embed("🃏 Blackjack - Final")
+            embed.add_field(
+                name="Your Cards", 
+                value=f"{format_cards(self.player_cards)}\nValue: {player_value}", 
+                inline=True
+            )
+            embed.add_field(
+                name="Dealer Cards", 
+                value=f"{format_cards(self.dealer_cards)}\nValue: {dealer_value}", 
+                inline=True
+            )
+            embed.add_field(name="Bet", value=format_currency(self.bet, self.guild.cashmoji), inline=False)
+            
+            # Determine winner
+            if dealer_value > 21:
+                # Dealer bust
+                winnings = self.bet * 2
+                self.user.balance += winnings
+                self.user.update_stats('games_won', 1)
+                self.user.update_stats('total_won', winnings)
+                embed.add_field(name="Result", value=f"Dealer bust! You win {format_currency(winnings, self.guild.cashmoji)}", inline=False)
+                embed.color = EmbedColors.SUCCESS
+            elif player_value > dealer_value:
+                # Player wins
+                winnings = self.bet * 2
+                self.user.balance += winnings
+                self.user.update_stats('games_won', 1)
+                self.user.update_stats('total_won', winnings)
+                embed.add_field(name="Result", value=f"You win {format_currency(winnings, self.guild.cashmoji)}!", inline=False)
+                embed.color = EmbedColors.SUCCESS
+            elif player_value == dealer_value:
+                # Push
+                self.user.balance += self.bet
+                embed.add_field(name="Result", value="Push! Bet returned", inline=False)
+                embed.color = EmbedColors.WARNING
+            else:
+                # Dealer wins
+                embed.add_field(name="Result", value="Dealer wins!", inline=False)
+                embed.color = EmbedColors.ERROR
+            
+            self.user.update_stats('games_played', 1)
+            self.bot.data_manager.update_user(self.user)
         await interaction.response.edit_message(embed=embed, view=self)
 
-class CrashView(discord.ui.View):
+class CrashView(GameView):
     """View for crash game interactions"""
     
     def __init__(self, bot, user, guild, bet, crash_multiplier):
-        super().__init__(timeout=30)
+        super().__init__()
         self.bot = bot
         self.user = user
         self.guild = guild
@@ -548,13 +719,33 @@ class CrashView(discord.ui.View):
         self.crash_multiplier = crash_multiplier
         self.current_multiplier = 1.00
         self.game_over = False
-        self.interaction = None
+        self.message = None
+        self.graph = None
     
-    def start_game(self, interaction):
-        """Start the crash game animation"""
-        self.interaction = interaction
+    def start_game(self, message):
+        """Start the crash game animation on the game's message"""
+        self.message = message
+        if hasattr(self, "_parent_games_cog"):
+            self.graph = CrashGraph(self._parent_games_cog.image_generator)
         self.bot.loop.create_task(self.update_multiplier())
     
+    async def _graph_file(self, embed: discord.Embed, final: bool = False, crashed: bool = False,
+                          win_multiplier: float = 1.0):
+        """Attach the live graph, or the replay of the round when `final`, to `embed`"""
+        if self.graph is None:
+            return []
+        try:
+            if final:
+                image = await asyncio.to_thread(self.graph.animation, crashed, win_multiplier)
+            else:
+                image = await asyncio.to_thread(self.graph.update, self.current_multiplier)
+        except Exception as e:
+            logging.error(f"Error rendering crash graph: {e}")
+            return []
+        filename = image_filename("crash", image)
+        embed.set_image(url=f"attachment://{filename}")
+        return [discord.File(image, filename=filename)]
+    
     async def update_multiplier(self):
         """Update multiplier until crash"""
         while not self.game_over and self.current_multiplier < self.crash_multiplier:
@@ -564,18 +755,24 @@ class CrashView(discord.ui.View):
             
             self.current_multiplier += 0.1
             self.current_multiplier = round(self.current_multiplier, 2)
+            self._save_game(current_multiplier=self.current_multiplier)
             
             embed = create_game_embed("🚀 Crash Game")
             embed.add_field(name="Bet", value=format_currency(self.bet, self.guild.cashmoji), inline=True)
             embed.add_field(name="Current Multiplier", value=f"{self.current_multiplier}x", inline=True)
             embed.add_field(name="Status", value="🟢 Flying...", inline=False)
+            attachments = await self._graph_file(embed)
+            if self.game_over:
+                break
             
             try:
-                await self.interaction.edit_original_response(embed=embed, view=self)
+                await self.message.edit(embed=embed, view=self, attachments=attachments)
             except:
                 break
         
-        if not self.game_over:
+        async with self._lock_user():
+            if self.game_over:
+                return
             # Game crashed
             self.game_over = True
             self.clear_items()
@@ -587,37 +784,42 @@ class CrashView(discord.ui.View):
             
             self.user.update_stats('games_played', 1)
             self.bot.data_manager.update_user(self.user)
-            
-            try:
-                await self.interaction.edit_original_response(embed=embed, view=self)
-            except:
-                pass
+            self._finish_game()
+        # Render and edit with the user's lock released
+        attachments = await self._graph_file(embed, final=True, crashed=True)
+        
+        try:
+            await self.message.edit(embed=embed, view=self, attachments=attachments)
+        except:
+            pass
     
-    @discord.ui.button(label="Cash Out", style=discord.ButtonStyle.success, emoji="💰")
+    @discord.ui.button(label="Cash Out", style=discord.ButtonStyle.success, emoji="💰", custom_id="crash:cash_out")
     async def cash_out(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.game_over or interaction.user.id != self.user.user_id:
-            return
-        
-        self.game_over = True
-        self.clear_items()
-        
-        winnings = int(self.bet * self.current_multiplier)
-        self.user.balance += winnings
-        self.user.update_stats('games_won', 1)
-        self.user.update_stats('total_won', winnings)
-        self.user.update_stats('games_played', 1)
-        
-        embed = create_success_embed("💰 Cashed Out!")
-        embed.add_field(name="Cash Out Multiplier", value=f"{self.current_multiplier}x", inline=True)
-        embed.add_field(name="Crash Point", value=f"{self.crash_multiplier}x", inline=True)
-        embed.add_field(name="Winnings", value=format_currency(winnings, self.guild.cashmoji), inline=False)
-        
-        # Remove active game
-        if hasattr(self, "_parent_games_cog"):
-            self._parent_games_cog.active_games.pop(getattr(self, "_user_id", None), None)
-        
-        self.bot.data_manager.update_user(self.user)
-        await interaction.response.edit_message(embed=embed, view=self)
+        async with self._lock_user():
+            if self.game_over or interaction.user.id != self.user.user_id:
+                return
+            
+            self.game_over = True
+            self.clear_items()
+            
+            winnings = int(self.bet * self.current_multiplier)
+            self.user.balance += winnings
+            self.user.update_stats('games_won', 1)
+            self.user.update_stats('total_won', winnings)
+            self.user.update_stats('games_played', 1)
+            
+            embed = create_success_embed("💰 Cashed Out!")
+            embed.add_field(name="Cash Out Multiplier", value=f"{self.current_multiplier}x", inline=True)
+            embed.add_field(name="Crash Point", value=f"{self.crash_multiplier}x", inline=True)
+            embed.add_field(name="Winnings", value=format_currency(winnings, self.guild.cashmoji), inline=False)
+            
+            # Remove active game
+            self._finish_game()
+            
+            self.bot.data_manager.update_user(self.user)
+        # Render and edit with the user's lock released
+        attachments = await self._graph_file(embed, final=True, win_multiplier=self.current_multiplier)
+        await interaction.response.edit_message(embed=embed, view=self, attachments=attachments)
 
 async def setup(bot):
     await bot.add_cog(Games(bot))
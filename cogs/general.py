@@ -2,10 +2,12 @@ import discord
 from discord.ext import commands
 from modules.economy import Economy
 from modules.helpers import make_embed
+from modules.slotgif import SlotGif
+import asyncio
+import logging
 import os
 import random
 import bisect
-from PIL import Image
 
 from modules.helpers import ABS_PATH, InsufficientFundsException, DEFAULT_BET
 
@@ -16,7 +18,16 @@ B_COOLDOWN = 24  # hours
 class GamblingHelpers(commands.Cog, name='General'):
     def __init__(self, client: commands.Bot) -> None:
         self.client = client
-        self.economy = Economy()
+        self.economy = Economy(getattr(client, 'db_manager', None))
+        self.slot_gif = SlotGif(os.path.join(ABS_PATH, 'assets'))
+
+    async def cog_load(self):
+        # Decoding the slot assets blocks; do it once, off the event loop
+        try:
+            await asyncio.to_thread(self.slot_gif.load)
+        except Exception as e:
+            # Only !slots needs them; it retries the load on first use
+            logging.error(f"Failed to load slot machine assets: {e}")
 
     @commands.command(hidden=True)
     @commands.is_owner()
@@ -28,9 +39,9 @@ class GamblingHelpers(commands.Cog, name='General'):
         credits: int=0
     ):
         if money:
-            self.economy.set_money(user_id, money, ctx.guild.id if ctx.guild else 0)
+            await self.economy.set_money(user_id, money, ctx.guild.id if ctx.guild else 0)
         if credits:
-            self.economy.set_credits(user_id, credits, ctx.guild.id if ctx.guild else 0)
+            await self.economy.set_credits(user_id, credits, ctx.guild.id if ctx.guild else 0)
         await ctx.send("Set complete.")
 
     @commands.command(
@@ -40,7 +51,7 @@ class GamblingHelpers(commands.Cog, name='General'):
     @commands.cooldown(1, B_COOLDOWN*3600, type=commands.BucketType.user)
     async def add(self, ctx: commands.Context):
         amount = DEFAULT_BET*B_MULT
-        self.economy.add_money(ctx.author.id, amount, ctx.guild.id if ctx.guild else 0)
+        await self.economy.add_money(ctx.author.id, amount, ctx.guild.id if ctx.guild else 0)
         await ctx.send(f"Added ${amount} come back in {B_COOLDOWN}hrs")
 
     @commands.command(
@@ -50,7 +61,7 @@ class GamblingHelpers(commands.Cog, name='General'):
     )
     async def money(self, ctx: commands.Context, user: discord.Member=None):
         user_obj = user or ctx.author
-        profile = self.economy.get_entry(user_obj.id, ctx.guild.id if ctx.guild else 0)
+        profile = await self.economy.get_entry(user_obj.id, ctx.guild.id if ctx.guild else 0)
         embed = make_embed(
             title=user_obj.display_name,
             description=(
@@ -68,7 +79,7 @@ class GamblingHelpers(commands.Cog, name='General'):
         aliases=["top"]
     )
     async def leaderboard(self, ctx):
-        entries = self.economy.top_entries(5, ctx.guild.id if ctx.guild else 0)
+        entries = await self.economy.top_entries(5, ctx.guild.id if ctx.guild else 0)
         embed = make_embed(title='Leaderboard:', color=discord.Color.gold())
         for i, entry in enumerate(entries):
             user = self.client.get_user(entry[0]) or await self.client.fetch_user(entry[0])
@@ -80,11 +91,11 @@ class GamblingHelpers(commands.Cog, name='General'):
             )
         await ctx.send(embed=embed)
 
-    def check_bet(self, ctx: commands.Context, bet: int=DEFAULT_BET):
+    async def check_bet(self, ctx: commands.Context, bet: int=DEFAULT_BET):
         bet = int(bet)
         if bet <= 0 or bet > 1000:
             raise commands.errors.BadArgument()
-        current = self.economy.get_entry(ctx.author.id)[2]
+        current = (await self.economy.get_entry(ctx.author.id))[2]
         if bet > current:
             raise InsufficientFundsException(current, bet)
 
@@ -93,14 +104,9 @@ class GamblingHelpers(commands.Cog, name='General'):
         usage='slots *[bet]'
     )
     async def slots(self, ctx: commands.Context, bet: int=1):
-        self.check_bet(ctx, bet=bet)
-        path = os.path.join(ABS_PATH, 'assets/')
-        facade = Image.open(f'{path}slot-face.png').convert('RGBA')
-        reel = Image.open(f'{path}slot-reel.png').convert('RGBA')
-
-        rw, rh = reel.size
-        item = 180
-        items = rh//item
+        await self.check_bet(ctx, bet=bet)
+        await asyncio.to_thread(self.slot_gif.load)
+        items = self.slot_gif.symbol_count
 
         s1 = random.randint(1, items-1)
         s2 = random.randint(1, items-1)
@@ -120,33 +126,18 @@ class GamblingHelpers(commands.Cog, name='General'):
             s2 = s2 - 6 if s2 == items else s2
             s3 = s3 - 6 if s3 == items else s3
 
-        images = []
-        speed = 6
-        for i in range(1, (item//speed)+1):
-            bg = Image.new('RGBA', facade.size, color=(255,255,255))
-            bg.paste(reel, (25 + rw*0, 100-(speed * i * s1)))
-            bg.paste(reel, (25 + rw*1, 100-(speed * i * s2))) # dont ask me why this works, but it took me hours
-            bg.paste(reel, (25 + rw*2, 100-(speed * i * s3)))
-            bg.alpha_composite(facade)
-            images.append(bg)
-
-        fp = str(id(ctx.author.id))+'.gif'
-        images[0].save(
-            fp,
-            save_all=True,
-            append_images=images[1:], # append all images after first to first
-            duration=50  # duration of each slide (ms)
-        )
+        # Rendered in memory off the event loop; nothing is written to disk
+        gif = await asyncio.to_thread(self.slot_gif.render, (s1, s2, s3))
 
         # win logic
         result = ('lost', bet)
-        self.economy.add_credits(ctx.author.id, bet*-1)       
+        await self.economy.add_credits(ctx.author.id, bet*-1)       
         # (1+s1)%6 gets the symbol 0-5 inclusive
         if (1+s1)%6 == (1+s2)%6 == (1+s3)%6:
             symbol = (1+s1)%6
             reward = [4, 80, 40, 25, 10, 5][symbol] * bet
             result = ('won', reward)
-            self.economy.add_credits(ctx.author.id, reward)
+            await self.economy.add_credits(ctx.author.id, reward)
 
         embed = make_embed(
             title=(
@@ -155,7 +146,7 @@ class GamblingHelpers(commands.Cog, name='General'):
             ),
             description=(
                 'You now have ' +
-                f'**{self.economy.get_entry(ctx.author.id)[2]}** ' +
+                f'**{(await self.economy.get_entry(ctx.author.id))[2]}** ' +
                 'credits.'
             ),
             color=(
@@ -164,8 +155,8 @@ class GamblingHelpers(commands.Cog, name='General'):
             )
         )
 
-        file = discord.File(fp, filename=fp)
-        embed.set_image(url=f"attachment://{fp}") # none of this makes sense to me :)
+        file = discord.File(gif, filename='slots.gif')
+        embed.set_image(url="attachment://slots.gif")
         await ctx.send(
             file=file,
             embed=embed
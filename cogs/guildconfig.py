@@ -10,9 +10,9 @@ class GuildConfig(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
     
-    def is_admin_or_owner(self, interaction: discord.Interaction) -> bool:
+    async def is_admin_or_owner(self, interaction: discord.Interaction) -> bool:
         """Check if user is admin or server owner"""
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         return (interaction.user.guild_permissions.administrator or 
                 interaction.user.id == interaction.guild.owner_id or
                 guild.is_admin(interaction.user.id))
@@ -31,7 +31,7 @@ class GuildConfig(commands.Cog):
     
     async def show_config(self, interaction: discord.Interaction):
         """Show current guild configuration"""
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         
         embed = create_embed(f"⚙️ {interaction.guild.name} Configuration", color=EmbedColors.INFO)
         
@@ -78,7 +78,7 @@ class GuildConfig(commands.Cog):
     @app_commands.describe(name="New name for cash currency")
     async def config_cash_name(self, interaction: discord.Interaction, name: str):
         """Configure cash currency name"""
-        if not self.is_admin_or_owner(interaction):
+        if not await self.is_admin_or_owner(interaction):
             await interaction.response.send_message(
                 embed=create_error_embed("Permission Denied", "You need administrator permissions or be a bot admin"), 
                 ephemeral=True
@@ -92,7 +92,7 @@ class GuildConfig(commands.Cog):
             )
             return
         
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         old_name = guild.cash_name
         guild.cash_name = name
         
@@ -107,14 +107,14 @@ class GuildConfig(commands.Cog):
     @app_commands.describe(emoji="New emoji for cash currency")
     async def config_cashmoji(self, interaction: discord.Interaction, emoji: str):
         """Configure cash currency emoji"""
-        if not self.is_admin_or_owner(interaction):
+        if not await self.is_admin_or_owner(interaction):
             await interaction.response.send_message(
                 embed=create_error_embed("Permission Denied", "You need administrator permissions or be a bot admin"), 
                 ephemeral=True
             )
             return
         
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         old_emoji = guild.cashmoji
         guild.cashmoji = emoji
         
@@ -129,7 +129,7 @@ class GuildConfig(commands.Cog):
     @app_commands.describe(name="New name for crypto currency")
     async def config_crypto_name(self, interaction: discord.Interaction, name: str):
         """Configure crypto currency name"""
-        if not self.is_admin_or_owner(interaction):
+        if not await self.is_admin_or_owner(interaction):
             await interaction.response.send_message(
                 embed=create_error_embed("Permission Denied", "You need administrator permissions or be a bot admin"), 
                 ephemeral=True
@@ -143,7 +143,7 @@ class GuildConfig(commands.Cog):
             )
             return
         
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         old_name = guild.crypto_name
         guild.crypto_name = name
         
@@ -158,14 +158,14 @@ class GuildConfig(commands.Cog):
     @app_commands.describe(emoji="New emoji for crypto currency")
     async def config_cryptomoji(self, interaction: discord.Interaction, emoji: str):
         """Configure crypto currency emoji"""
-        if not self.is_admin_or_owner(interaction):
+        if not await self.is_admin_or_owner(interaction):
             await interaction.response.send_message(
                 embed=create_error_embed("Permission Denied", "You need administrator permissions or be a bot admin"), 
                 ephemeral=True
             )
             return
         
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         old_emoji = guild.cryptomoji
         guild.cryptomoji = emoji
         
@@ -191,14 +191,14 @@ class GuildConfig(commands.Cog):
                             channel4: discord.TextChannel = None,
                             channel5: discord.TextChannel = None):
         """Configure allowed channels"""
-        if not self.is_admin_or_owner(interaction):
+        if not await self.is_admin_or_owner(interaction):
             await interaction.response.send_message(
                 embed=create_error_embed("Permission Denied", "You need administrator permissions or be a bot admin"), 
                 ephemeral=True
             )
             return
         
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         
         # Collect non-None channels
         channels = [ch for ch in [channel1, channel2, channel3, channel4, channel5] if ch is not None]
@@ -221,7 +221,7 @@ class GuildConfig(commands.Cog):
     @app_commands.describe(user="User to add as bot admin")
     async def config_add_admin(self, interaction: discord.Interaction, user: discord.Member):
         """Add bot admin"""
-        if not self.is_admin_or_owner(interaction):
+        if not await self.is_admin_or_owner(interaction):
             await interaction.response.send_message(
                 embed=create_error_embed("Permission Denied", "You need administrator permissions or be a bot admin"), 
                 ephemeral=True
@@ -235,7 +235,7 @@ class GuildConfig(commands.Cog):
             )
             return
         
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         
         if guild.is_admin(user.id):
             await interaction.response.send_message(
@@ -257,14 +257,14 @@ class GuildConfig(commands.Cog):
     @app_commands.describe(user="User to remove from bot admins")
     async def config_remove_admin(self, interaction: discord.Interaction, user: discord.Member):
         """Remove bot admin"""
-        if not self.is_admin_or_owner(interaction):
+        if not await self.is_admin_or_owner(interaction):
             await interaction.response.send_message(
                 embed=create_error_embed("Permission Denied", "You need administrator permissions or be a bot admin"), 
                 ephemeral=True
             )
             return
         
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         
         if not guild.is_admin(user.id):
             await interaction.response.send_message(
@@ -286,14 +286,14 @@ class GuildConfig(commands.Cog):
     @app_commands.describe(enabled="Whether to disable update messages")
     async def config_disable_updates(self, interaction: discord.Interaction, enabled: bool):
         """Configure update messages"""
-        if not self.is_admin_or_owner(interaction):
+        if not await self.is_admin_or_owner(interaction):
             await interaction.response.send_message(
                 embed=create_error_embed("Permission Denied", "You need administrator permissions or be a bot admin"), 
                 ephemeral=True
             )
             return
         
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         guild.disable_update_messages = enabled
         
         status = "disabled" if enabled else "enabled"
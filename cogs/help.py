@@ -46,7 +46,7 @@ class Help(commands.Cog):
         
         embed.add_field(
             name="📊 Stats & Info",
-            value="`/leaderboard` - View leaderboards\n`/cooldowns` - Check cooldowns\n`/stats` - Bot statistics",
+            value="`/leaderboard` - View leaderboards\n`/rank` - Your leaderboard position\n`/cooldowns` - Check cooldowns\n`/stats` - Bot statistics",
             inline=True
         )
         
@@ -123,6 +123,12 @@ class Help(commands.Cog):
                 'parameters': 'None',
                 'examples': '/work'
             },
+            'rank': {
+                'description': 'See your exact leaderboard position, percentile and neighbours',
+                'usage': '/rank [category] [member]',
+                'parameters': 'category: balance, crypto, level or games_won (optional)\nmember: Member to look up (optional)',
+                'examples': '/rank\n/rank level\n/rank balance @friend'
+            },
             'profile': {
                 'description': 'View your profile, stats, and inventory',
                 'usage': '/profile [page]',
@@ -15,8 +15,8 @@ class Mining(commands.Cog):
     @app_commands.command(name="mine", description="Mine for resources")
     async def mine(self, interaction: discord.Interaction):
         """Mine command"""
-        user = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        user = await self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         
         if user.mining_energy < Config.MINING_ENERGY_COST:
             embed = create_error_embed(
@@ -37,15 +37,15 @@ class Mining(commands.Cog):
         # Random bonus chance
         bonus_chance = random.random()
         if bonus_chance < 0.1:  # 10% chance for rare materials
-            material = random.choice(['💎', '🏆', '⭐'])
+            material = random.choice(MINING_MATERIALS['rare'])
             reward = int(base_reward * pickaxe_level * 3 * multiplier)
             reward_type = "rare"
         elif bonus_chance < 0.3:  # 20% chance for uncommon materials
-            material = random.choice(['🥈', '🔶', '💰'])
+            material = random.choice(MINING_MATERIALS['uncommon'])
             reward = int(base_reward * pickaxe_level * 2 * multiplier)
             reward_type = "uncommon"
         else:  # 70% chance for common materials
-            material = random.choice(['🪨', '⚫', '🤎'])
+            material = random.choice(MINING_MATERIALS['common'])
             reward = int(base_reward * pickaxe_level * multiplier)
             reward_type = "common"
         
@@ -77,8 +77,8 @@ class Mining(commands.Cog):
     @app_commands.command(name="dig", description="Dig for buried treasure")
     async def dig(self, interaction: discord.Interaction):
         """Dig command - chance for special rewards"""
-        user = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        user = await self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         
         if user.is_on_cooldown('dig'):
             remaining = user.get_cooldown_remaining('dig')
@@ -149,7 +149,7 @@ class Mining(commands.Cog):
     @app_commands.command(name="inventory", description="View your mining inventory")
     async def inventory(self, interaction: discord.Interaction):
         """Display mining inventory"""
-        user = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
+        user = await self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
         
         embed = create_embed("📦 Mining Inventory", color=EmbedColors.MINING)
         
@@ -201,8 +201,8 @@ Total Mined: {format_currency(mining_data.get('total_mined', 0), '⛏️')}
                      upgrade_id: str = "level", 
                      amount: int = 1):
         """Upgrade mining equipment"""
-        user = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        user = await self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         
         if miner.lower() == "pickaxe" and upgrade_id.lower() == "level":
             current_level = user.mining_data.get('pickaxe_level', 1)
@@ -246,13 +246,13 @@ Total Mined: {format_currency(mining_data.get('total_mined', 0), '⛏️')}
     @app_commands.command(name="process", description="Process raw materials into refined goods")
     async def process(self, interaction: discord.Interaction):
         """Process materials command"""
-        user = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
-        guild = self.bot.data_manager.get_guild(interaction.guild.id)
+        user = await self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
+        guild = await self.bot.data_manager.get_guild(interaction.guild.id)
         
         inventory = user.inventory
         
         # Check for materials to process
-        raw_materials = ['🪨', '⚫', '🤎']
+        raw_materials = MINING_MATERIALS['common']
         total_raw = sum(inventory.get(material, 0) for material in raw_materials)
         
         if total_raw == 0:
@@ -300,7 +300,7 @@ Total Mined: {format_currency(mining_data.get('total_mined', 0), '⛏️')}
     @app_commands.command(name="start_mine", description="Start a mining expedition")
     async def start_mine(self, interaction: discord.Interaction):
         """Start mining expedition command"""
-        user = self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
+        user = await self.bot.data_manager.get_user(interaction.user.id, interaction.guild.id)
         
         if user.is_on_cooldown('expedition'):
             remaining = user.get_cooldown_remaining('expedition')
@@ -7,7 +7,28 @@ class Config:
     
     # Bot settings
     BOT_TOKEN = os.getenv('DISCORD_BOT_TOKEN', '')
-    
+
+    # Database settings
+    DATABASE_URL = os.getenv(
+        'DATABASE_URL',
+        'sqlite:///' + os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'casino.db')
+    )
+    DB_POOL_SIZE = 5
+    DB_MAX_OVERFLOW = 10
+    DB_POOL_TIMEOUT = 30  # seconds to wait for a free connection
+    AUTO_SAVE_INTERVAL = 60  # seconds between write-behind flushes
+    WRITE_BEHIND_MAX_DIRTY = 500  # flush early once this many objects are dirty
+    USER_CACHE_SIZE = 50000  # users kept in the DataManager identity map
+    GUILD_CACHE_SIZE = 5000
+    # Guilds whose users are all kept resident in array-backed columns (comma separated ids)
+    COLUMNAR_GUILDS = {int(guild_id) for guild_id in os.getenv('COLUMNAR_GUILDS', '').split(',') if guild_id.strip()}
+    GLOBAL_LEADERBOARD_TTL = 30  # seconds a merged global leaderboard is reused
+    GLOBAL_LEADERBOARD_DEPTH = 25  # entries kept per guild and in the merged list
+    LEGACY_DATABASE = 'economy.db'  # LegacyEconomy SQLite file
+    LEGACY_COMMIT_WINDOW = 0.05  # seconds LegacyEconomy coalesces commits over (0 = commit every write)
+    LEGACY_READ_POOL_SIZE = 4  # read connections of AsyncLegacyEconomy
+    LEGACY_WRITE_BATCH = 256  # writes AsyncLegacyEconomy groups into one commit at most
+
     # Economy settings
     DAILY_REWARD = 1000
     WEEKLY_REWARD = 5000
@@ -27,6 +48,21 @@ class Config:
     MIN_BET = 10
     MAX_BET = 10000
     HOUSE_EDGE = 0.02  # 2% house edge
+    GAME_STATE_TTL = 60  # seconds an idle game stays active
+    MAX_ACTIVE_GAMES = 10000  # hard cap on games held in memory
+    OUTCOME_IMAGE_CACHE_SIZE = 1024  # encoded slots/coinflip images kept in memory
+    RENDER_WORKERS = os.cpu_count() or 1  # image rendering processes
+    RENDER_MAX_PENDING = 64  # renders queued or running before new ones are refused
+    IMAGE_BYTE_BUDGET = 8 * 1024  # target attachment size per game image
+    # Sprite-heavy images whose colour emoji do not shrink below ~9 KB in any encoding
+    IMAGE_BYTE_BUDGETS = {'slots': 12 * 1024, 'coinflip': 12 * 1024, 'mining': 12 * 1024}
+    IMAGE_ENCODE_BUDGET_MS = 30  # time spent trying encodings before keeping the smallest
+    IMAGE_REPROBE_AFTER = 50  # encodes well under (or stuck over) budget before the ladder is retried
+    IMAGE_REPROBE_RATIO = 0.5  # share of IMAGE_BYTE_BUDGET that counts as well under it
+    HAND_STRIP_CACHE_SIZE = 512  # rendered blackjack hands kept in memory
+    CRASH_ANIMATION_FRAMES = 60  # frames in the replay of a finished crash round
+    CRASH_FRAME_MS = 100
+    CRASH_FINAL_FRAME_MS = 2000
     
     # Cooldowns (in seconds)
     DAILY_COOLDOWN = 86400  # 24 hours
@@ -1,82 +1,917 @@
 import asyncio
+import copy
 import logging
+import weakref
+from collections import OrderedDict
 from datetime import datetime
-from typing import Dict, Any, Optional, List
-from models import User, Guild, GameState
+from typing import Callable, Dict, Any, Iterator, Optional, List, Set, Tuple
+from sqlalchemy import BigInteger, Boolean, Integer, JSON, String, TypeDecorator, create_engine, delete, event, select, type_coerce
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, sessionmaker
+from config import Config
+from models import User, Guild, GameState, decode_section
+from modules.columnar import GuildColumns, load_columns
+from modules.expiries import ExpiryIndex
+from modules.leaderboard import CATEGORIES, GlobalLeaderboard, LeaderboardIndex
+from modules.locks import UserLockManager
+
+class Base(DeclarativeBase):
+    pass
+
+class EncodedJSON(TypeDecorator):
+    """JSON column that is read back still encoded
+
+    Results skip JSON decoding so models can decode sections lazily, and
+    binds accept already encoded text as well as python values, so untouched
+    sections are written back as loaded.
+    """
+    impl = JSON
+    cache_ok = True
+
+    def bind_processor(self, dialect):
+        encode = self.impl_instance.bind_processor(dialect)
+
+        def process(value):
+            if encode is None or isinstance(value, str):
+                return value
+            return encode(value)
+        return process
+
+    def result_processor(self, dialect, coltype):
+        return None
+
+class UserRecord(Base):
+    """Row backing a models.User"""
+    __tablename__ = 'users'
+
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    guild_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, index=True)
+    balance: Mapped[int] = mapped_column(BigInteger, default=0)
+    crypto_balance: Mapped[int] = mapped_column(BigInteger, default=0)
+    experience: Mapped[int] = mapped_column(BigInteger, default=0)
+    level: Mapped[int] = mapped_column(Integer, default=1)
+    inventory: Mapped[dict] = mapped_column(EncodedJSON, default=dict)
+    mining: Mapped[dict] = mapped_column(EncodedJSON, default=dict)
+    stats: Mapped[dict] = mapped_column(EncodedJSON, default=dict)
+    cooldowns: Mapped[dict] = mapped_column(EncodedJSON, default=dict)
+    boosts: Mapped[dict] = mapped_column(EncodedJSON, default=dict)
+    last_seen: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
+
+class GuildRecord(Base):
+    """Row backing a models.Guild"""
+    __tablename__ = 'guilds'
+
+    guild_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    cash_name: Mapped[str] = mapped_column(String(64))
+    crypto_name: Mapped[str] = mapped_column(String(64))
+    cashmoji: Mapped[str] = mapped_column(String(64))
+    cryptomoji: Mapped[str] = mapped_column(String(64))
+    admin_ids: Mapped[list] = mapped_column(JSON, default=list)
+    channels: Mapped[list] = mapped_column(JSON, default=list)
+    disable_update_messages: Mapped[bool] = mapped_column(Boolean, default=False)
+
+class GameStateRecord(Base):
+    """Row backing a models.GameState"""
+    __tablename__ = 'game_states'
+
+    game_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    game_type: Mapped[str] = mapped_column(String(32), default='')
+    status: Mapped[str] = mapped_column(String(32), default='waiting')
+    created_at: Mapped[str] = mapped_column(String(32))
+    data: Mapped[dict] = mapped_column(JSON, default=dict)
+
+USER_JSON_FIELDS = ('inventory', 'mining', 'stats', 'cooldowns', 'boosts')
+
+# Leaderboard category -> column expression on UserRecord
+LEADERBOARD_COLUMNS = {
+    'balance': UserRecord.balance,
+    'crypto': UserRecord.crypto_balance,
+    'level': UserRecord.level,
+    'games_won': type_coerce(UserRecord.stats, JSON)['games_won'].as_integer(),
+}
 
-# --- Add this stub if DatabaseManager is not implemented elsewhere ---
 class DatabaseManager:
-    def save_all(self): pass
-    def initialize_user(self, user_id, guild_id): pass
-    def initialize_guild(self, guild_id): pass
-    def get_user(self, user_id, guild_id): pass
-    def get_guild(self, guild_id): pass
-    def update_user(self, user): pass
-    def update_guild(self, guild): pass
-    def get_leaderboard(self, guild_id, category, limit): pass
-    def create_game_state(self, game_id, game_data): pass
-    def get_game_state(self, game_id): pass
-    def delete_game_state(self, game_id): pass
-# -------------------------------------------------------------------
+    """SQLAlchemy storage engine for users, guilds and game states.
+
+    Every call checks a connection out of a bounded pool, runs in its own
+    short-lived session and returns detached models objects, so it is safe to
+    call from worker threads as well as from the event loop.
+    """
+
+    def __init__(self, url: str = Config.DATABASE_URL):
+        engine_kwargs = {
+            'pool_size': Config.DB_POOL_SIZE,
+            'max_overflow': Config.DB_MAX_OVERFLOW,
+            'pool_timeout': Config.DB_POOL_TIMEOUT,
+            'pool_pre_ping': True,
+        }
+        if url.startswith('sqlite'):
+            # Sessions are used from executor threads, not just the loop thread
+            engine_kwargs['connect_args'] = {'check_same_thread': False}
+        self.engine = create_engine(url, **engine_kwargs)
+        if url.startswith('sqlite'):
+            event.listen(self.engine, 'connect', _sqlite_on_connect)
+        self._session = sessionmaker(self.engine, expire_on_commit=False)
+        Base.metadata.create_all(self.engine)
+
+    def save_all(self):
+        """Nothing is buffered here; every write commits immediately"""
+        pass
+
+    def close(self):
+        """Release all pooled connections"""
+        self.engine.dispose()
+
+    # --- Users ---
+
+    def initialize_user(self, user_id: int, guild_id: int) -> User:
+        """Load a user, creating the row with defaults if it does not exist"""
+        with self._session.begin() as session:
+            record = session.get(UserRecord, (user_id, guild_id))
+            if record is None:
+                record = _user_to_record(User({}, user_id, guild_id))
+                session.add(record)
+            return _record_to_user(record)
+
+    def get_user(self, user_id: int, guild_id: int) -> User:
+        return self.initialize_user(user_id, guild_id)
+
+    def update_user(self, user: User):
+        self.save_users([user])
+
+    def upsert_balances(self, guild_id: int, rows: List[Tuple[int, int, int]]):
+        """Write (user_id, balance, crypto_balance) rows of a guild in one transaction
+
+        Existing users keep everything but their two balances, so re-running a
+        batch is harmless.
+        """
+        values = [
+            {'user_id': user_id, 'guild_id': guild_id, 'balance': balance, 'crypto_balance': crypto_balance}
+            for user_id, balance, crypto_balance in rows
+        ]
+        if not values:
+            return
+        dialect = self.engine.dialect.name
+        with self._session.begin() as session:
+            if dialect in ('sqlite', 'postgresql'):
+                insert = sqlite_insert if dialect == 'sqlite' else postgresql_insert
+                statement = insert(UserRecord)
+                statement = statement.on_conflict_do_update(
+                    index_elements=[UserRecord.user_id, UserRecord.guild_id],
+                    set_={
+                        'balance': statement.excluded.balance,
+                        'crypto_balance': statement.excluded.crypto_balance,
+                    },
+                )
+                session.execute(statement, values)
+            else:
+                for value in values:
+                    session.merge(UserRecord(**value))
+
+    def iter_guild_users(self, guild_id: int, batch_size: int = 1000) -> Iterator[User]:
+        """Stream every user of a guild, fetching rows in batches"""
+        query = select(UserRecord).where(UserRecord.guild_id == guild_id).execution_options(yield_per=batch_size)
+        with self._session() as session:
+            for record in session.scalars(query):
+                yield _record_to_user(record)
+
+    def save_users(self, users: List[User]):
+        """Write a batch of users in a single transaction"""
+        self.save_batch(users=users)
+
+    def save_batch(self, users: List[User] = (), guilds: List[Guild] = (),
+                   game_states: List[GameState] = (), deleted_game_ids: List[str] = ()):
+        """Write users, guilds and game states, and delete game states, in one transaction"""
+        with self._session.begin() as session:
+            self._upsert(session, UserRecord, [_user_to_record(user) for user in users])
+            self._upsert(session, GuildRecord, [_guild_to_record(guild) for guild in guilds])
+            if deleted_game_ids:
+                session.execute(delete(GameStateRecord).where(GameStateRecord.game_id.in_(deleted_game_ids)))
+            self._upsert(session, GameStateRecord, [_game_state_to_record(state) for state in game_states])
+
+    def _upsert(self, session, model, records: List[Base]):
+        """Insert or overwrite whole rows with one executemany, without reading them first"""
+        if not records:
+            return
+        table = model.__table__
+        values = [{column.key: getattr(record, column.key) for column in table.columns} for record in records]
+        dialect = self.engine.dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            insert = sqlite_insert if dialect == 'sqlite' else postgresql_insert
+            statement = insert(model)
+            statement = statement.on_conflict_do_update(
+                index_elements=list(table.primary_key.columns),
+                set_={column.key: statement.excluded[column.key] for column in table.columns if not column.primary_key},
+            )
+            session.execute(statement, values)
+        else:
+            for record in records:
+                session.merge(record)
+
+    # --- Guilds ---
+
+    def initialize_guild(self, guild_id: int) -> Guild:
+        """Load a guild, creating the row from Config.DEFAULT_GUILD_CONFIG if needed"""
+        with self._session.begin() as session:
+            record = session.get(GuildRecord, guild_id)
+            if record is None:
+                record = _guild_to_record(Guild(copy.deepcopy(Config.DEFAULT_GUILD_CONFIG), guild_id))
+                session.add(record)
+            return _record_to_guild(record)
+
+    def get_guild(self, guild_id: int) -> Guild:
+        return self.initialize_guild(guild_id)
+
+    def update_guild(self, guild: Guild):
+        self.save_guilds([guild])
+
+    def save_guilds(self, guilds: List[Guild]):
+        """Write a batch of guilds in a single transaction"""
+        self.save_batch(guilds=guilds)
+
+    # --- Leaderboards ---
+
+    def get_leaderboard(self, guild_id: int, category: str, limit: int) -> List[Dict]:
+        """Top users of a guild for a category as [{'user_id', 'value'}]"""
+        column = LEADERBOARD_COLUMNS.get(category)
+        if column is None:
+            return []
+        query = (
+            select(UserRecord.user_id, column)
+            .where(UserRecord.guild_id == guild_id)
+            .order_by(column.desc())
+            .limit(limit)
+        )
+        with self._session() as session:
+            return [
+                {'user_id': user_id, 'value': value or 0}
+                for user_id, value in session.execute(query)
+            ]
+
+    def get_guild_ids(self) -> List[int]:
+        """Every guild that has at least one user row (a scan of the guild_id index)"""
+        with self._session() as session:
+            return list(session.scalars(select(UserRecord.guild_id).distinct()))
+
+    def get_guild_scores(self, guild_id: int) -> List[Tuple[int, Tuple[int, ...]]]:
+        """(user_id, scores) for every user of a guild, scores ordered like CATEGORIES"""
+        query = (
+            select(UserRecord.user_id, *(LEADERBOARD_COLUMNS[c] for c in CATEGORIES))
+            .where(UserRecord.guild_id == guild_id)
+        )
+        with self._session() as session:
+            return [
+                (user_id, tuple(value or 0 for value in values))
+                for user_id, *values in session.execute(query)
+            ]
+
+    def get_guild_expiries(self, guild_id: int) -> List[Tuple[int, Dict[str, int]]]:
+        """(user_id, expiries) for every user of a guild, see modules.expiries.user_expiries"""
+        query = (
+            select(UserRecord.user_id, UserRecord.cooldowns, UserRecord.boosts)
+            .where(UserRecord.guild_id == guild_id)
+        )
+        with self._session() as session:
+            entries = []
+            for user_id, cooldowns, boosts in session.execute(query):
+                # Also converts rows still holding legacy ISO strings
+                expiries = dict(decode_section('cooldowns', cooldowns))
+                for boost_type, boost in decode_section('boosts', boosts).items():
+                    expiries[f'boost:{boost_type}'] = boost['expires_at']
+                entries.append((user_id, expiries))
+            return entries
+
+    # --- Game states ---
+
+    def create_game_state(self, game_id: str, game_data: dict) -> GameState:
+        data = dict(game_data)
+        data.setdefault('created_at', datetime.now().isoformat())
+        state = GameState(data, game_id)
+        with self._session.begin() as session:
+            session.merge(_game_state_to_record(state))
+        return state
+
+    def get_game_state(self, game_id: str) -> Optional[GameState]:
+        with self._session() as session:
+            record = session.get(GameStateRecord, game_id)
+            if record is None:
+                return None
+            return GameState(dict(record.data), record.game_id)
+
+    def get_game_states(self) -> List[GameState]:
+        with self._session() as session:
+            return [
+                GameState(dict(record.data), record.game_id)
+                for record in session.scalars(select(GameStateRecord))
+            ]
+
+    def delete_game_state(self, game_id: str):
+        with self._session.begin() as session:
+            record = session.get(GameStateRecord, game_id)
+            if record is not None:
+                session.delete(record)
+
+def _evict_lru(cache: OrderedDict, capacity: int, *pinned: set):
+    """Pop the oldest entries of an LRU OrderedDict, skipping keys in any pinned set"""
+    excess = len(cache) - capacity
+    if excess <= 0:
+        return
+    victims = []
+    for key in cache:
+        if not any(key in keys for keys in pinned):
+            victims.append(key)
+            if len(victims) == excess:
+                break
+    for key in victims:
+        del cache[key]
+
+def _sqlite_on_connect(dbapi_connection, connection_record):
+    """WAL lets readers proceed while a writer holds the database"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+def _user_to_record(user: User) -> UserRecord:
+    data = user.to_dict(encoded=True)
+    record = UserRecord(
+        user_id=user.user_id,
+        guild_id=user.guild_id,
+        balance=user.balance,
+        crypto_balance=user.crypto_balance,
+        experience=user.experience,
+        level=user.level,
+        last_seen=data.get('last_seen'),
+    )
+    for field in USER_JSON_FIELDS:
+        # Copy so later in-place edits on the model are seen as changes
+        setattr(record, field, copy.deepcopy(data.get(field, {})))
+    return record
+
+def _record_to_user(record: UserRecord) -> User:
+    data = {
+        'balance': record.balance,
+        'crypto_balance': record.crypto_balance,
+        'experience': record.experience,
+        'level': record.level,
+    }
+    for field in USER_JSON_FIELDS:
+        # Usually still JSON text (see EncodedJSON); the model decodes it on first access
+        value = getattr(record, field)
+        data[field] = copy.deepcopy(value) if isinstance(value, dict) else value
+    if record.last_seen:
+        data['last_seen'] = record.last_seen
+    return User(data, record.user_id, record.guild_id)
+
+def _guild_to_record(guild: Guild) -> GuildRecord:
+    return GuildRecord(
+        guild_id=guild.guild_id,
+        cash_name=guild.cash_name,
+        crypto_name=guild.crypto_name,
+        cashmoji=guild.cashmoji,
+        cryptomoji=guild.cryptomoji,
+        admin_ids=list(guild.admin_ids),
+        channels=list(guild.channels),
+        disable_update_messages=guild.disable_update_messages,
+    )
+
+def _record_to_guild(record: GuildRecord) -> Guild:
+    return Guild({
+        'cash_name': record.cash_name,
+        'crypto_name': record.crypto_name,
+        'cashmoji': record.cashmoji,
+        'cryptomoji': record.cryptomoji,
+        'admin_ids': list(record.admin_ids or []),
+        'channels': list(record.channels or []),
+        'disable_update_messages': record.disable_update_messages,
+    }, record.guild_id)
+
+def _game_state_to_record(state: GameState) -> GameStateRecord:
+    return GameStateRecord(
+        game_id=state.game_id,
+        game_type=state.game_type,
+        status=state.status,
+        created_at=state.created_at.isoformat(),
+        data=copy.deepcopy(state.to_dict()),
+    )
 
 class DataManager:
-    """Manages all data persistence and user/guild operations using DatabaseManager"""
+    """Manages all data persistence and user/guild operations using DatabaseManager
+
+    Users and guilds live in an identity map: every get_user for the same
+    (user_id, guild_id) returns the same object for as long as it is cached or
+    still referenced somewhere. The map is an LRU capped at
+    Config.USER_CACHE_SIZE / Config.GUILD_CACHE_SIZE; dirty entries are never
+    evicted before they are written.
+
+    Reads that miss the cache (users, guilds, game states, leaderboard and
+    expiry indexes) are coroutines that run the query in a worker thread;
+    concurrent misses on the same key share one query.
+
+    update_user/update_guild/update_game_state only mark the object dirty;
+    dirty objects are written in batches by the auto-save loop, when
+    Config.WRITE_BEHIND_MAX_DIRTY is reached, or on close. Each batch is one
+    transaction, so a bet and the game it was placed on are saved together.
+    Objects stay pinned in the cache while their batch is being written.
+    """
 
     def __init__(self):
         self.db = DatabaseManager()
         self._auto_save_task = None
+        self._flush_task = None
+        self._flush_lock = asyncio.Lock()
+        self._users: 'OrderedDict[Tuple[int, int], User]' = OrderedDict()
+        self._guilds: 'OrderedDict[int, Guild]' = OrderedDict()
+        # Evicted objects that commands still hold (views, games) keep their identity
+        self._user_refs = weakref.WeakValueDictionary()
+        self._guild_refs = weakref.WeakValueDictionary()
+        # Config.COLUMNAR_GUILDS: every user resident, no identity map entries
+        self._columns: Dict[int, GuildColumns] = {}
+        self.leaderboards = LeaderboardIndex()
+        self.expiries = ExpiryIndex()
+        self.global_leaderboard = GlobalLeaderboard(Config.GLOBAL_LEADERBOARD_TTL, Config.GLOBAL_LEADERBOARD_DEPTH)
+        self._global_guilds_loaded = False
+        self.locks = UserLockManager()
+        self._dirty_users: Set[Tuple[int, int]] = set()
+        # guild id -> user ids of that guild in _dirty_users
+        self._dirty_users_by_guild: Dict[int, Set[int]] = {}
+        self._dirty_guilds: Set[int] = set()
+        # Keys of the batch being written; evicting them would reload pre-commit rows
+        self._inflight_users: Set[Tuple[int, int]] = set()
+        self._inflight_guilds: Set[int] = set()
+        # Guilds with users in the batch being written; the database is behind for them
+        self._inflight_user_guilds: Set[int] = set()
+        self._game_states: Dict[str, GameState] = {}
+        self._dirty_game_states: Set[str] = set()
+        self._deleted_game_states: Set[str] = set()
+        self._loads: Dict[tuple, asyncio.Future] = {}
+        self._closed = False
 
     def start_auto_save(self):
-        """Start the auto-save task (not needed for PostgreSQL but kept for compatibility)"""
+        """Start the auto-save task"""
         if self._auto_save_task is None:
             self._auto_save_task = asyncio.create_task(self._auto_save())
 
     async def _auto_save(self):
-        """Auto-save placeholder (PostgreSQL handles this automatically)"""
+        """Periodically flush dirty data"""
         while True:
-            await asyncio.sleep(300)  # 5 minutes
+            await asyncio.sleep(Config.AUTO_SAVE_INTERVAL)
+            await self.flush()
+
+    @property
+    def dirty_count(self) -> int:
+        return (len(self._dirty_users) + len(self._dirty_guilds)
+                + len(self._dirty_game_states) + len(self._deleted_game_states))
+
+    def _take_dirty(self) -> '_WriteBatch':
+        """Snapshot and clear the dirty sets.
+
+        Snapshots are deep copies taken on the calling thread, so the write can
+        run in a worker thread while commands keep mutating the live objects.
+        """
+        batch = _WriteBatch(
+            users=[
+                User(copy.deepcopy(user.to_dict(encoded=True)), *key)
+                for user, key in ((self._resident_user(key), key) for key in self._dirty_users)
+                if user is not None
+            ],
+            guilds=[
+                Guild(copy.deepcopy(self._guilds[key].to_dict()), key)
+                for key in self._dirty_guilds if key in self._guilds
+            ],
+            game_states=[
+                GameState(copy.deepcopy(self._game_states[key].to_dict()), key)
+                for key in self._dirty_game_states if key in self._game_states
+            ],
+            deleted_game_ids=list(self._deleted_game_states),
+        )
+        self._inflight_users = {(user.user_id, user.guild_id) for user in batch.users}
+        self._inflight_user_guilds = {user.guild_id for user in batch.users}
+        self._inflight_guilds = {guild.guild_id for guild in batch.guilds}
+        self._dirty_users.clear()
+        self._dirty_users_by_guild.clear()
+        self._dirty_guilds.clear()
+        self._dirty_game_states.clear()
+        self._deleted_game_states.clear()
+        return batch
+
+    def _restore_dirty(self, batch: '_WriteBatch'):
+        """Re-mark a failed batch so the next flush retries it
+
+        An object no longer resident is put back from its snapshot, so the
+        retry never silently drops it.
+        """
+        for user in batch.users:
+            key = (user.user_id, user.guild_id)
+            if self._resident_user(key) is None:
+                self._users[key] = self._user_refs.get(key) or user
+                self._user_refs[key] = self._users[key]
+            self._add_dirty_user(key)
+        for guild in batch.guilds:
+            if guild.guild_id not in self._guilds:
+                self._guilds[guild.guild_id] = self._guild_refs.get(guild.guild_id) or guild
+                self._guild_refs[guild.guild_id] = self._guilds[guild.guild_id]
+            self._dirty_guilds.add(guild.guild_id)
+        for state in batch.game_states:
+            self._game_states.setdefault(state.game_id, state)
+        self._dirty_game_states.update(state.game_id for state in batch.game_states)
+        self._deleted_game_states.update(
+            game_id for game_id in batch.deleted_game_ids if game_id not in self._game_states
+        )
+
+    def _add_dirty_user(self, key: Tuple[int, int]):
+        self._dirty_users.add(key)
+        self._dirty_users_by_guild.setdefault(key[1], set()).add(key[0])
+
+    def _write(self, batch: '_WriteBatch'):
+        self.db.save_batch(batch.users, batch.guilds, batch.game_states, batch.deleted_game_ids)
+
+    def _end_write(self):
+        """Unpin the written batch and trim the caches"""
+        self._inflight_users = set()
+        self._inflight_guilds = set()
+        self._inflight_user_guilds = set()
+        self._evict()
+
+    async def flush(self):
+        """Write all dirty data from a worker thread"""
+        # One flush at a time so an older snapshot never lands after a newer one
+        async with self._flush_lock:
+            batch = self._take_dirty()
+            if not batch:
+                return
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except Exception as e:
+                self._restore_dirty(batch)
+                logging.error(f"Failed to flush {batch}: {e}")
+            finally:
+                self._end_write()
+
+    def _maybe_flush(self):
+        """Start a background flush once enough objects are dirty"""
+        if self.dirty_count < Config.WRITE_BEHIND_MAX_DIRTY:
+            return
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        try:
+            self._flush_task = asyncio.get_running_loop().create_task(self.flush())
+        except RuntimeError:
+            # No event loop (scripts, shutdown): write synchronously
             self.save_all()
 
     def save_all(self):
-        """Save all data (no-op for PostgreSQL)"""
+        """Write all dirty data synchronously
+
+        Only for code without a running flush (scripts, no event loop); on the
+        loop, `await flush()` instead so writes stay ordered.
+        """
+        if self._flush_lock.locked():
+            raise RuntimeError("A flush is in progress; await flush() instead of save_all()")
+        batch = self._take_dirty()
+        try:
+            if batch:
+                try:
+                    self._write(batch)
+                except Exception:
+                    self._restore_dirty(batch)
+                    raise
+            self.db.save_all()
+        finally:
+            self._end_write()
+
+    async def close(self):
+        """Save everything and release database connections
+
+        Changes made after close() has started its last flush raise
+        RuntimeError instead of being silently dropped; stop the callers
+        (e.g. disconnect the bot) before closing.
+        """
+        if self._auto_save_task is not None:
+            self._auto_save_task.cancel()
+            self._auto_save_task = None
+        if self._flush_task is not None:
+            # Let a background flush land before the final, newer one
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        await self.flush()
+        # Whatever was marked during that flush goes in one last batch
+        self._closed = True
+        await self.flush()
         self.db.save_all()
+        self.db.close()
 
-    def initialize_user(self, user_id: int, guild_id: int) -> User:
+    def lock_users(self, guild_id: int, *user_ids: int):
+        """Async context manager serialising mutations of the given users"""
+        return self.locks.hold(guild_id, *user_ids)
+
+    async def initialize_user(self, user_id: int, guild_id: int) -> User:
         """Initialize a new user or return existing user"""
-        return self.db.initialize_user(user_id, guild_id)
+        return await self.get_user(user_id, guild_id)
 
-    def initialize_guild(self, guild_id: int) -> Guild:
+    async def initialize_guild(self, guild_id: int) -> Guild:
         """Initialize a new guild or return existing guild"""
-        return self.db.initialize_guild(guild_id)
+        return await self.get_guild(guild_id)
 
-    def get_user(self, user_id: int, guild_id: int) -> User:
-        """Get user data"""
-        return self.db.get_user(user_id, guild_id)
+    async def _load(self, key: tuple, fn: Callable, *args):
+        """Run a blocking database read in a worker thread, once for concurrent callers of `key`"""
+        future = self._loads.get(key)
+        if future is None:
+            future = self._loads[key] = asyncio.ensure_future(asyncio.to_thread(fn, *args))
+            future.add_done_callback(lambda _: self._loads.pop(key, None))
+        return await asyncio.shield(future)
 
-    def get_guild(self, guild_id: int) -> Guild:
-        """Get guild data"""
-        return self.db.get_guild(guild_id)
+    def _evict(self):
+        """Drop least recently used clean entries until both caches fit their caps"""
+        _evict_lru(self._users, Config.USER_CACHE_SIZE, self._dirty_users, self._inflight_users)
+        _evict_lru(self._guilds, Config.GUILD_CACHE_SIZE, self._dirty_guilds, self._inflight_guilds)
+
+    def _cache_user(self, key: Tuple[int, int], user: User):
+        self._users[key] = user
+        self._users.move_to_end(key)
+        self._user_refs[key] = user
+        self._evict()
+
+    def _cache_guild(self, guild_id: int, guild: Guild):
+        self._guilds[guild_id] = guild
+        self._guilds.move_to_end(guild_id)
+        self._guild_refs[guild_id] = guild
+        self._evict()
+
+    def _resident_user(self, key: Tuple[int, int]) -> Optional[User]:
+        columns = self._columns.get(key[1])
+        if columns is not None:
+            return columns.view(key[0])
+        return self._users.get(key)
+
+    async def _guild_columns(self, guild_id: int) -> GuildColumns:
+        """Column store of a columnar guild, loading all its users on first use"""
+        columns = self._columns.get(guild_id)
+        if columns is None:
+            loaded = await self._load(
+                ('columns', guild_id), lambda: load_columns(guild_id, self.db.iter_guild_users(guild_id))
+            )
+            columns = self._columns.setdefault(guild_id, loaded)
+        return columns
+
+    def _resident_guild_users(self, guild_id: int) -> Iterator[User]:
+        """Users of a guild held in memory, which may be ahead of the database"""
+        columns = self._columns.get(guild_id)
+        if columns is not None:
+            yield from columns.views()
+            return
+        for (user_id, user_guild_id), user in list(self._user_refs.items()):
+            if user_guild_id == guild_id:
+                yield user
+
+    def _cached_user(self, key: Tuple[int, int]) -> Optional[User]:
+        """The user from the identity map, or None if it has to be loaded"""
+        user = self._users.get(key)
+        if user is not None:
+            self._users.move_to_end(key)
+            return user
+        user = self._user_refs.get(key)
+        if user is not None:
+            self._cache_user(key, user)
+        return user
+
+    def _track_loaded_user(self, user: User):
+        # May be a brand new row the loaded rankings have not seen yet
+        self.leaderboards.update_user(user)
+        self.expiries.update_user(user)
+        self.global_leaderboard.update_user(user)
+
+    async def get_user(self, user_id: int, guild_id: int) -> User:
+        """Get user data, creating the row if needed"""
+        key = (user_id, guild_id)
+        if guild_id in Config.COLUMNAR_GUILDS:
+            columns = await self._guild_columns(guild_id)
+            user = columns.view(user_id)
+            if user is None:
+                loaded = await self._load(('user', key), self.db.get_user, user_id, guild_id)
+                # Re-check: another caller may have added it while this one waited
+                user = columns.view(user_id)
+                if user is None:
+                    user = columns.add(loaded)
+                    self._track_loaded_user(user)
+            return user
+        user = self._cached_user(key)
+        if user is None:
+            loaded = await self._load(('user', key), self.db.get_user, user_id, guild_id)
+            user = self._cached_user(key)
+            if user is None:
+                user = loaded
+                self._track_loaded_user(user)
+                self._cache_user(key, user)
+        return user
+
+    async def get_guild(self, guild_id: int) -> Guild:
+        """Get guild data, creating the row if needed"""
+        guild = self._guilds.get(guild_id)
+        if guild is not None:
+            self._guilds.move_to_end(guild_id)
+            return guild
+        guild = self._guild_refs.get(guild_id)
+        if guild is None:
+            loaded = await self._load(('guild', guild_id), self.db.get_guild, guild_id)
+            guild = self._guilds.get(guild_id) or self._guild_refs.get(guild_id) or loaded
+            # Keeps the cached guild id list current without rescanning it
+            self.global_leaderboard.add_guilds([guild_id])
+        self._cache_guild(guild_id, guild)
+        return guild
 
     def update_user(self, user: User):
-        """Update user data in database"""
-        self.db.update_user(user)
+        """Mark user data as changed; it is written on the next flush"""
+        self._mark_users_dirty([user])
+        self._maybe_flush()
+
+    def _check_open(self):
+        if self._closed:
+            raise RuntimeError("DataManager is closed; the change would never be written")
+
+    def _mark_users_dirty(self, users: List[User]):
+        """Mark several users dirty together so they land in the same flush"""
+        self._check_open()
+        for user in users:
+            key = (user.user_id, user.guild_id)
+            self._add_dirty_user(key)
+            if user.guild_id not in self._columns:
+                self._cache_user(key, user)
+            self.leaderboards.update_user(user)
+            self.expiries.update_user(user)
+            self.global_leaderboard.update_user(user)
+
+    async def debit(self, user_id: int, guild_id: int, amount: int) -> Optional[User]:
+        """Take `amount` from a user's balance under their lock, or return None if they are short
+
+        The user is not marked dirty here: the caller marks it together with
+        whatever the amount paid for, so both land in the same flush.
+        """
+        async with self.lock_users(guild_id, user_id):
+            user = await self.get_user(user_id, guild_id)
+            if user.balance < amount:
+                return None
+            user.balance -= amount
+            return user
+
+    async def transfer(self, from_id: int, to_id: int, amount: int, guild_id: int) -> bool:
+        """Move balance from one user to another, returns False if the sender is short"""
+        return await self.transfer_many(guild_id, [(from_id, to_id, amount)])
+
+    async def transfer_many(self, guild_id: int, transfers: List[Tuple[int, int, int]]) -> bool:
+        """Apply a batch of (from_id, to_id, amount) transfers all-or-nothing
+
+        Every user involved is locked in ascending id order, the batch is checked
+        against the net change of each balance, and all changed users are marked
+        dirty together so one flush transaction writes every side or none.
+        Returns False without changing anything if any balance would go negative.
+        """
+        deltas: Dict[int, int] = {}
+        for from_id, to_id, amount in transfers:
+            if amount <= 0:
+                raise ValueError(f"Transfer amount must be positive, got {amount}")
+            if from_id == to_id:
+                raise ValueError(f"Cannot transfer from user {from_id} to themselves")
+            deltas[from_id] = deltas.get(from_id, 0) - amount
+            deltas[to_id] = deltas.get(to_id, 0) + amount
+        if not deltas:
+            return True
+
+        async with self.lock_users(guild_id, *deltas):
+            users = {user_id: await self.get_user(user_id, guild_id) for user_id in deltas}
+            if any(users[user_id].balance + delta < 0 for user_id, delta in deltas.items()):
+                return False
+            for user_id, delta in deltas.items():
+                users[user_id].balance += delta
+            self._mark_users_dirty(list(users.values()))
+        self._maybe_flush()
+        return True
 
     def update_guild(self, guild: Guild):
-        """Update guild data in database"""
-        self.db.update_guild(guild)
+        """Mark guild data as changed; it is written on the next flush"""
+        self._check_open()
+        self._dirty_guilds.add(guild.guild_id)
+        self._cache_guild(guild.guild_id, guild)
+        self._maybe_flush()
 
-    def get_leaderboard(self, guild_id: int, category: str, limit: int = 10) -> List[Dict]:
+    async def get_leaderboard(self, guild_id: int, category: str, limit: int = 10) -> List[Dict]:
         """Get leaderboard for a specific category"""
-        return self.db.get_leaderboard(guild_id, category, limit)
+        if category not in CATEGORIES:
+            return []
+        await self._load_leaderboards(guild_id)
+        return self.leaderboards.top(guild_id, category, limit)
+
+    async def get_global_leaderboard(self, category: str, limit: int = 10) -> List[Dict]:
+        """Get the cross-guild leaderboard for a category (cached for Config.GLOBAL_LEADERBOARD_TTL)"""
+        if category not in CATEGORIES:
+            return []
+        # The guild id scan runs once; guilds created later are added as they load
+        if not self._global_guilds_loaded:
+            guild_ids = await self._load(('guild_ids',), self.db.get_guild_ids)
+            if not self._global_guilds_loaded:
+                self.global_leaderboard.add_guilds(guild_ids)
+                self._global_guilds_loaded = True
+        return await self.global_leaderboard.top(category, limit, self._guild_top)
+
+    async def _guild_top(self, guild_id: int, category: str, limit: int) -> List[Dict]:
+        """Top of one guild, from the index if loaded, else from the database"""
+        if not self.leaderboards.has_guild(guild_id):
+            if guild_id not in self._dirty_users_by_guild and guild_id not in self._inflight_user_guilds:
+                return await asyncio.to_thread(self.db.get_leaderboard, guild_id, category, limit)
+            # The database is behind for this guild; index it instead
+            await self._load_leaderboards(guild_id)
+        return self.leaderboards.top(guild_id, category, limit)
+
+    async def get_rank(self, user_id: int, guild_id: int, category: str, neighbours: int = 1) -> Optional[Dict]:
+        """Get a user's rank, percentile and neighbours in a leaderboard category
+
+        Read only: the loaded index holds every stored and resident user, so a
+        user without a row is reported as unranked (None) rather than created.
+        """
+        if category not in CATEGORIES:
+            return None
+        await self._load_leaderboards(guild_id)
+        return self.leaderboards.rank(guild_id, category, user_id, neighbours)
+
+    async def _load_leaderboards(self, guild_id: int):
+        """Index a guild from the database once, then apply not yet flushed changes"""
+        if self.leaderboards.has_guild(guild_id):
+            return
+        scores = await self._load(('scores', guild_id), self.db.get_guild_scores, guild_id)
+        if self.leaderboards.has_guild(guild_id):
+            return
+        self.leaderboards.load_guild(guild_id, scores)
+        for user in self._resident_guild_users(guild_id):
+            self.leaderboards.update_user(user)
+
+    async def get_next_ready(self, guild_id: int, kind: str, limit: int = 10) -> List[Dict]:
+        """Users of a guild whose cooldown (or 'boost:<type>') expires next, soonest first"""
+        if not self.expiries.has_guild(guild_id):
+            expiries = await self._load(('expiries', guild_id), self.db.get_guild_expiries, guild_id)
+            if not self.expiries.has_guild(guild_id):
+                self.expiries.load_guild(guild_id, expiries)
+                for user in self._resident_guild_users(guild_id):
+                    self.expiries.update_user(user)
+        return self.expiries.next_ready(guild_id, kind, limit)
 
     def create_game_state(self, game_id: str, game_data: dict) -> GameState:
-        """Create a new game state"""
-        return self.db.create_game_state(game_id, game_data)
+        """Create (or replace) a game state; it is written on the next flush"""
+        data = dict(game_data)
+        data.setdefault('created_at', datetime.now().isoformat())
+        state = GameState(data, game_id)
+        self.update_game_state(state)
+        return state
 
-    def get_game_state(self, game_id: str) -> Optional[GameState]:
+    def update_game_state(self, state: GameState):
+        """Mark a game state as changed; it is written on the next flush"""
+        self._check_open()
+        self._game_states[state.game_id] = state
+        self._dirty_game_states.add(state.game_id)
+        self._deleted_game_states.discard(state.game_id)
+        self._maybe_flush()
+
+    async def get_game_state(self, game_id: str) -> Optional[GameState]:
         """Get game state by ID"""
-        return self.db.get_game_state(game_id)
+        state = self._game_states.get(game_id)
+        if state is None and game_id not in self._deleted_game_states:
+            loaded = await self._load(('game_state', game_id), self.db.get_game_state, game_id)
+            # Re-check: it may have been created or deleted meanwhile
+            state = self._game_states.get(game_id)
+            if state is None and loaded is not None and game_id not in self._deleted_game_states:
+                state = self._game_states[game_id] = loaded
+        return state
+
+    async def get_game_states(self) -> List[GameState]:
+        """Every stored game state, including ones not flushed yet"""
+        stored = await self._load(('game_states',), self.db.get_game_states)
+        states = {
+            state.game_id: state for state in stored
+            if state.game_id not in self._deleted_game_states
+        }
+        states.update(self._game_states)
+        return list(states.values())
 
     def delete_game_state(self, game_id: str):
         """Delete a game state"""
-        self.db.delete_game_state(game_id)
+        self._check_open()
+        self._game_states.pop(game_id, None)
+        self._dirty_game_states.discard(game_id)
+        self._deleted_game_states.add(game_id)
+        self._maybe_flush()
+
+class _WriteBatch:
+    """Snapshots of everything one flush writes in a single transaction"""
+
+    def __init__(self, users: List[User], guilds: List[Guild],
+                 game_states: List[GameState], deleted_game_ids: List[str]):
+        self.users = users
+        self.guilds = guilds
+        self.game_states = game_states
+        self.deleted_game_ids = deleted_game_ids
+
+    def __bool__(self) -> bool:
+        return bool(self.users or self.guilds or self.game_states or self.deleted_game_ids)
+
+    def __str__(self) -> str:
+        return (f"{len(self.users)} users, {len(self.guilds)} guilds, "
+                f"{len(self.game_states) + len(self.deleted_game_ids)} game states")
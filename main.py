@@ -29,12 +29,12 @@ class DiscordBot(commands.Bot):
         self.db_manager = DataManager()
         
         # Compatibility wrapper methods
-        def get_user(user_id: int, guild_id: int):
-            db_user = self.db_manager.get_user(user_id, guild_id)
+        async def get_user(user_id: int, guild_id: int):
+            db_user = await self.db_manager.get_user(user_id, guild_id)
             return UserModel(db_user, self.db_manager)
         
-        def get_guild(guild_id: int):
-            db_guild = self.db_manager.get_guild(guild_id)
+        async def get_guild(guild_id: int):
+            db_guild = await self.db_manager.get_guild(guild_id)
             return GuildModel(db_guild, self.db_manager)
         
         def update_user(user_model):
@@ -43,19 +43,41 @@ class DiscordBot(commands.Bot):
         def update_guild(guild_model):
             self.db_manager.update_guild(guild_model._db_guild)
         
-        def get_leaderboard(guild_id: int, category: str, limit: int = 10):
-            return self.db_manager.get_leaderboard(guild_id, category, limit)
+        async def get_leaderboard(guild_id: int, category: str, limit: int = 10):
+            return await self.db_manager.get_leaderboard(guild_id, category, limit)
+        
+        async def debit(user_id: int, guild_id: int, amount: int):
+            db_user = await self.db_manager.debit(user_id, guild_id, amount)
+            return UserModel(db_user, self.db_manager) if db_user is not None else None
+        
+        async def transfer(from_id: int, to_id: int, amount: int, guild_id: int):
+            return await self.db_manager.transfer(from_id, to_id, amount, guild_id)
+        
+        async def transfer_many(guild_id: int, transfers: list):
+            return await self.db_manager.transfer_many(guild_id, transfers)
+        
+        def lock_users(guild_id: int, *user_ids: int):
+            return self.db_manager.lock_users(guild_id, *user_ids)
+        
+        async def get_global_leaderboard(category: str, limit: int = 10):
+            return await self.db_manager.get_global_leaderboard(category, limit)
+        
+        async def get_rank(user_id: int, guild_id: int, category: str, neighbours: int = 1):
+            return await self.db_manager.get_rank(user_id, guild_id, category, neighbours)
+        
+        async def get_next_ready(guild_id: int, kind: str, limit: int = 10):
+            return await self.db_manager.get_next_ready(guild_id, kind, limit)
         
         # Create data_manager compatibility object
         class DataManagerCompat:
             def __init__(self):
                 pass
             
-            def get_user(self, user_id: int, guild_id: int):
-                return get_user(user_id, guild_id)
+            async def get_user(self, user_id: int, guild_id: int):
+                return await get_user(user_id, guild_id)
             
-            def get_guild(self, guild_id: int):
-                return get_guild(guild_id)
+            async def get_guild(self, guild_id: int):
+                return await get_guild(guild_id)
             
             def update_user(self, user_model):
                 return update_user(user_model)
@@ -63,20 +85,41 @@ class DiscordBot(commands.Bot):
             def update_guild(self, guild_model):
                 return update_guild(guild_model)
             
-            def get_leaderboard(self, guild_id: int, category: str, limit: int = 10):
-                return get_leaderboard(guild_id, category, limit)
+            async def get_leaderboard(self, guild_id: int, category: str, limit: int = 10):
+                return await get_leaderboard(guild_id, category, limit)
+            
+            async def debit(self, user_id: int, guild_id: int, amount: int):
+                return await debit(user_id, guild_id, amount)
             
-            def initialize_user(self, user_id: int, guild_id: int):
-                return get_user(user_id, guild_id)
+            async def transfer(self, from_id: int, to_id: int, amount: int, guild_id: int):
+                return await transfer(from_id, to_id, amount, guild_id)
             
-            def initialize_guild(self, guild_id: int):
-                return get_guild(guild_id)
+            async def transfer_many(self, guild_id: int, transfers: list):
+                return await transfer_many(guild_id, transfers)
+            
+            def lock_users(self, guild_id: int, *user_ids: int):
+                return lock_users(guild_id, *user_ids)
+            
+            async def get_global_leaderboard(self, category: str, limit: int = 10):
+                return await get_global_leaderboard(category, limit)
+            
+            async def get_rank(self, user_id: int, guild_id: int, category: str, neighbours: int = 1):
+                return await get_rank(user_id, guild_id, category, neighbours)
+            
+            async def get_next_ready(self, guild_id: int, kind: str, limit: int = 10):
+                return await get_next_ready(guild_id, kind, limit)
+            
+            async def initialize_user(self, user_id: int, guild_id: int):
+                return await get_user(user_id, guild_id)
+            
+            async def initialize_guild(self, guild_id: int):
+                return await get_guild(guild_id)
             
             def start_auto_save(self):
                 self.db_manager.start_auto_save()
             
             def save_all(self):
-                pass  # PostgreSQL handles this automatically
+                self.db_manager.save_all()
         
         self.data_manager = DataManagerCompat()
         self.data_manager.db_manager = self.db_manager
@@ -106,6 +149,15 @@ class DiscordBot(commands.Bot):
         except Exception as e:
             logging.error(f"Failed to sync commands: {e}")
     
+    async def close(self):
+        """Disconnect, then save data and release database connections
+
+        Disconnecting first stops new interactions, so nothing is changed
+        after the final flush.
+        """
+        await super().close()
+        await self.db_manager.close()
+    
     async def on_ready(self):
         """Called when bot is ready"""
         logging.info(f'{self.user} has connected to Discord!')
@@ -122,13 +174,13 @@ class DiscordBot(commands.Bot):
     
     async def on_guild_join(self, guild):
         """Initialize guild data when joining a new guild"""
-        self.data_manager.initialize_guild(guild.id)
+        await self.data_manager.initialize_guild(guild.id)
         logging.info(f"Joined guild: {guild.name} ({guild.id})")
     
     async def on_member_join(self, member):
         """Initialize user data when a new member joins"""
         if not member.bot:
-            self.data_manager.initialize_user(member.id, member.guild.id)
+            await self.data_manager.initialize_user(member.id, member.guild.id)
 
 def main():
     """Main function to run the bot"""
@@ -0,0 +1,90 @@
+"""Stream a legacy economy.db (LegacyEconomy) into the SQLAlchemy store
+
+    python migrate_legacy.py economy.db --guild-id 0
+
+Rows are read in user_id order, one keyset page at a time, and written in
+large upsert transactions. After every transaction the last migrated user_id
+is saved to a checkpoint file, so an interrupted run resumes where it stopped.
+Run it while the bot is stopped: a running bot would overwrite the migrated
+balances with its cached ones on its next flush.
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Iterator, List, Tuple
+from config import Config
+from database import DatabaseManager
+
+Row = Tuple[int, int, int]
+
+def read_legacy(path: str, after: int, chunk_size: int) -> Iterator[List[Row]]:
+    """Yield chunks of (user_id, money, credits) with user_id > `after`"""
+    conn = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+    try:
+        while True:
+            # Keyset pagination on the primary key: every page is an index range scan
+            rows = conn.execute(
+                "SELECT user_id, money, credits FROM economy WHERE user_id > ? ORDER BY user_id LIMIT ?",
+                (after, chunk_size)
+            ).fetchall()
+            if not rows:
+                return
+            yield rows
+            after = rows[-1][0]
+    finally:
+        conn.close()
+
+def load_checkpoint(path: str) -> dict:
+    if not os.path.exists(path):
+        return {'last_user_id': -1, 'rows': 0}
+    with open(path) as f:
+        return json.load(f)
+
+def save_checkpoint(path: str, checkpoint: dict):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp, path)
+
+def migrate(legacy_path: str, guild_id: int, db: DatabaseManager,
+            batch_size: int, checkpoint_path: str) -> int:
+    """Copy every legacy row onto User.balance/crypto_balance, returns rows migrated this run"""
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint['last_user_id'] >= 0:
+        logging.info(f"Resuming after user {checkpoint['last_user_id']} ({checkpoint['rows']} rows done)")
+    started = time.monotonic()
+    migrated = 0
+    for rows in read_legacy(legacy_path, checkpoint['last_user_id'], batch_size):
+        db.upsert_balances(guild_id, [(user_id, max(0, money), max(0, credits)) for user_id, money, credits in rows])
+        migrated += len(rows)
+        checkpoint = {'last_user_id': rows[-1][0], 'rows': checkpoint['rows'] + len(rows)}
+        save_checkpoint(checkpoint_path, checkpoint)
+        elapsed = time.monotonic() - started
+        logging.info(f"{checkpoint['rows']} rows migrated ({migrated / elapsed:,.0f} rows/s)")
+    return migrated
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('legacy_db', nargs='?', default='economy.db', help="legacy SQLite file")
+    parser.add_argument('--guild-id', type=int, default=0, help="guild the legacy users belong to")
+    parser.add_argument('--database-url', default=Config.DATABASE_URL, help="target database")
+    parser.add_argument('--batch-size', type=int, default=10000, help="rows per transaction")
+    parser.add_argument('--checkpoint', help="checkpoint file (default: <legacy_db>.checkpoint)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+    db = DatabaseManager(args.database_url)
+    try:
+        started = time.monotonic()
+        migrated = migrate(args.legacy_db, args.guild_id, db, args.batch_size,
+                           args.checkpoint or args.legacy_db + '.checkpoint')
+        elapsed = time.monotonic() - started
+        logging.info(f"Done: {migrated} rows in {elapsed:.1f}s ({migrated / max(elapsed, 1e-9):,.0f} rows/s)")
+    finally:
+        db.close()
+
+if __name__ == '__main__':
+    main()
@@ -1,145 +1,262 @@
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
 import json
+import math
+import time
+
+def to_epoch(value) -> int:
+    """Epoch seconds of a stored expiry, accepting legacy ISO datetime strings"""
+    if isinstance(value, str):
+        return math.ceil(datetime.fromisoformat(value).timestamp())
+    return int(value)
+
+def expiry_after(duration: timedelta) -> int:
+    """Epoch seconds `duration` from now, rounded up"""
+    return math.ceil(time.time() + duration.total_seconds())
+
+def _migrate_cooldowns(cooldowns: dict):
+    for key, value in cooldowns.items():
+        if isinstance(value, str):
+            cooldowns[key] = to_epoch(value)
+
+def _migrate_boosts(boosts: dict):
+    for boost in boosts.values():
+        if isinstance(boost.get('expires_at'), str):
+            boost['expires_at'] = to_epoch(boost['expires_at'])
+
+def migrate_expiries(data: dict):
+    """Convert ISO string cooldown and boost expiries in user data to epoch ints in place"""
+    if isinstance(data.get('cooldowns'), dict):
+        _migrate_cooldowns(data['cooldowns'])
+    if isinstance(data.get('boosts'), dict):
+        _migrate_boosts(data['boosts'])
+
+def decode_section(name: str, value) -> dict:
+    """Decode a user section that may still be JSON text, migrating legacy expiries"""
+    if isinstance(value, (str, bytes)):
+        value = json.loads(value)
+    value = value or {}
+    if name == 'cooldowns':
+        _migrate_cooldowns(value)
+    elif name == 'boosts':
+        _migrate_boosts(value)
+    return value
+
+# Nested JSON sections of a user, allocated on first access
+USER_SECTIONS = ('inventory', 'mining', 'stats', 'cooldowns', 'boosts')
 
 class User:
-    """User data model"""
+    """User data model
+
+    Hot scalar fields live in __slots__ instead of a per-user dict. The nested
+    sections in USER_SECTIONS may be given as JSON text straight from the
+    database; they are decoded on first access and stay None if empty, so a
+    user that only ever touches their balance decodes and allocates nothing.
+    Mining energy is kept as a scalar and only folded back into the mining
+    section by to_dict().
+    """
+    __slots__ = (
+        'user_id', 'guild_id', '_balance', '_crypto_balance', '_experience', '_level', '_energy',
+        '_inventory', '_mining', '_stats', '_cooldowns', '_boosts', '_last_seen', '__weakref__',
+    )
     
     def __init__(self, data: dict, user_id: int, guild_id: int):
         self.user_id = user_id
         self.guild_id = guild_id
-        self._data = data
+        migrate_expiries(data)
+        self._balance = data.get('balance', 0)
+        self._crypto_balance = data.get('crypto_balance', 0)
+        self._experience = data.get('experience', 0)
+        self._level = data.get('level', 1)
+        self._energy = None
+        mining = data.get('mining')
+        if isinstance(mining, dict) and 'energy' in mining:
+            mining = dict(mining)
+            self._energy = mining.pop('energy')
+        self._mining = mining or None
+        self._inventory = data.get('inventory') or None
+        self._stats = data.get('stats') or None
+        self._cooldowns = data.get('cooldowns') or None
+        self._boosts = data.get('boosts') or None
+        self._last_seen = data.get('last_seen')
+    
+    def _section(self, name: str) -> dict:
+        """A nested section, decoded or allocated on first access"""
+        attr = '_' + name
+        value = getattr(self, attr)
+        if not isinstance(value, dict):
+            value = decode_section(name, value)
+            if name == 'mining' and 'energy' in value:
+                energy = value.pop('energy')
+                if self._energy is None:
+                    self._energy = energy
+            setattr(self, attr, value)
+        return value
+    
+    def peek_section(self, name: str) -> Optional[dict]:
+        """A nested section if it is non-empty, without allocating an empty one"""
+        value = getattr(self, '_' + name)
+        if value is None or isinstance(value, dict):
+            return value
+        return self._section(name)
+    
+    def is_decoded(self, name: str) -> bool:
+        """Whether a section has been accessed since load, i.e. may have changed"""
+        return not isinstance(getattr(self, '_' + name), (str, bytes))
     
     @property
     def balance(self) -> int:
-        return self._data.get('balance', 0)
+        return self._balance
     
     @balance.setter
     def balance(self, value: int):
-        self._data['balance'] = max(0, value)
+        self._balance = max(0, value)
     
     @property
     def crypto_balance(self) -> int:
-        return self._data.get('crypto_balance', 0)
+        return self._crypto_balance
     
     @crypto_balance.setter
     def crypto_balance(self, value: int):
-        self._data['crypto_balance'] = max(0, value)
+        self._crypto_balance = max(0, value)
     
     @property
     def experience(self) -> int:
-        return self._data.get('experience', 0)
+        return self._experience
     
     @experience.setter
     def experience(self, value: int):
-        self._data['experience'] = max(0, value)
+        self._experience = max(0, value)
         self._update_level()
     
     @property
     def level(self) -> int:
-        return self._data.get('level', 1)
+        return self._level
+    
+    @level.setter
+    def level(self, value: int):
+        self._level = max(1, value)
     
     def _update_level(self):
         """Update level based on experience"""
         # Level formula: level = floor(sqrt(experience / 100)) + 1
-        import math
         new_level = math.floor(math.sqrt(self.experience / 100)) + 1
-        self._data['level'] = max(1, new_level)
+        self._level = max(1, new_level)
     
     @property
     def inventory(self) -> dict:
-        return self._data.get('inventory', {})
+        return self._section('inventory')
+    
+    @inventory.setter
+    def inventory(self, value: dict):
+        self._inventory = value
     
     def add_item(self, item_id: str, amount: int = 1):
         """Add item to inventory"""
-        if 'inventory' not in self._data:
-            self._data['inventory'] = {}
-        
-        if item_id in self._data['inventory']:
-            self._data['inventory'][item_id] += amount
-        else:
-            self._data['inventory'][item_id] = amount
+        inventory = self.inventory
+        inventory[item_id] = inventory.get(item_id, 0) + amount
     
     def remove_item(self, item_id: str, amount: int = 1) -> bool:
         """Remove item from inventory, returns True if successful"""
-        if item_id not in self.inventory or self.inventory[item_id] < amount:
+        inventory = self.peek_section('inventory')
+        if not inventory or inventory.get(item_id, 0) < amount:
             return False
         
-        self._data['inventory'][item_id] -= amount
-        if self._data['inventory'][item_id] <= 0:
-            del self._data['inventory'][item_id]
+        inventory[item_id] -= amount
+        if inventory[item_id] <= 0:
+            del inventory[item_id]
         
         return True
     
+    @property
+    def mining(self) -> dict:
+        return self._section('mining')
+    
+    @mining.setter
+    def mining(self, value: dict):
+        value = dict(value)
+        if 'energy' in value:
+            self._energy = value.pop('energy')
+        self._mining = value
+    
     @property
     def mining_data(self) -> dict:
-        return self._data.get('mining', {})
+        return self.mining
     
     @property
     def mining_energy(self) -> int:
-        return self.mining_data.get('energy', 100)
+        # Energy of a user loaded from the database is still inside the encoded mining section
+        self.peek_section('mining')
+        return 100 if self._energy is None else self._energy
     
     @mining_energy.setter
     def mining_energy(self, value: int):
-        if 'mining' not in self._data:
-            self._data['mining'] = {}
-        self._data['mining']['energy'] = max(0, min(100, value))
+        self.peek_section('mining')
+        self._energy = max(0, min(100, value))
     
     @property
     def stats(self) -> dict:
-        return self._data.get('stats', {})
+        return self._section('stats')
+    
+    @stats.setter
+    def stats(self, value: dict):
+        self._stats = value
+    
+    @property
+    def cooldowns(self) -> dict:
+        return self._section('cooldowns')
+    
+    @cooldowns.setter
+    def cooldowns(self, value: dict):
+        self._cooldowns = value
+    
+    @property
+    def boosts(self) -> dict:
+        return self._section('boosts')
+    
+    @boosts.setter
+    def boosts(self, value: dict):
+        self._boosts = value
+    
+    @property
+    def last_seen(self) -> Optional[str]:
+        return self._last_seen
     
     def update_stats(self, stat: str, value: int):
         """Update a specific stat"""
-        if 'stats' not in self._data:
-            self._data['stats'] = {}
-        
-        if stat in self._data['stats']:
-            self._data['stats'][stat] += value
-        else:
-            self._data['stats'][stat] = value
+        stats = self.stats
+        stats[stat] = stats.get(stat, 0) + value
     
     def is_on_cooldown(self, cooldown_type: str) -> bool:
         """Check if user is on cooldown for specific action"""
-        cooldowns = self._data.get('cooldowns', {})
-        if cooldown_type not in cooldowns:
-            return False
-        
-        last_used = datetime.fromisoformat(cooldowns[cooldown_type])
-        return datetime.now() < last_used
+        cooldowns = self.peek_section('cooldowns')
+        expires_at = cooldowns.get(cooldown_type) if cooldowns else None
+        return expires_at is not None and time.time() < expires_at
     
     def set_cooldown(self, cooldown_type: str, duration: timedelta):
         """Set cooldown for specific action"""
-        if 'cooldowns' not in self._data:
-            self._data['cooldowns'] = {}
-        
-        self._data['cooldowns'][cooldown_type] = (datetime.now() + duration).isoformat()
+        self.cooldowns[cooldown_type] = expiry_after(duration)
     
     def get_cooldown_remaining(self, cooldown_type: str) -> Optional[timedelta]:
         """Get remaining cooldown time"""
-        if not self.is_on_cooldown(cooldown_type):
+        cooldowns = self.peek_section('cooldowns')
+        expires_at = cooldowns.get(cooldown_type) if cooldowns else None
+        if expires_at is None:
             return None
         
-        cooldowns = self._data.get('cooldowns', {})
-        last_used = datetime.fromisoformat(cooldowns[cooldown_type])
-        return last_used - datetime.now()
+        remaining = expires_at - time.time()
+        return timedelta(seconds=remaining) if remaining > 0 else None
     
     def has_boost(self, boost_type: str) -> bool:
         """Check if user has active boost"""
-        boosts = self._data.get('boosts', {})
-        if boost_type not in boosts:
-            return False
-        
-        expires_at = datetime.fromisoformat(boosts[boost_type]['expires_at'])
-        return datetime.now() < expires_at
+        boosts = self.peek_section('boosts')
+        boost = boosts.get(boost_type) if boosts else None
+        return boost is not None and time.time() < boost['expires_at']
     
     def add_boost(self, boost_type: str, duration: timedelta, multiplier: float = 1.0):
         """Add boost to user"""
-        if 'boosts' not in self._data:
-            self._data['boosts'] = {}
-        
-        self._data['boosts'][boost_type] = {
-            'expires_at': (datetime.now() + duration).isoformat(),
+        self.boosts[boost_type] = {
+            'expires_at': expiry_after(duration),
             'multiplier': multiplier
         }
     
@@ -148,12 +265,31 @@ class User:
         if not self.has_boost(boost_type):
             return 1.0
         
-        return self._data['boosts'][boost_type]['multiplier']
+        return self._boosts[boost_type]['multiplier']
     
-    def to_dict(self) -> dict:
-        """Convert to dictionary for serialization"""
-        self._data['last_seen'] = datetime.now().isoformat()
-        return self._data
+    def to_dict(self, encoded: bool = False) -> dict:
+        """Convert to dictionary for serialization
+
+        With `encoded`, sections that were never accessed are returned as the
+        JSON text they were loaded from, so they are written back without being
+        decoded and re-encoded.
+        """
+        self._last_seen = datetime.now().isoformat()
+        data = {
+            'balance': self._balance,
+            'crypto_balance': self._crypto_balance,
+            'experience': self._experience,
+            'level': self._level,
+            'last_seen': self._last_seen,
+        }
+        for name in USER_SECTIONS:
+            if encoded and not self.is_decoded(name):
+                data[name] = getattr(self, '_' + name)
+            else:
+                data[name] = self.peek_section(name) or {}
+        if self._energy is not None:
+            data['mining'] = dict(data['mining'], energy=self._energy)
+        return data
 
 class Guild:
     """Guild data model"""
@@ -198,6 +334,10 @@ class Guild:
     def admin_ids(self) -> list:
         return self._data.get('admin_ids', [])
     
+    @admin_ids.setter
+    def admin_ids(self, value: list):
+        self._data['admin_ids'] = value
+    
     def add_admin(self, user_id: int):
         """Add admin to guild"""
         if 'admin_ids' not in self._data:
@@ -219,6 +359,10 @@ class Guild:
     def channels(self) -> list:
         return self._data.get('channels', [])
     
+    @channels.setter
+    def channels(self, value: list):
+        self._data['channels'] = value
+    
     def set_channels(self, channels: list):
         """Set allowed channels"""
         self._data['channels'] = channels
@@ -0,0 +1,127 @@
+from array import array
+from typing import Dict, Iterator, Optional
+from models import User, USER_SECTIONS
+
+# Scalar fields stored as columns, with their array typecodes
+COLUMNS = (
+    ('balance', 'q'),
+    ('crypto_balance', 'q'),
+    ('experience', 'q'),
+    ('level', 'l'),
+    ('energy', 'b'),  # -1 while the user never spent energy
+)
+NO_ENERGY = -1
+
+class GuildColumns:
+    """Array-backed store for every user of one guild
+
+    Each scalar field is one array with a row per user, so a resident user
+    costs a few dozen bytes instead of a full object. Nested sections are kept
+    in a sparse row -> list map and only for users that have any. Users are
+    accessed through ColumnarUser views, which are cheap and interchangeable:
+    any two views of the same row see the same data.
+    """
+
+    def __init__(self, guild_id: int):
+        self.guild_id = guild_id
+        self.user_ids = array('q')
+        self.rows: Dict[int, int] = {}
+        for field, typecode in COLUMNS:
+            setattr(self, field, array(typecode))
+        # row -> [inventory, mining, stats, cooldowns, boosts, last_seen]
+        self.sections: Dict[int, list] = {}
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def __contains__(self, user_id: int) -> bool:
+        return user_id in self.rows
+
+    def add(self, user: User) -> 'ColumnarUser':
+        """Copy a user into the store, returns its view"""
+        row = self.rows.get(user.user_id)
+        if row is None:
+            row = self.rows[user.user_id] = len(self.user_ids)
+            self.user_ids.append(user.user_id)
+            for field, _ in COLUMNS:
+                getattr(self, field).append(0)
+        view = ColumnarUser(self, row)
+        view._balance = user._balance
+        view._crypto_balance = user._crypto_balance
+        view._experience = user._experience
+        view._level = user._level
+        view._energy = user._energy
+        for name in USER_SECTIONS:
+            # Copied as loaded, so still encoded sections stay encoded
+            setattr(view, '_' + name, getattr(user, '_' + name))
+        view._last_seen = user._last_seen
+        return view
+
+    def view(self, user_id: int) -> Optional['ColumnarUser']:
+        row = self.rows.get(user_id)
+        return None if row is None else ColumnarUser(self, row)
+
+    def views(self) -> Iterator['ColumnarUser']:
+        for row in range(len(self.user_ids)):
+            yield ColumnarUser(self, row)
+
+def _column(field: str) -> property:
+    # Values outside the array's integer type are clamped instead of raising
+    # OverflowError; the database columns are 64-bit as well
+    bits = 8 * array(dict(COLUMNS)[field]).itemsize
+    low, high = -(1 << (bits - 1)), (1 << (bits - 1)) - 1
+
+    def get(self):
+        return getattr(self._columns, field)[self._row]
+
+    def set(self, value):
+        getattr(self._columns, field)[self._row] = min(max(value, low), high)
+    return property(get, set)
+
+def _section_slot(index: int) -> property:
+    def get(self):
+        sections = self._columns.sections.get(self._row)
+        return None if sections is None else sections[index]
+
+    def set(self, value):
+        sections = self._columns.sections.get(self._row)
+        if sections is None:
+            if value is None:
+                return
+            sections = self._columns.sections[self._row] = [None] * (len(USER_SECTIONS) + 1)
+        sections[index] = value
+    return property(get, set)
+
+class ColumnarUser(User):
+    """View of one row of a GuildColumns store with the full User interface"""
+    __slots__ = ('_columns', '_row')
+
+    _balance = _column('balance')
+    _crypto_balance = _column('crypto_balance')
+    _experience = _column('experience')
+    _level = _column('level')
+    _inventory, _mining, _stats, _cooldowns, _boosts, _last_seen = (
+        _section_slot(i) for i in range(len(USER_SECTIONS) + 1)
+    )
+
+    def __init__(self, columns: GuildColumns, row: int):
+        self._columns = columns
+        self._row = row
+        self.user_id = columns.user_ids[row]
+        self.guild_id = columns.guild_id
+
+    @property
+    def _energy(self) -> Optional[int]:
+        energy = self._columns.energy[self._row]
+        return None if energy == NO_ENERGY else energy
+
+    @_energy.setter
+    def _energy(self, value: Optional[int]):
+        self._columns.energy[self._row] = NO_ENERGY if value is None else value
+
+def load_columns(guild_id: int, users: Iterator[User]) -> GuildColumns:
+    """Build the store of a guild from its users"""
+    columns = GuildColumns(guild_id)
+    for user in users:
+        columns.add(user)
+    return columns
@@ -1,78 +1,193 @@
 from database import DataManager
 
 class Economy:
-    def __init__(self):
-        self.data_manager = DataManager()
+    def __init__(self, data_manager: DataManager = None):
+        # Share the bot's DataManager so both see the same cached users
+        self.data_manager = data_manager or DataManager()
 
-    def set_money(self, user_id, amount, guild_id=0):
-        user = self.data_manager.get_user(user_id, guild_id)
+    async def set_money(self, user_id, amount, guild_id=0):
+        user = await self.data_manager.get_user(user_id, guild_id)
         user.balance = amount
         self.data_manager.update_user(user)
 
-    def set_credits(self, user_id, amount, guild_id=0):
-        user = self.data_manager.get_user(user_id, guild_id)
+    async def set_credits(self, user_id, amount, guild_id=0):
+        user = await self.data_manager.get_user(user_id, guild_id)
         user.crypto_balance = amount
         self.data_manager.update_user(user)
 
-    def add_money(self, user_id, amount, guild_id=0):
-        user = self.data_manager.get_user(user_id, guild_id)
+    async def add_money(self, user_id, amount, guild_id=0):
+        user = await self.data_manager.get_user(user_id, guild_id)
         user.balance += amount
         self.data_manager.update_user(user)
 
-    def remove_money(self, user_id, amount, guild_id=0):
+    async def remove_money(self, user_id, amount, guild_id=0):
         """Legacy compatibility: remove money from user"""
-        user = self.data_manager.get_user(user_id, guild_id)
+        user = await self.data_manager.get_user(user_id, guild_id)
         user.balance -= amount
         self.data_manager.update_user(user)
 
-    def get_entry(self, user_id, guild_id=0):
-        user = self.data_manager.get_user(user_id, guild_id)
+    async def get_entry(self, user_id, guild_id=0):
+        user = await self.data_manager.get_user(user_id, guild_id)
         # Return (user_id, balance, crypto_balance)
         return (user.user_id, user.balance, user.crypto_balance)
 
-    def top_entries(self, count=5, guild_id=0):
-        leaderboard = self.data_manager.get_leaderboard(guild_id, "balance", count)
+    async def top_entries(self, count=5, guild_id=0):
+        leaderboard = await self.data_manager.get_leaderboard(guild_id, "balance", count)
         # leaderboard is a list of dicts with 'user_id' and 'value'
         return [(entry['user_id'], entry['value']) for entry in leaderboard]
 
 # --- Legacy SQLite Economy class for compatibility ---
-import random
+import asyncio
+import logging
+import queue
 import sqlite3
+import threading
+import urllib.parse
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import wraps
-from typing import Tuple, List
+from typing import Callable, Optional, Tuple, List
+from config import Config
 
 Entry = Tuple[int, int, int]
 
+# economy_ids numbers the entries 0..n-1 without gaps, so a uniform random
+# entry is one primary key lookup. The triggers keep it dense: an insert
+# appends, a delete moves the last id into the freed slot.
+_ID_MAP_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS economy_ids (
+        idx INTEGER NOT NULL PRIMARY KEY,
+        user_id INTEGER NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS economy_ids_user_id ON economy_ids(user_id)",
+    """CREATE TRIGGER IF NOT EXISTS economy_ids_insert AFTER INSERT ON economy BEGIN
+        INSERT INTO economy_ids(idx, user_id)
+        VALUES(COALESCE((SELECT max(idx) FROM economy_ids), -1) + 1, NEW.user_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS economy_ids_delete AFTER DELETE ON economy BEGIN
+        UPDATE economy_ids SET user_id=(SELECT user_id FROM economy_ids ORDER BY idx DESC LIMIT 1)
+        WHERE user_id=OLD.user_id;
+        DELETE FROM economy_ids WHERE idx=(SELECT max(idx) FROM economy_ids);
+    END""",
+)
+
+def _random_entry(cur) -> Optional[Entry]:
+    """Uniformly random entry in O(log n) through the dense id map
+
+    Picking the index and reading it is one statement, so a concurrent delete
+    cannot shrink the map in between. The mask keeps random() non-negative.
+    """
+    return cur.execute(
+        """SELECT economy.* FROM economy_ids JOIN economy ON economy.user_id=economy_ids.user_id
+        WHERE economy_ids.idx=(SELECT (random() & 9223372036854775807) % (max(idx) + 1) FROM economy_ids)"""
+    ).fetchone()
+
+def _get_entry(cur, user_id: int) -> Optional[Entry]:
+    return cur.execute("SELECT * FROM economy WHERE user_id=?", (user_id,)).fetchone()
+
+def _top_entries(cur, n: int = 0, after: Entry = None) -> List[Entry]:
+    """Entries by money descending, read from the money index
+
+    Pass the last entry of a page as `after` to get the next page; each page
+    costs O(log n + n) no matter how deep it is.
+    """
+    sql = "SELECT * FROM economy"
+    params = []
+    if after is not None:
+        sql += " WHERE (money, user_id) < (?, ?)"
+        params += [after[1], after[0]]
+    sql += " ORDER BY money DESC, user_id DESC"
+    if n:
+        sql += " LIMIT ?"
+        params.append(n)
+    return cur.execute(sql, params).fetchall()
+
 class LegacyEconomy:
-    """A wrapper for the legacy economy database (SQLite)"""
-    def __init__(self):
+    """A wrapper for the legacy economy database (SQLite)
+
+    The database runs in WAL mode and every mutation is a single upsert with
+    RETURNING, so it creates missing entries and hands back the new row in one
+    statement. With a `commit_window`, commits are grouped: the first write
+    schedules one commit `commit_window` seconds later on the running event
+    loop, and every write until then is made durable by that same commit.
+    Outside an event loop, or with a window of 0, every write commits at once;
+    with a window of None the caller commits (see AsyncLegacyEconomy).
+    """
+    def __init__(self, path: str = Config.LEGACY_DATABASE, commit_window: float = Config.LEGACY_COMMIT_WINDOW):
+        self.path = path
+        self.commit_window = commit_window
+        self._commit_handle = None
         self.open()
 
     def open(self):
         """Initializes the database"""
-        self.conn = sqlite3.connect('economy.db')
+        self.conn = sqlite3.connect(self.path)
         self.cur = self.conn.cursor()
+        self.cur.execute("PRAGMA journal_mode=WAL")
+        self.cur.execute("PRAGMA synchronous=NORMAL")
         self.cur.execute("""CREATE TABLE IF NOT EXISTS economy (
             user_id INTEGER NOT NULL PRIMARY KEY,
             money INTEGER NOT NULL DEFAULT 0,
             credits INTEGER NOT NULL DEFAULT 0
         )""")
+        self.cur.execute("CREATE INDEX IF NOT EXISTS economy_money ON economy(money, user_id)")
+        for statement in _ID_MAP_SCHEMA:
+            self.cur.execute(statement)
+        if (self.cur.execute("SELECT 1 FROM economy_ids LIMIT 1").fetchone() is None
+                and self.cur.execute("SELECT 1 FROM economy LIMIT 1").fetchone() is not None):
+            # Database from before the id map: number the existing entries once
+            self.cur.execute(
+                """INSERT INTO economy_ids(idx, user_id)
+                SELECT row_number() OVER (ORDER BY user_id) - 1, user_id FROM economy"""
+            )
+        self.conn.commit()
 
     def close(self):
         """Safely closes the database"""
         if self.conn:
-            self.conn.commit()
+            self.commit()
             self.cur.close()
             self.conn.close()
 
+    def commit(self):
+        """Commit every pending write now"""
+        if self._commit_handle is not None:
+            self._commit_handle.cancel()
+            self._commit_handle = None
+        self.conn.commit()
+
+    def _schedule_commit(self):
+        if self.commit_window is None or self._commit_handle is not None:
+            # Committed by the owner, or a commit is already due and this write joins it
+            return
+        if self.commit_window <= 0:
+            self.commit()
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.commit()
+            return
+        self._commit_handle = loop.call_later(self.commit_window, self.commit)
+
     def _commit(func):
         @wraps(func)
         def wrapper(self, *args, **kwargs):
             result = func(self, *args, **kwargs)
-            self.conn.commit()
+            self._schedule_commit()
             return result
         return wrapper
 
+    def _upsert(self, column: str, user_id: int, value: int, relative: bool) -> Entry:
+        """Set or add to `column` of an entry, creating it if needed, in one statement"""
+        initial, updated = ("max(0, :value)", f"max(0, {column} + :value)") if relative else (":value", ":value")
+        self.cur.execute(
+            f"""INSERT INTO economy(user_id, {column}) VALUES(:user_id, {initial})
+            ON CONFLICT(user_id) DO UPDATE SET {column}={updated}
+            RETURNING user_id, money, credits""",
+            {'user_id': user_id, 'value': value}
+        )
+        return self.cur.fetchone()
+
     def get_entry(self, user_id: int) -> Entry:
         self.cur.execute(
             "SELECT * FROM economy WHERE user_id=:user_id",
@@ -84,14 +199,13 @@ class LegacyEconomy:
 
     @_commit
     def new_entry(self, user_id: int) -> Entry:
-        try:
-            self.cur.execute(
-                "INSERT INTO economy(user_id, money, credits) VALUES(?,?,?)",
-                (user_id, 0, 0)
-            )
-            return self.get_entry(user_id)
-        except sqlite3.IntegrityError:
-            return self.get_entry(user_id)
+        self.cur.execute(
+            """INSERT INTO economy(user_id, money, credits) VALUES(?,?,?)
+            ON CONFLICT(user_id) DO UPDATE SET user_id=user_id
+            RETURNING user_id, money, credits""",
+            (user_id, 0, 0)
+        )
+        return self.cur.fetchone()
 
     @_commit
     def remove_entry(self, user_id: int) -> None:
@@ -102,42 +216,164 @@ class LegacyEconomy:
 
     @_commit
     def set_money(self, user_id: int, money: int) -> Entry:
-        self.cur.execute(
-            "UPDATE economy SET money=? WHERE user_id=?",
-            (money, user_id)
-        )
-        return self.get_entry(user_id)
+        return self._upsert('money', user_id, money, relative=False)
 
     @_commit
     def set_credits(self, user_id: int, credits: int) -> Entry:
-        self.cur.execute(
-            "UPDATE economy SET credits=? WHERE user_id=?",
-            (credits, user_id)
-        )
-        return self.get_entry(user_id)
+        return self._upsert('credits', user_id, credits, relative=False)
 
     @_commit
     def add_money(self, user_id: int, money_to_add: int) -> Entry:
-        money = self.get_entry(user_id)[1]
-        total = money + money_to_add
-        if total < 0:
-            total = 0
-        self.set_money(user_id, total)
-        return self.get_entry(user_id)
+        return self._upsert('money', user_id, money_to_add, relative=True)
 
     @_commit
     def add_credits(self, user_id: int, credits_to_add: int) -> Entry:
-        credits = self.get_entry(user_id)[2]
-        total = credits + credits_to_add
-        if total < 0:
-            total = 0
-        self.set_credits(user_id, total)
-        return self.get_entry(user_id)
-
-    def random_entry(self) -> Entry:
-        self.cur.execute("SELECT * FROM economy")
-        return random.choice(self.cur.fetchall())
-
-    def top_entries(self, n: int=0) -> List[Entry]:
-        self.cur.execute("SELECT * FROM economy ORDER BY money DESC")
-        return (self.cur.fetchmany(n) if n else self.cur.fetchall())
+        return self._upsert('credits', user_id, credits_to_add, relative=True)
+
+    def random_entry(self) -> Optional[Entry]:
+        return _random_entry(self.cur)
+
+    def top_entries(self, n: int=0, after: Entry=None) -> List[Entry]:
+        return _top_entries(self.cur, n, after)
+
+class AsyncLegacyEconomy:
+    """Awaitable facade over LegacyEconomy that keeps sqlite3 off the event loop
+
+    All writes go to one dedicated writer thread owning the only write
+    connection. It runs every write that is queued, commits them together and
+    only then resolves their awaitables, so a burst of writes costs one commit.
+    Reads run on a small pool of threads with their own connections, which in
+    WAL mode never wait for the writer.
+    """
+
+    def __init__(self, path: str = Config.LEGACY_DATABASE,
+                 read_pool_size: int = Config.LEGACY_READ_POOL_SIZE,
+                 write_batch: int = Config.LEGACY_WRITE_BATCH):
+        self.path = path
+        self.write_batch = write_batch
+        # Created here so the table exists before any reader connects
+        self._writer = LegacyEconomy(path, commit_window=None)
+        self._writes: 'queue.Queue' = queue.Queue()
+        self._writer_thread = threading.Thread(target=self._write_loop, name='legacy-economy-writer', daemon=True)
+        self._local = threading.local()
+        self._reader_conns: List[sqlite3.Connection] = []
+        self._closed = False
+        self._readers = ThreadPoolExecutor(read_pool_size, thread_name_prefix='legacy-economy-reader')
+        # The writer connection was opened on this thread; hand it to the writer thread
+        self._writer.conn.close()
+        self._writer_thread.start()
+
+    # --- Writer thread ---
+
+    def _write_loop(self):
+        self._writer.open()
+        while True:
+            jobs = [self._writes.get()]
+            while len(jobs) < self.write_batch:
+                try:
+                    jobs.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            results = []
+            for future, func, args in jobs:
+                if func is None:
+                    continue
+                try:
+                    results.append((future, func(*args), None))
+                except Exception as e:
+                    results.append((future, None, e))
+            try:
+                self._writer.commit()
+            except Exception as e:
+                logging.error(f"Legacy economy commit failed: {e}")
+                # Drop the failed batch so the next one does not commit it
+                self._writer.conn.rollback()
+                results = [(future, None, e) for future, _, _ in results]
+            for future, result, error in results:
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+            if any(func is None for _, func, _ in jobs):
+                self._writer.close()
+                for future, _, _ in jobs:
+                    if not future.done():
+                        future.set_result(None)
+                return
+
+    def _check_open(self):
+        if self._closed:
+            raise RuntimeError("AsyncLegacyEconomy is closed")
+
+    def _write(self, func: Callable, *args) -> 'asyncio.Future':
+        if func is not None:
+            self._check_open()
+        future = Future()
+        self._writes.put((future, func, args))
+        return asyncio.wrap_future(future)
+
+    # --- Reader pool ---
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Quoted, so a '?' or '#' in the path is not read as URI syntax
+            conn = self._local.conn = sqlite3.connect(
+                f'file:{urllib.parse.quote(self.path)}?mode=ro', uri=True,
+                # Only used by this reader thread, but closed by close() on another one
+                check_same_thread=False
+            )
+            self._reader_conns.append(conn)
+        return conn
+
+    def _read(self, func: Callable, *args):
+        return func(self._connection(), *args)
+
+    async def _query(self, func: Callable, *args):
+        self._check_open()
+        return await asyncio.get_running_loop().run_in_executor(self._readers, self._read, func, *args)
+
+    # --- API ---
+
+    async def get_entry(self, user_id: int) -> Entry:
+        entry = await self._query(_get_entry, user_id)
+        if entry:
+            return entry
+        return await self._write(self._writer.new_entry, user_id)
+
+    async def set_money(self, user_id: int, money: int) -> Entry:
+        return await self._write(self._writer.set_money, user_id, money)
+
+    async def set_credits(self, user_id: int, credits: int) -> Entry:
+        return await self._write(self._writer.set_credits, user_id, credits)
+
+    async def add_money(self, user_id: int, money_to_add: int) -> Entry:
+        return await self._write(self._writer.add_money, user_id, money_to_add)
+
+    async def add_credits(self, user_id: int, credits_to_add: int) -> Entry:
+        return await self._write(self._writer.add_credits, user_id, credits_to_add)
+
+    async def remove_entry(self, user_id: int) -> None:
+        await self._write(self._writer.remove_entry, user_id)
+
+    async def random_entry(self) -> Optional[Entry]:
+        return await self._query(_random_entry)
+
+    async def top_entries(self, n: int = 0, after: Entry = None) -> List[Entry]:
+        return await self._query(_top_entries, n, after)
+
+    async def close(self):
+        """Finish queued writes, then stop the writer and the readers
+
+        Reads and writes submitted afterwards raise RuntimeError.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        await self._write(None)
+        # Let running reads finish before their connections go away
+        await asyncio.to_thread(self._readers.shutdown)
+        for conn in self._reader_conns:
+            conn.close()
+        self._reader_conns.clear()
+
@@ -0,0 +1,116 @@
+import io
+import logging
+import threading
+import time
+from typing import Dict, Optional, Sequence, Tuple
+from PIL import Image
+from config import Config
+
+# name -> (Pillow format, palette colours or None for full colour, save options)
+ENCODINGS: Dict[str, Tuple[str, Optional[int], dict]] = {
+    'png': ('PNG', None, {'compress_level': 6}),
+    'png8': ('PNG', 256, {'compress_level': 9}),
+    'png8-64': ('PNG', 64, {'compress_level': 9}),
+    'webp': ('WEBP', None, {'quality': 80, 'method': 4}),
+}
+
+# Encodings tried per image type, best looking first. Palette PNG suits the
+# flat tables and graphs; colour emoji band when quantised, so images built
+# around sprites try lossy WebP before a palette.
+DEFAULT_LADDER = ('png', 'png8', 'webp', 'png8-64')
+ENCODE_LADDERS: Dict[str, Sequence[str]] = {
+    'slots': ('png', 'webp', 'png8', 'png8-64'),
+    'coinflip': ('png', 'webp', 'png8', 'png8-64'),
+    'mining': ('png', 'webp', 'png8', 'png8-64'),
+}
+
+FILE_EXTENSIONS = {b'\x89PNG': 'png', b'RIFF': 'webp', b'GIF8': 'gif'}
+
+def image_filename(stem: str, data: io.BytesIO) -> str:
+    """Attachment name for an encoded image, with the extension of its actual format"""
+    return f"{stem}.{FILE_EXTENSIONS.get(data.getbuffer()[:4].tobytes(), 'png')}"
+
+class BudgetedEncoder:
+    """Encodes images to stay within a byte budget and an encode time budget
+
+    Each image type walks its ladder of encodings and keeps the first result
+    within its byte budget (IMAGE_BYTE_BUDGETS, else IMAGE_BYTE_BUDGET). Once
+    IMAGE_ENCODE_BUDGET_MS is spent it stops and keeps the smallest result so
+    far. The encoding an image type settled on is where its next image starts,
+    so steady state costs one encode. A type whose walk found nothing within
+    budget uses its smallest encoding without walking for the next
+    `reprobe_after` images. After `reprobe_after` images in a row come out
+    well under the byte budget, the type starts one encoding higher again, so
+    a smaller image mix can win back quality. `choices` holds the last choice
+    per image type.
+    """
+
+    def __init__(self, byte_budget: int = Config.IMAGE_BYTE_BUDGET,
+                 byte_budgets: Optional[Dict[str, int]] = None,
+                 time_budget_ms: float = Config.IMAGE_ENCODE_BUDGET_MS,
+                 reprobe_after: int = Config.IMAGE_REPROBE_AFTER,
+                 reprobe_ratio: float = Config.IMAGE_REPROBE_RATIO):
+        self.byte_budget = byte_budget
+        self.byte_budgets = Config.IMAGE_BYTE_BUDGETS if byte_budgets is None else byte_budgets
+        self.time_budget_ms = time_budget_ms
+        self.reprobe_after = reprobe_after
+        self.reprobe_ratio = reprobe_ratio
+        self.choices: Dict[str, dict] = {}
+        self._start: Dict[str, int] = {}
+        self._under: Dict[str, int] = {}
+        # Images left that skip the walk because the last one found nothing within budget
+        self._pinned: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _save(img: Image.Image, encoding: str) -> bytes:
+        fmt, colors, options = ENCODINGS[encoding]
+        if colors is not None:
+            img = img.convert('RGB').quantize(colors, method=Image.Quantize.FASTOCTREE)
+        buffer = io.BytesIO()
+        img.save(buffer, format=fmt, **options)
+        return buffer.getvalue()
+
+    def encode(self, kind: str, img: Image.Image) -> io.BytesIO:
+        """Encoded `img`, rewound and ready to upload"""
+        ladder = ENCODE_LADDERS.get(kind, DEFAULT_LADDER)
+        budget = self.byte_budgets.get(kind, self.byte_budget)
+        with self._lock:
+            start = self._start.get(kind, 0)
+            pinned = self._pinned.get(kind, 0)
+            if pinned:
+                self._pinned[kind] = pinned - 1
+        started = time.perf_counter()
+        best = None
+        for index in range(start, start + 1 if pinned else len(ladder)):
+            data = self._save(img, ladder[index])
+            if best is None or len(data) < len(best[1]):
+                best = (index, data)
+            if len(data) <= budget:
+                best = (index, data)
+                break
+            if (time.perf_counter() - started) * 1000 >= self.time_budget_ms:
+                break
+        index, data = best
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        choice = {
+            'encoding': ladder[index],
+            'bytes': len(data),
+            'encode_ms': elapsed_ms,
+            'within_budget': len(data) <= budget,
+        }
+        with self._lock:
+            if self._start.get(kind, 0) != index:
+                logging.debug(f"{kind} images now encoded as {ladder[index]} ({len(data)} bytes)")
+            if not pinned and len(data) > budget:
+                # Walking again would only repeat the misses and spend the time budget
+                self._pinned[kind] = self.reprobe_after
+            under = self._under.get(kind, 0) + 1 if len(data) <= budget * self.reprobe_ratio else 0
+            if index > 0 and under >= self.reprobe_after:
+                logging.debug(f"{kind} images well under budget, retrying {ladder[index - 1]}")
+                index -= 1
+                under = 0
+            self._under[kind] = under
+            self._start[kind] = index
+            self.choices[kind] = choice
+        return io.BytesIO(data)
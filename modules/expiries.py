@@ -0,0 +1,98 @@
+import heapq
+import time
+from typing import Dict, Iterable, List, Tuple
+
+Expiries = Dict[str, int]
+
+def user_expiries(user) -> Expiries:
+    """Expiry timestamps of a user keyed by kind: cooldown names and 'boost:<type>'"""
+    expiries = dict(user.peek_section('cooldowns') or {})
+    for boost_type, boost in (user.peek_section('boosts') or {}).items():
+        expiries[f'boost:{boost_type}'] = boost['expires_at']
+    return expiries
+
+class ExpiryIndex:
+    """Per-guild min-heaps of upcoming cooldown and boost expiries
+
+    Each (guild, kind) heap holds (expires_at, user_id) entries. Entries are
+    invalidated lazily: one only counts if it still matches the user's current
+    expiry for that kind, and heaps are rebuilt once stale entries dominate.
+    As with LeaderboardIndex, a guild has to be loaded before it is tracked.
+    """
+
+    def __init__(self):
+        self._heaps: Dict[Tuple[int, str], List[Tuple[int, int]]] = {}
+        self._current: Dict[int, Dict[int, Expiries]] = {}
+
+    def has_guild(self, guild_id: int) -> bool:
+        return guild_id in self._current
+
+    def load_guild(self, guild_id: int, entries: Iterable[Tuple[int, Expiries]]):
+        """Build the heaps of a guild from (user_id, expiries) pairs"""
+        self.drop_guild(guild_id)
+        self._current[guild_id] = {}
+        for user_id, expiries in entries:
+            self.update(guild_id, user_id, expiries)
+
+    def drop_guild(self, guild_id: int):
+        self._current.pop(guild_id, None)
+        for key in [key for key in self._heaps if key[0] == guild_id]:
+            del self._heaps[key]
+
+    def update(self, guild_id: int, user_id: int, expiries: Expiries):
+        """Record a user's current expiries in a loaded guild"""
+        current = self._current.get(guild_id)
+        if current is None:
+            return
+        old = current.get(user_id, {})
+        if old == expiries:
+            return
+        current[user_id] = dict(expiries)
+        for kind, expires_at in expiries.items():
+            if old.get(kind) == expires_at:
+                continue
+            heap = self._heaps.setdefault((guild_id, kind), [])
+            heapq.heappush(heap, (expires_at, user_id))
+            if len(heap) > 2 * len(current) + 64:
+                self._compact(guild_id, kind)
+
+    def update_user(self, user):
+        if user.guild_id in self._current:
+            self.update(user.guild_id, user.user_id, user_expiries(user))
+
+    def next_ready(self, guild_id: int, kind: str, limit: int = 10, now: float = None) -> List[Dict]:
+        """Users whose `kind` expiry is still pending, soonest first, as [{'user_id', 'expires_at'}]
+
+        Costs O(k log n) for k popped entries; stale entries popped on the way
+        are discarded, valid ones are pushed back. A user whose expiry went back
+        to an earlier value has a duplicate entry; only the first is kept.
+        """
+        heap = self._heaps.get((guild_id, kind))
+        current = self._current.get(guild_id)
+        if not heap or current is None:
+            return []
+        now = time.time() if now is None else now
+        ready = []
+        keep = []
+        seen = set()
+        while heap and len(ready) < limit:
+            expires_at, user_id = heapq.heappop(heap)
+            if current.get(user_id, {}).get(kind) != expires_at or expires_at <= now or user_id in seen:
+                # Superseded, already expired and never due again, or a duplicate
+                continue
+            seen.add(user_id)
+            keep.append((expires_at, user_id))
+            ready.append({'user_id': user_id, 'expires_at': expires_at})
+        for entry in keep:
+            heapq.heappush(heap, entry)
+        return ready
+
+    def _compact(self, guild_id: int, kind: str):
+        """Drop invalidated heap entries of one (guild, kind) heap"""
+        heap = [
+            (expiries[kind], user_id)
+            for user_id, expiries in self._current[guild_id].items()
+            if kind in expiries
+        ]
+        heapq.heapify(heap)
+        self._heaps[(guild_id, kind)] = heap
@@ -0,0 +1,68 @@
+import logging
+import os
+import threading
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from PIL import ImageFont
+
+# Candidate files per face, tried in order; the first one Pillow can open wins
+FONT_CANDIDATES: Dict[str, Tuple[str, ...]] = {
+    'arial': (
+        'arial.ttf',
+        'Arial.ttf',
+        '/usr/share/fonts/truetype/msttcorefonts/Arial.ttf',
+        '/Library/Fonts/Arial.ttf',
+        'C:/Windows/Fonts/arial.ttf',
+        'DejaVuSans.ttf',
+        '/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+        'LiberationSans-Regular.ttf',
+    ),
+    'emoji': (
+        'NotoColorEmoji.ttf',
+        '/usr/share/fonts/truetype/noto/NotoColorEmoji.ttf',
+        '/usr/share/fonts/noto/NotoColorEmoji.ttf',
+        'C:/Windows/Fonts/seguiemj.ttf',
+    ),
+}
+
+# Size used to check that a candidate loads; bitmap emoji fonts only open at their strike size
+FONT_PROBE_SIZES: Dict[str, int] = {
+    'emoji': 109,
+}
+
+_lock = threading.Lock()
+_paths: Dict[str, Optional[str]] = {}
+
+def resolve_font_path(face: str = 'arial') -> Optional[str]:
+    """File backing a face, looked up once per process; None if no candidate loads"""
+    with _lock:
+        if face in _paths:
+            return _paths[face]
+        path = None
+        for candidate in FONT_CANDIDATES.get(face, (face,)):
+            try:
+                ImageFont.truetype(candidate, FONT_PROBE_SIZES.get(face, 12))
+            except OSError:
+                continue
+            path = candidate
+            break
+        if path is None:
+            logging.warning(f"No font file found for {face!r}, using Pillow's default font")
+        _paths[face] = path
+        return path
+
+@lru_cache(maxsize=None)
+def get_font(size: int, face: str = 'arial') -> ImageFont.ImageFont:
+    """Shared font object for a (face, size) pair
+
+    Falls back to Pillow's bundled default font, scaled when the installed
+    Pillow supports it, whenever the face cannot be resolved.
+    """
+    path = resolve_font_path(face)
+    if path is not None:
+        return ImageFont.truetype(path, size)
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:
+        # Pillow < 10.1 only ships the fixed size bitmap font
+        return ImageFont.load_default()
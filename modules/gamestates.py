@@ -0,0 +1,149 @@
+import asyncio
+import heapq
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from models import GameState
+
+class GameStateStore:
+    """Active games with TTL expiry and a hard size cap, persisted through DataManager
+
+    Every game carries an `expires_at` wall-clock timestamp in its data so the
+    deadline survives restarts. Deadlines are kept in a min-heap; a background
+    task sleeps until the earliest one and expires games as they come due.
+    Heap entries are invalidated lazily: an entry only counts if the game still
+    exists with the same deadline.
+    When more than `max_games` games are active, the ones closest to expiring
+    are expired early. `on_expire(state)` is called for every expired game.
+    """
+
+    def __init__(self, data_manager, default_ttl: float, max_games: int,
+                 on_expire: Optional[Callable[[GameState], None]] = None):
+        self.data_manager = data_manager
+        self.default_ttl = default_ttl
+        self.max_games = max_games
+        self.on_expire = on_expire
+        self._states: Dict[str, GameState] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __contains__(self, game_id: str) -> bool:
+        return game_id in self._states
+
+    async def load(self) -> List[GameState]:
+        """Adopt the games persisted by a previous run, returns those still live"""
+        states = await self.data_manager.get_game_states()
+        now = time.time()
+        for state in states:
+            if state.get_data('expires_at', 0) <= now:
+                self.data_manager.delete_game_state(state.game_id)
+            else:
+                self._track(state)
+        self._enforce_cap()
+        return list(self._states.values())
+
+    def create(self, game_id: str, data: dict, ttl: float = None) -> GameState:
+        """Start tracking a game, replacing any previous game with the same id"""
+        data = dict(data)
+        data['expires_at'] = time.time() + (ttl or self.default_ttl)
+        state = self.data_manager.create_game_state(game_id, data)
+        self._track(state)
+        self._enforce_cap()
+        return state
+
+    def get(self, game_id: str) -> Optional[GameState]:
+        return self._states.get(game_id)
+
+    def update(self, game_id: str, ttl: float = None, **changes) -> Optional[GameState]:
+        """Change fields of a game, optionally pushing its deadline back by `ttl`"""
+        state = self._states.get(game_id)
+        if state is None:
+            return None
+        for key, value in changes.items():
+            state.set_data(key, value)
+        if ttl is not None:
+            state.set_data('expires_at', time.time() + ttl)
+            self._push(state)
+        self.data_manager.update_game_state(state)
+        return state
+
+    def delete(self, game_id: str):
+        """Stop tracking a finished game"""
+        if self._states.pop(game_id, None) is not None:
+            self.data_manager.delete_game_state(game_id)
+
+    def expire(self, now: float = None) -> List[GameState]:
+        """Expire every game whose deadline has passed"""
+        now = time.time() if now is None else now
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            state = self._pop_valid()
+            if state is not None:
+                expired.append(state)
+        for state in expired:
+            self._expire(state)
+        return expired
+
+    def start(self):
+        """Start the background expiry task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            self.expire()
+            timeout = self._heap[0][0] - time.time() if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _track(self, state: GameState):
+        self._states[state.game_id] = state
+        self._push(state)
+
+    def _push(self, state: GameState):
+        expires_at = state.get_data('expires_at')
+        if not self._heap or expires_at < self._heap[0][0]:
+            # New earliest deadline: wake the sleeper so it re-arms its timer
+            self._wakeup.set()
+        heapq.heappush(self._heap, (expires_at, state.game_id))
+        if len(self._heap) > 2 * len(self._states) + 64:
+            self._compact()
+
+    def _compact(self):
+        """Drop invalidated heap entries"""
+        self._heap = [(state.get_data('expires_at'), game_id) for game_id, state in self._states.items()]
+        heapq.heapify(self._heap)
+
+    def _pop_valid(self) -> Optional[GameState]:
+        """Pop the earliest heap entry, returning its game if the entry is still current"""
+        expires_at, game_id = heapq.heappop(self._heap)
+        state = self._states.get(game_id)
+        if state is None or state.get_data('expires_at') != expires_at:
+            return None
+        return state
+
+    def _enforce_cap(self):
+        while len(self._states) > self.max_games and self._heap:
+            state = self._pop_valid()
+            if state is not None:
+                self._expire(state)
+
+    def _expire(self, state: GameState):
+        self.delete(state.game_id)
+        if self.on_expire:
+            try:
+                self.on_expire(state)
+            except Exception as e:
+                logging.error(f"Game expiry callback failed for {state.game_id}: {e}")
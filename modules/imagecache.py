@@ -0,0 +1,41 @@
+import threading
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+class ImageCache:
+    """Bounded LRU cache of encoded images keyed by their full render inputs
+
+    Stores the encoded bytes, so a hit costs a dict lookup and never touches
+    Pillow. Thread-safe, so it can be warmed from a worker thread while
+    commands read from it.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: Hashable, data: bytes):
+        with self._lock:
+            self._entries[key] = data
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
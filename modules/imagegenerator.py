@@ -1,32 +1,96 @@
 from PIL import Image, ImageDraw, ImageFont
+from config import Config
+from modules.fonts import get_font
+from modules.imagecache import ImageCache
+from modules.encoder import BudgetedEncoder
+from modules.sprites import COIN_FACES, CARD_HEIGHT, get_atlas, get_card_sheet
+from modules.utils import CARD_BACK, RED_NUMBERS, ROULETTE_COLOURS, roulette_colour
+import math
 import random
 import io
 import os
-from typing import List, Tuple, Callable, Optional
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple, Callable, Optional
 
 class CasinoImageGenerator:
-    """Generate visual images for casino games"""
+    """Generate visual images for casino games
     
-    def __init__(self):
+    The static layer of every image (background, frames, tables, titles and
+    the roulette wheel) is rendered once when the generator is created. Each
+    create_* call copies its layer and draws only the dynamic elements.
+    Slots and coinflip have few distinct outcomes, so their encoded images are
+    also kept in `outcome_cache`, keyed by everything that affects the render.
+    Emoji (reels, suits, materials, coin faces) are pasted from `sprites`,
+    cards from `cards`, and blackjack hands are cached as whole strips.
+    Images are encoded by `encoder`, which picks a format per image type.
+    """
+    
+    def __init__(self, encoder: Optional[BudgetedEncoder] = None):
         self.card_width = 100
         self.card_height = 140
         self.slot_size = 120
         self._callback: Optional[Callable[[str, dict], None]] = None
-
+        self.outcome_cache = ImageCache(Config.OUTCOME_IMAGE_CACHE_SIZE)
+        self.encoder = encoder or BudgetedEncoder()
+        self.sprites = get_atlas()
+        self.cards = get_card_sheet()
+        self._hand_strips: 'OrderedDict[Tuple[str, ...], Image.Image]' = OrderedDict()
+        self._hand_strips_lock = threading.Lock()
+        self._backgrounds: Dict[tuple, Image.Image] = {
+            ('slots', False): self._render_slots_background(False),
+            ('slots', True): self._render_slots_background(True),
+            ('blackjack',): self._render_blackjack_background(),
+            ('roulette',): self._render_roulette_background(),
+            ('coinflip',): self._render_coinflip_background(),
+            ('crash', False): self._render_crash_background(False),
+            ('crash', True): self._render_crash_background(True),
+            ('mining',): self._render_mining_background(),
+        }
+    
     def set_callback(self, callback: Callable[[str, dict], None]):
         """Set a callback to be called after image generation.
         Args:
             callback: function(game_type: str, info: dict)
         """
         self._callback = callback
-
+    
     def _notify(self, game_type: str, info: dict):
         if self._callback:
             self._callback(game_type, info)
-
-    def create_slot_machine_image(self, reels: List[str], won: bool = False, multiplier: float = 1.0) -> io.BytesIO:
-        """Create animated slot machine image"""
-        # Create base image
+    
+    def _background(self, *key) -> Image.Image:
+        """A fresh copy of a pre-rendered static layer"""
+        return self._backgrounds[key].copy()
+    
+    def _cached(self, key: tuple, render: Callable[[], io.BytesIO]) -> io.BytesIO:
+        """Encoded image for `key` from the outcome cache, rendering it on a miss"""
+        data = self.outcome_cache.get(key)
+        if data is None:
+            data = render().getvalue()
+            self.outcome_cache.put(key, data)
+        return io.BytesIO(data)
+    
+    @staticmethod
+    def _slots_key(reels: List[str], won: bool, multiplier: float) -> tuple:
+        # str(multiplier): 10 and 10.0 are equal keys but render as "10x" and "10.0x"
+        return ('slots', tuple(reels), won, str(multiplier))
+    
+    @staticmethod
+    def _coinflip_key(result: str, prediction: str, won: bool, multiplier: float) -> tuple:
+        return ('coinflip', result.upper(), prediction.upper(), won, str(multiplier))
+    
+    def outcome_key(self, method: str, args: tuple) -> Optional[tuple]:
+        """Outcome cache key of a create_* call with all arguments given, None if not cached"""
+        if method == 'create_slot_machine_image' and len(args) == 3:
+            return self._slots_key(*args)
+        if method == 'create_coinflip_image' and len(args) == 4:
+            return self._coinflip_key(*args)
+        return None
+    
+    # --- Static layers ---
+    
+    def _render_slots_background(self, won: bool) -> Image.Image:
         width, height = 400, 300
         img = Image.new('RGB', (width, height), color='#2C5530')
         draw = ImageDraw.Draw(img)
@@ -36,24 +100,127 @@ class CasinoImageGenerator:
         draw.rectangle([20, 40, width-20, height-40], fill='#1a1a1a', outline=frame_color, width=8)
         
         # Draw title
-        try:
-            font_large = ImageFont.truetype("arial.ttf", 24)
-            font_medium = ImageFont.truetype("arial.ttf", 36)
-        except:
-            font_large = ImageFont.load_default()
-            font_medium = ImageFont.load_default()
-        
-        draw.text((width//2, 15), "🎰 SLOT MACHINE 🎰", fill='#FFD700', font=font_large, anchor="mt")
+        draw.text((width//2, 15), "🎰 SLOT MACHINE 🎰", fill='#FFD700', font=get_font(24), anchor="mt")
         
         # Draw reel slots
-        slot_positions = [80, 160, 240]
-        for i, (pos, symbol) in enumerate(zip(slot_positions, reels)):
-            # Slot background
-            slot_bg_color = '#FFD700' if won else '#333333'
+        slot_bg_color = '#FFD700' if won else '#333333'
+        for pos in [80, 160, 240]:
             draw.rectangle([pos-50, 80, pos+50, 200], fill=slot_bg_color, outline='#8B4513', width=3)
-            
-            # Symbol
-            draw.text((pos, 140), symbol, fill='#000000', font=font_medium, anchor="mm")
+        return img
+    
+    def _render_blackjack_background(self) -> Image.Image:
+        width, height = 600, 400
+        img = Image.new('RGB', (width, height), color='#0F5132')
+        draw = ImageDraw.Draw(img)
+        font_large = get_font(20)
+        font_medium = get_font(16)
+        
+        # Draw table
+        draw.ellipse([50, 50, width-50, height-50], fill='#2D5016', outline='#8B4513', width=4)
+        
+        # Title and section labels
+        draw.text((width//2, 20), "🃏 BLACKJACK TABLE 🃏", fill='#FFD700', font=font_large, anchor="mt")
+        draw.text((width//2, 80), "DEALER", fill='#FFFFFF', font=font_medium, anchor="mt")
+        draw.text((width//2, 250), "PLAYER", fill='#FFFFFF', font=font_medium, anchor="mt")
+        return img
+    
+    def _render_roulette_background(self) -> Image.Image:
+        size = 300
+        img = Image.new('RGB', (size, size), color='#0F5132')
+        draw = ImageDraw.Draw(img)
+        
+        # Draw outer rim
+        center = size // 2
+        wheel_radius = 120
+        draw.ellipse([center-wheel_radius, center-wheel_radius,
+                     center+wheel_radius, center+wheel_radius],
+                    fill='#8B4513', outline='#FFD700', width=4)
+        
+        # Draw inner wheel
+        inner_radius = 100
+        draw.ellipse([center-inner_radius, center-inner_radius,
+                     center+inner_radius, center+inner_radius],
+                    fill='#2C5530', outline='#FFD700', width=2)
+        
+        # Draw numbers around wheel (simplified)
+        for i in range(0, 37):
+            self._draw_roulette_number(draw, i, highlighted=False)
+        
+        # Draw center
+        draw.ellipse([center-15, center-15, center+15, center+15], fill='#FFD700')
+        return img
+    
+    def _render_coinflip_background(self) -> Image.Image:
+        size = 300
+        img = Image.new('RGB', (size, size), color='#0F5132')
+        draw = ImageDraw.Draw(img)
+        
+        # Draw coin
+        center = size // 2
+        coin_radius = 80
+        coin_color = '#FFD700'
+        draw.ellipse([center-coin_radius, center-coin_radius,
+                     center+coin_radius, center+coin_radius],
+                    fill=coin_color, outline='#B8860B', width=5)
+        return img
+    
+    def _render_crash_background(self, crashed: bool) -> Image.Image:
+        width, height = 400, 300
+        img = Image.new('RGB', (width, height), color='#1a1a1a')
+        draw = ImageDraw.Draw(img)
+        
+        # Draw title
+        title = "💥 CRASHED!" if crashed else "🚀 CRASH GAME"
+        title_color = '#FF0000' if crashed else '#00FF00'
+        draw.text((width//2, 20), title, fill=title_color, font=get_font(24), anchor="mt")
+        
+        # Draw graph background
+        graph_left, graph_top = 50, 60
+        graph_right, graph_bottom = width-50, height-60
+        draw.rectangle([graph_left, graph_top, graph_right, graph_bottom],
+                      outline='#333333', width=2)
+        
+        # Draw status
+        status = "CRASHED!" if crashed else "Flying..."
+        status_color = '#FF0000' if crashed else '#00FF00'
+        draw.text((width//2, height-30), status, fill=status_color,
+                 font=get_font(16), anchor="mt")
+        return img
+    
+    def _render_mining_background(self) -> Image.Image:
+        width, height = 350, 250
+        img = Image.new('RGB', (width, height), color='#654321')
+        draw = ImageDraw.Draw(img)
+        
+        # Draw mine background
+        draw.rectangle([20, 20, width-20, height-20], fill='#2F1B14', outline='#8B4513', width=3)
+        
+        # Draw title
+        draw.text((width//2, 35), "⛏️ MINING RESULT ⛏️", fill='#FFD700',
+                 font=get_font(20), anchor="mt")
+        return img
+    
+    # --- Images ---
+    
+    def create_slot_machine_image(self, reels: List[str], won: bool = False, multiplier: float = 1.0) -> io.BytesIO:
+        """Create animated slot machine image"""
+        img_buffer = self._cached(
+            self._slots_key(reels, won, multiplier),
+            lambda: self._render_slot_machine(reels, won, multiplier)
+        )
+        self._notify("slots", {"reels": reels, "won": won, "multiplier": multiplier})
+        return img_buffer
+    
+    def _render_slot_machine(self, reels: List[str], won: bool, multiplier: float) -> io.BytesIO:
+        width = 400
+        img = self._background('slots', won)
+        draw = ImageDraw.Draw(img)
+        font_large = get_font(24)
+        
+        # Draw reel symbols
+        slot_positions = [80, 160, 240]
+        for pos, symbol in zip(slot_positions, reels):
+            self.sprites.paste(img, symbol, (pos, 140), 72)
         
         # Draw result text
         result_text = "🎉 WINNER! 🎉" if won else "Try Again!"
@@ -63,55 +230,34 @@ class CasinoImageGenerator:
         if multiplier > 1:
             draw.text((width//2, 265), f"Multiplier: {multiplier}x", fill='#FFD700', font=font_large, anchor="mt")
         
-        # Save to BytesIO
-        img_buffer = io.BytesIO()
-        img.save(img_buffer, format='PNG')
-        img_buffer.seek(0)
-        self._notify("slots", {"reels": reels, "won": won, "multiplier": multiplier})
+        img_buffer = self.encoder.encode('slots', img)
         return img_buffer
     
-    def create_blackjack_table(self, player_cards: List[Tuple[str, int]], 
-                              dealer_cards: List[Tuple[str, int]], 
-                              player_value: int, dealer_value: int, 
+    def create_blackjack_table(self, player_cards: List[Tuple[str, int]],
+                              dealer_cards: List[Tuple[str, int]],
+                              player_value: int, dealer_value: int,
                               game_over: bool = False, multiplier: float = 1.0) -> io.BytesIO:
         """Create blackjack table visualization"""
-        width, height = 600, 400
-        img = Image.new('RGB', (width, height), color='#0F5132')
+        width = 600
+        img = self._background('blackjack')
         draw = ImageDraw.Draw(img)
-        
-        try:
-            font_large = ImageFont.truetype("arial.ttf", 20)
-            font_medium = ImageFont.truetype("arial.ttf", 16)
-        except:
-            font_large = ImageFont.load_default()
-            font_medium = ImageFont.load_default()
-        
-        # Draw table
-        draw.ellipse([50, 50, width-50, height-50], fill='#2D5016', outline='#8B4513', width=4)
-        
-        # Title
-        draw.text((width//2, 20), "🃏 BLACKJACK TABLE 🃏", fill='#FFD700', font=font_large, anchor="mt")
+        font_medium = get_font(16)
         
         # Dealer section
-        draw.text((width//2, 80), "DEALER", fill='#FFFFFF', font=font_medium, anchor="mt")
-        self._draw_cards(draw, dealer_cards, width//2 - len(dealer_cards)*25, 100, game_over)
+        self._paste_hand(img, dealer_cards, width//2 - len(dealer_cards)*25, 100, game_over)
         if game_over:
             draw.text((width//2, 160), f"Value: {dealer_value}", fill='#FFFFFF', font=font_medium, anchor="mt")
         else:
             draw.text((width//2, 160), f"Value: {dealer_cards[0][1]} + ?", fill='#FFFFFF', font=font_medium, anchor="mt")
         
         # Player section
-        draw.text((width//2, 250), "PLAYER", fill='#FFFFFF', font=font_medium, anchor="mt")
-        self._draw_cards(draw, player_cards, width//2 - len(player_cards)*25, 270, True)
+        self._paste_hand(img, player_cards, width//2 - len(player_cards)*25, 270, True)
         draw.text((width//2, 330), f"Value: {player_value}", fill='#FFFFFF', font=font_medium, anchor="mt")
         # Draw multiplier if > 1
         if multiplier > 1:
             draw.text((width//2, 360), f"Multiplier: {multiplier}x", fill='#FFD700', font=font_medium, anchor="mt")
         
-        # Save to BytesIO
-        img_buffer = io.BytesIO()
-        img.save(img_buffer, format='PNG')
-        img_buffer.seek(0)
+        img_buffer = self.encoder.encode('blackjack', img)
         self._notify("blackjack", {
             "player_cards": player_cards,
             "dealer_cards": dealer_cards,
@@ -121,102 +267,75 @@ class CasinoImageGenerator:
         })
         return img_buffer
     
-    def _draw_cards(self, draw: ImageDraw, cards: List[Tuple[str, int]], 
+    def _hand_strip(self, faces: Tuple[str, ...]) -> Image.Image:
+        """Cards laid out side by side, transparent between cards"""
+        with self._hand_strips_lock:
+            strip = self._hand_strips.get(faces)
+            if strip is not None:
+                self._hand_strips.move_to_end(faces)
+                return strip
+        strip = Image.new('RGBA', (len(faces) * 60, CARD_HEIGHT), (0, 0, 0, 0))
+        for i, face in enumerate(faces):
+            strip.paste(self.cards.card(face), (i * 60, 0))
+        with self._hand_strips_lock:
+            self._hand_strips[faces] = strip
+            if len(self._hand_strips) > Config.HAND_STRIP_CACHE_SIZE:
+                self._hand_strips.popitem(last=False)
+        return strip
+    
+    def _paste_hand(self, img: Image.Image, cards: List[Tuple[str, int]],
                    start_x: int, start_y: int, show_all: bool = True):
-        """Draw playing cards"""
-        card_width, card_height = 50, 70
-        
-        for i, (card_name, value) in enumerate(cards):
-            x = start_x + i * 60
-            y = start_y
-            
-            if not show_all and i > 0:
-                # Hidden card (face down)
-                draw.rectangle([x, y, x+card_width, y+card_height], 
-                             fill='#1a1a1a', outline='#FFFFFF', width=2)
-                draw.text((x+card_width//2, y+card_height//2), "🂠", 
-                         fill='#FFFFFF', anchor="mm")
-            else:
-                # Visible card
-                card_color = '#FF0000' if card_name[0] in ['♥', '♦'] else '#000000'
-                draw.rectangle([x, y, x+card_width, y+card_height], 
-                             fill='#FFFFFF', outline='#000000', width=2)
-                
-                # Draw card symbol
-                try:
-                    font_small = ImageFont.truetype("arial.ttf", 12)
-                except:
-                    font_small = ImageFont.load_default()
-                
-                draw.text((x+card_width//2, y+card_height//2), card_name, 
-                         fill=card_color, font=font_small, anchor="mm")
+        """Paste a hand; unless `show_all`, every card but the first is face down"""
+        faces = tuple(card_name if show_all or i == 0 else CARD_BACK for i, (card_name, _) in enumerate(cards))
+        strip = self._hand_strip(faces)
+        img.paste(strip, (start_x, start_y), strip)
+    
+    def _roulette_position(self, number: int) -> Tuple[int, int]:
+        center, inner_radius = 150, 100
+        angle = (number * 360 / 37) * math.pi / 180
+        return (center + int((inner_radius - 20) * math.cos(angle)),
+                center + int((inner_radius - 20) * math.sin(angle)))
+    
+    def _draw_roulette_number(self, draw: ImageDraw, number: int, highlighted: bool):
+        x, y = self._roulette_position(number)
+        # Highlight winning number
+        if highlighted:
+            draw.ellipse([x-12, y-12, x+12, y+12], fill='#FFD700')
+        
+        # Red or black numbers
+        color = '#FF0000' if number in RED_NUMBERS else '#000000' if number != 0 else '#00FF00'
+        draw.text((x, y), str(number), fill='#FFFFFF' if highlighted else color,
+                 font=get_font(14), anchor="mm")
     
     def create_roulette_wheel(self, winning_number: int, prediction: str, multiplier: float = 1.0) -> io.BytesIO:
         """Create roulette wheel visualization"""
         size = 300
-        img = Image.new('RGB', (size, size), color='#0F5132')
+        img = self._background('roulette')
         draw = ImageDraw.Draw(img)
-        
-        try:
-            font_large = ImageFont.truetype("arial.ttf", 20)
-            font_medium = ImageFont.truetype("arial.ttf", 14)
-        except:
-            font_large = ImageFont.load_default()
-            font_medium = ImageFont.load_default()
-        
-        # Draw outer rim
+        font_large = get_font(20)
+        font_medium = get_font(14)
         center = size // 2
-        wheel_radius = 120
-        draw.ellipse([center-wheel_radius, center-wheel_radius, 
-                     center+wheel_radius, center+wheel_radius], 
-                    fill='#8B4513', outline='#FFD700', width=4)
         
-        # Draw inner wheel
-        inner_radius = 100
-        draw.ellipse([center-inner_radius, center-inner_radius, 
-                     center+inner_radius, center+inner_radius], 
-                    fill='#2C5530', outline='#FFD700', width=2)
-        
-        # Draw numbers around wheel (simplified)
-        import math
-        for i in range(0, 37):
-            angle = (i * 360 / 37) * math.pi / 180
-            x = center + int((inner_radius - 20) * math.cos(angle))
-            y = center + int((inner_radius - 20) * math.sin(angle))
-            
-            # Highlight winning number
-            if i == winning_number:
-                draw.ellipse([x-12, y-12, x+12, y+12], fill='#FFD700')
-            
-            # Red or black numbers
-            red_numbers = [1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36]
-            color = '#FF0000' if i in red_numbers else '#000000' if i != 0 else '#00FF00'
-            
-            draw.text((x, y), str(i), fill='#FFFFFF' if i == winning_number else color, 
-                     font=font_medium, anchor="mm")
+        # Highlight the winning number; the next number was drawn over its highlight originally
+        self._draw_roulette_number(draw, winning_number, highlighted=True)
+        if winning_number < 36:
+            self._draw_roulette_number(draw, winning_number + 1, highlighted=False)
         
         # Draw ball on winning number
-        ball_angle = (winning_number * 360 / 37) * math.pi / 180
-        ball_x = center + int((inner_radius - 20) * math.cos(ball_angle))
-        ball_y = center + int((inner_radius - 20) * math.sin(ball_angle))
+        ball_x, ball_y = self._roulette_position(winning_number)
         draw.ellipse([ball_x-5, ball_y-5, ball_x+5, ball_y+5], fill='#FFFFFF')
         
-        # Draw center
-        draw.ellipse([center-15, center-15, center+15, center+15], fill='#FFD700')
-        
-        # Draw result text
-        draw.text((center, size-30), f"🎯 {winning_number}", fill='#FFD700', 
+        # Draw result text behind the pocket colour
+        self.sprites.paste(img, ROULETTE_COLOURS[roulette_colour(winning_number)], (center-16, size-20), 18)
+        draw.text((center+12, size-30), str(winning_number), fill='#FFD700',
                  font=font_large, anchor="mt")
-        draw.text((center, size-10), f"Bet: {prediction}", fill='#FFFFFF', 
+        draw.text((center, size-10), f"Bet: {prediction}", fill='#FFFFFF',
                  font=font_medium, anchor="mt")
         # Draw multiplier if > 1
         if multiplier > 1:
             draw.text((center, size-50), f"Multiplier: {multiplier}x", fill='#FFD700', font=font_medium, anchor="mt")
         
-        # Save to BytesIO
-        img_buffer = io.BytesIO()
-        img.save(img_buffer, format='PNG')
-        img_buffer.seek(0)
+        img_buffer = self.encoder.encode('roulette', img)
         self._notify("roulette", {
             "winning_number": winning_number,
             "prediction": prediction,
@@ -226,32 +345,29 @@ class CasinoImageGenerator:
     
     def create_coinflip_image(self, result: str, prediction: str, won: bool, multiplier: float = 1.0) -> io.BytesIO:
         """Create coinflip visualization"""
+        img_buffer = self._cached(
+            self._coinflip_key(result, prediction, won, multiplier),
+            lambda: self._render_coinflip(result, prediction, won, multiplier)
+        )
+        self._notify("coinflip", {
+            "result": result,
+            "prediction": prediction,
+            "won": won,
+            "multiplier": multiplier
+        })
+        return img_buffer
+    
+    def _render_coinflip(self, result: str, prediction: str, won: bool, multiplier: float) -> io.BytesIO:
         size = 300
-        img = Image.new('RGB', (size, size), color='#0F5132')
+        img = self._background('coinflip')
         draw = ImageDraw.Draw(img)
-        
-        try:
-            font_large = ImageFont.truetype("arial.ttf", 24)
-            font_medium = ImageFont.truetype("arial.ttf", 18)
-        except:
-            font_large = ImageFont.load_default()
-            font_medium = ImageFont.load_default()
-        
-        # Draw coin
+        font_large = get_font(24)
+        font_medium = get_font(18)
         center = size // 2
-        coin_radius = 80
-        coin_color = '#FFD700'
-        draw.ellipse([center-coin_radius, center-coin_radius, 
-                     center+coin_radius, center+coin_radius], 
-                    fill=coin_color, outline='#B8860B', width=5)
         
-        # Draw coin face
-        if result.lower() == 'heads':
-            # Draw a simple crown for heads
-            draw.text((center, center), "👑", font=font_large, anchor="mm")
-        else:
-            # Draw a simple symbol for tails
-            draw.text((center, center), "🦅", font=font_large, anchor="mm")
+        # Draw coin face: a crown for heads, an eagle for tails
+        face = 'heads' if result.lower() == 'heads' else 'tails'
+        self.sprites.paste(img, COIN_FACES[face], (center, center), 96)
         
         # Draw result text
         result_text = f"🎉 {result.upper()}! 🎉" if won else f"{result.upper()}"
@@ -259,85 +375,24 @@ class CasinoImageGenerator:
         draw.text((center, 50), result_text, fill=result_color, font=font_large, anchor="mt")
         
         # Draw prediction
-        draw.text((center, size-50), f"You predicted: {prediction.upper()}", 
+        draw.text((center, size-50), f"You predicted: {prediction.upper()}",
                  fill='#FFFFFF', font=font_medium, anchor="mt")
         
         # Draw outcome
         outcome_text = "YOU WIN!" if won else "YOU LOSE!"
         outcome_color = '#00FF00' if won else '#FF6B6B'
-        draw.text((center, size-20), outcome_text, fill=outcome_color, 
+        draw.text((center, size-20), outcome_text, fill=outcome_color,
                  font=font_large, anchor="mt")
         # Draw multiplier if > 1
         if multiplier > 1:
             draw.text((center, size-80), f"Multiplier: {multiplier}x", fill='#FFD700', font=font_medium, anchor="mt")
         
-        # Save to BytesIO
-        img_buffer = io.BytesIO()
-        img.save(img_buffer, format='PNG')
-        img_buffer.seek(0)
-        self._notify("coinflip", {
-            "result": result,
-            "prediction": prediction,
-            "won": won,
-            "multiplier": multiplier
-        })
+        img_buffer = self.encoder.encode('coinflip', img)
         return img_buffer
     
     def create_crash_graph(self, current_multiplier: float, crashed: bool = False, win_multiplier: float = 1.0) -> io.BytesIO:
         """Create crash game multiplier graph"""
-        width, height = 400, 300
-        img = Image.new('RGB', (width, height), color='#1a1a1a')
-        draw = ImageDraw.Draw(img)
-        
-        try:
-            font_large = ImageFont.truetype("arial.ttf", 24)
-            font_medium = ImageFont.truetype("arial.ttf", 16)
-        except:
-            font_large = ImageFont.load_default()
-            font_medium = ImageFont.load_default()
-        
-        # Draw title
-        title = "💥 CRASHED!" if crashed else "🚀 CRASH GAME"
-        title_color = '#FF0000' if crashed else '#00FF00'
-        draw.text((width//2, 20), title, fill=title_color, font=font_large, anchor="mt")
-        
-        # Draw graph background
-        graph_left, graph_top = 50, 60
-        graph_right, graph_bottom = width-50, height-60
-        draw.rectangle([graph_left, graph_top, graph_right, graph_bottom], 
-                      outline='#333333', width=2)
-        
-        # Draw multiplier curve (simplified)
-        points = []
-        max_x = 100
-        for x in range(0, min(int(current_multiplier * 20), max_x)):
-            # Exponential curve
-            y = graph_bottom - (x * 2)
-            points.append((graph_left + x * 3, y))
-        
-        if len(points) > 1:
-            # Draw curve
-            for i in range(len(points)-1):
-                draw.line([points[i], points[i+1]], fill='#00FF00', width=3)
-        
-        # Draw current multiplier
-        multiplier_text = f"{current_multiplier:.2f}x"
-        draw.text((width//2, height//2), multiplier_text, 
-                 fill='#FFFFFF', font=font_large, anchor="mm")
-        
-        # Draw status
-        status = "CRASHED!" if crashed else "Flying..."
-        status_color = '#FF0000' if crashed else '#00FF00'
-        draw.text((width//2, height-30), status, fill=status_color, 
-                 font=font_medium, anchor="mt")
-        # Draw win multiplier if > 1
-        if win_multiplier > 1:
-            draw.text((width//2, height-55), f"Multiplier: {win_multiplier}x", fill='#FFD700', font=font_medium, anchor="mt")
-        
-        # Save to BytesIO
-        img_buffer = io.BytesIO()
-        img.save(img_buffer, format='PNG')
-        img_buffer.seek(0)
+        img_buffer = CrashGraph(self).update(current_multiplier, crashed, win_multiplier)
         self._notify("crash", {
             "current_multiplier": current_multiplier,
             "crashed": crashed,
@@ -348,50 +403,133 @@ class CasinoImageGenerator:
     def create_mining_result(self, material: str, rarity: str, reward: int) -> io.BytesIO:
         """Create mining result visualization"""
         width, height = 350, 250
-        img = Image.new('RGB', (width, height), color='#654321')
+        img = self._background('mining')
         draw = ImageDraw.Draw(img)
-        
-        try:
-            font_large = ImageFont.truetype("arial.ttf", 20)
-            font_medium = ImageFont.truetype("arial.ttf", 16)
-        except:
-            font_large = ImageFont.load_default()
-            font_medium = ImageFont.load_default()
-        
-        # Draw mine background
-        draw.rectangle([20, 20, width-20, height-20], fill='#2F1B14', outline='#8B4513', width=3)
-        
-        # Draw title
-        draw.text((width//2, 35), "⛏️ MINING RESULT ⛏️", fill='#FFD700', 
-                 font=font_large, anchor="mt")
+        font_medium = get_font(16)
         
         # Draw material found
-        material_size = 60
         material_y = height//2 - 20
-        draw.text((width//2, material_y), material, font=font_large, anchor="mm")
+        self.sprites.paste(img, material, (width//2, material_y), 56)
         
         # Draw rarity
         rarity_colors = {
             'common': '#CCCCCC',
-            'uncommon': '#00FF00', 
+            'uncommon': '#00FF00',
             'rare': '#0080FF',
             'legendary': '#FF8000'
         }
         rarity_color = rarity_colors.get(rarity.lower(), '#FFFFFF')
-        draw.text((width//2, material_y + 40), rarity.upper(), 
+        draw.text((width//2, material_y + 40), rarity.upper(),
                  fill=rarity_color, font=font_medium, anchor="mt")
         
         # Draw value
-        draw.text((width//2, height-40), f"Value: {reward:,} coins", 
+        draw.text((width//2, height-40), f"Value: {reward:,} coins",
                  fill='#FFD700', font=font_medium, anchor="mt")
         
-        # Save to BytesIO
-        img_buffer = io.BytesIO()
-        img.save(img_buffer, format='PNG')
-        img_buffer.seek(0)
+        img_buffer = self.encoder.encode('mining', img)
         self._notify("mining", {
             "material": material,
             "rarity": rarity,
             "reward": reward
         })
-        return img_buffer
\ No newline at end of file
+        return img_buffer
+
+class CrashGraph:
+    """Multiplier graph of one crash round, drawn incrementally
+    
+    The curve lives on a canvas kept for the whole round; each update draws
+    only the segments added since the last one, so a round costs O(n) line
+    draws instead of O(n^2). Every multiplier shown is recorded so the round
+    can be replayed as an animated GIF or APNG once it ends.
+    """
+    
+    WIDTH, HEIGHT = 400, 300
+    GRAPH_LEFT, GRAPH_BOTTOM = 50, 240
+    MAX_POINTS = 100
+    
+    def __init__(self, generator: CasinoImageGenerator):
+        self.generator = generator
+        self.history: List[float] = []
+        self._lock = threading.Lock()
+        self._canvas = generator._background('crash', False)
+        self._draw = ImageDraw.Draw(self._canvas)
+        self._points = 0
+    
+    @classmethod
+    def _point(cls, x: int) -> Tuple[int, int]:
+        return cls.GRAPH_LEFT + x * 3, cls.GRAPH_BOTTOM - x * 2
+    
+    @classmethod
+    def _point_count(cls, multiplier: float) -> int:
+        return min(int(multiplier * 20), cls.MAX_POINTS)
+    
+    @classmethod
+    def _draw_segments(cls, draw: ImageDraw, start: int, end: int):
+        """Curve segments ending at points start..end-1"""
+        for x in range(max(start, 1), end):
+            draw.line([cls._point(x - 1), cls._point(x)], fill='#00FF00', width=3)
+    
+    def _advance(self, multiplier: float):
+        count = self._point_count(multiplier)
+        if count > self._points:
+            self._draw_segments(self._draw, self._points, count)
+            self._points = count
+    
+    def _frame(self, multiplier: float, crashed: bool, win_multiplier: float) -> Image.Image:
+        if crashed:
+            # Titles differ once crashed, so the curve is drawn once more on that layer
+            img = self.generator._background('crash', True)
+            draw = ImageDraw.Draw(img)
+            self._draw_segments(draw, 0, self._points)
+        else:
+            img = self._canvas.copy()
+            draw = ImageDraw.Draw(img)
+        
+        # Draw current multiplier
+        draw.text((self.WIDTH//2, self.HEIGHT//2), f"{multiplier:.2f}x",
+                 fill='#FFFFFF', font=get_font(24), anchor="mm")
+        # Draw win multiplier if > 1
+        if win_multiplier > 1:
+            draw.text((self.WIDTH//2, self.HEIGHT-55), f"Multiplier: {win_multiplier}x", fill='#FFD700', font=get_font(16), anchor="mt")
+        return img
+    
+    def update(self, multiplier: float, crashed: bool = False, win_multiplier: float = 1.0) -> io.BytesIO:
+        """Extend the curve to `multiplier` and return the encoded graph"""
+        with self._lock:
+            self._advance(multiplier)
+            self.history.append(multiplier)
+            img = self._frame(multiplier, crashed, win_multiplier)
+        return self.generator.encoder.encode('crash', img)
+    
+    def animation(self, crashed: bool = False, win_multiplier: float = 1.0, format: str = 'GIF') -> io.BytesIO:
+        """The whole round as an animated GIF (or APNG with format='PNG'), ending on its result"""
+        with self._lock:
+            history = list(self.history)
+        if not history:
+            history = [1.0]
+        # Replay on a fresh graph, sampling long rounds down to CRASH_ANIMATION_FRAMES
+        step = max(1, math.ceil(len(history) / Config.CRASH_ANIMATION_FRAMES))
+        sampled = history[::step]
+        if sampled[-1] != history[-1]:
+            sampled.append(history[-1])
+        replay = CrashGraph(self.generator)
+        frames = []
+        for multiplier in sampled[:-1]:
+            replay._advance(multiplier)
+            frames.append(replay._frame(multiplier, False, 1.0))
+        replay._advance(sampled[-1])
+        frames.append(replay._frame(sampled[-1], crashed, win_multiplier))
+        durations = [Config.CRASH_FRAME_MS] * (len(frames) - 1) + [Config.CRASH_FINAL_FRAME_MS]
+        if format == 'GIF':
+            # One palette from the first and last frames, instead of quantising every frame on its own
+            sample = Image.new('RGB', (self.WIDTH * 2, self.HEIGHT))
+            sample.paste(frames[0], (0, 0))
+            sample.paste(frames[-1], (self.WIDTH, 0))
+            palette = sample.quantize(256, method=Image.Quantize.FASTOCTREE)
+            frames = [frame.quantize(palette=palette, dither=Image.Dither.NONE) for frame in frames]
+        
+        img_buffer = io.BytesIO()
+        frames[0].save(img_buffer, format=format, save_all=True, append_images=frames[1:],
+                       duration=durations, loop=0)
+        img_buffer.seek(0)
+        return img_buffer
@@ -0,0 +1,217 @@
+import heapq
+import time
+from itertools import islice
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sortedcontainers import SortedList
+
+# Categories supported by /leaderboard, in the order scores are stored
+CATEGORIES = ('balance', 'crypto', 'level', 'games_won')
+
+Scores = Tuple[int, ...]
+
+def user_scores(user, decode: bool = True) -> Scores:
+    """Leaderboard values of a user, one per entry in CATEGORIES
+
+    Without `decode`, games_won is None while the stats section is still the
+    JSON text it was loaded as: it has not changed since load, and decoding it
+    just to compare would also make every flush re-encode it.
+    """
+    if not decode and not user.is_decoded('stats'):
+        games_won = None
+    else:
+        games_won = (user.peek_section('stats') or {}).get('games_won', 0)
+    return (user.balance, user.crypto_balance, user.level, games_won)
+
+class LeaderboardIndex:
+    """Per-guild rankings for every leaderboard category, kept sorted incrementally
+
+    Each (guild, category) ranking is a SortedList of (-value, user_id) keys, so
+    the best entry comes first and ties are broken by user id. Updating a user
+    is O(log n) per category and reading the top k is O(log n + k).
+    A guild has to be loaded once (see DataManager.get_leaderboard) before it
+    is tracked; updates for guilds that are not loaded are ignored.
+    """
+
+    def __init__(self):
+        self._rankings: Dict[Tuple[int, str], SortedList] = {}
+        self._scores: Dict[int, Dict[int, Scores]] = {}
+
+    def has_guild(self, guild_id: int) -> bool:
+        return guild_id in self._scores
+
+    def load_guild(self, guild_id: int, entries: Iterable[Tuple[int, Scores]]):
+        """Build the rankings of a guild from (user_id, scores) pairs"""
+        scores = dict(entries)
+        self._scores[guild_id] = scores
+        for i, category in enumerate(CATEGORIES):
+            self._rankings[(guild_id, category)] = SortedList(
+                (-values[i], user_id) for user_id, values in scores.items()
+            )
+
+    def drop_guild(self, guild_id: int):
+        self._scores.pop(guild_id, None)
+        for category in CATEGORIES:
+            self._rankings.pop((guild_id, category), None)
+
+    def update(self, guild_id: int, user_id: int, values: Scores):
+        """Move a user to their new position in every category of a loaded guild"""
+        scores = self._scores.get(guild_id)
+        if scores is None:
+            return
+        old = scores.get(user_id)
+        if old == values:
+            return
+        scores[user_id] = values
+        for i, category in enumerate(CATEGORIES):
+            if old is not None and old[i] == values[i]:
+                continue
+            ranking = self._rankings[(guild_id, category)]
+            if old is not None:
+                ranking.remove((-old[i], user_id))
+            ranking.add((-values[i], user_id))
+
+    def update_user(self, user):
+        scores = self._scores.get(user.guild_id)
+        if scores is None:
+            return
+        old = scores.get(user.user_id)
+        values = user_scores(user, decode=old is None)
+        if old is not None:
+            # A value left encoded is the one already indexed
+            values = tuple(old[i] if value is None else value for i, value in enumerate(values))
+        self.update(user.guild_id, user.user_id, values)
+
+    def top(self, guild_id: int, category: str, limit: int) -> List[Dict]:
+        """Best `limit` users of a guild as [{'user_id', 'value'}]"""
+        ranking = self._rankings.get((guild_id, category))
+        if ranking is None:
+            return []
+        return [
+            {'user_id': user_id, 'value': -negated}
+            for negated, user_id in islice(ranking, limit)
+        ]
+
+    def rank(self, guild_id: int, category: str, user_id: int, neighbours: int = 1) -> Optional[Dict]:
+        """Position of a user in a guild ranking, in O(log n + neighbours)
+
+        Returns rank (1 = best), total, percentile (share of the guild ranked
+        below the user), value, and the entries just above and below, or None
+        if the user is not ranked.
+        """
+        ranking = self._rankings.get((guild_id, category))
+        values = self._scores.get(guild_id, {}).get(user_id)
+        if ranking is None or values is None:
+            return None
+        value = values[CATEGORIES.index(category)]
+        position = ranking.index((-value, user_id))
+        total = len(ranking)
+
+        def entry(i: int) -> Dict:
+            negated, other_id = ranking[i]
+            return {'rank': i + 1, 'user_id': other_id, 'value': -negated}
+
+        return {
+            'rank': position + 1,
+            'total': total,
+            'percentile': (total - position - 1) / total * 100,
+            'value': value,
+            'above': [entry(i) for i in range(max(0, position - neighbours), position)],
+            'below': [entry(i) for i in range(position + 1, min(total, position + 1 + neighbours))],
+        }
+
+class GlobalLeaderboard:
+    """Cross-guild leaderboard merged from cached per-guild top lists
+
+    Every guild contributes its top `depth` entries per category. A guild's
+    list is only refetched after the guild has been marked stale, and the
+    merged result is served from cache for `ttl` seconds. A refresh then costs
+    one fetch per changed guild plus an O(G + depth log G) heap merge, no matter
+    how many users there are. A user update only marks its guild stale when it
+    can change the guild's list: the user is on it, the list is short, or the
+    new value reaches the last entry.
+    """
+
+    def __init__(self, ttl: float, depth: int):
+        self.ttl = ttl
+        self.depth = depth
+        self._guild_ids: Set[int] = set()
+        self._tops: Dict[str, Dict[int, List[Dict]]] = {category: {} for category in CATEGORIES}
+        self._members: Dict[str, Dict[int, Set[int]]] = {category: {} for category in CATEGORIES}
+        self._stale: Dict[str, Set[int]] = {category: set() for category in CATEGORIES}
+        self._merged: Dict[str, Tuple[float, List[Dict]]] = {}
+
+    def add_guilds(self, guild_ids: Iterable[int]):
+        """Include new guilds; guilds already known are left as they are"""
+        for guild_id in guild_ids:
+            if guild_id not in self._guild_ids:
+                self.mark_stale(guild_id)
+
+    def mark_stale(self, guild_id: int):
+        """Refetch this guild's top lists on the next refresh"""
+        self._guild_ids.add(guild_id)
+        for stale in self._stale.values():
+            stale.add(guild_id)
+
+    def update(self, guild_id: int, user_id: int, values: Scores):
+        """Mark the categories whose cached list of this guild a new score can change
+
+        A None value is unchanged since it was stored and is skipped.
+        """
+        if guild_id not in self._guild_ids:
+            self.mark_stale(guild_id)
+            return
+        for i, category in enumerate(CATEGORIES):
+            if values[i] is None:
+                continue
+            top = self._tops[category].get(guild_id)
+            if (top is None or len(top) < self.depth or values[i] >= top[-1]['value']
+                    or user_id in self._members[category][guild_id]):
+                self._stale[category].add(guild_id)
+
+    def update_user(self, user):
+        if user.guild_id not in self._guild_ids:
+            self.mark_stale(user.guild_id)
+            return
+        self.update(user.guild_id, user.user_id, user_scores(user, decode=False))
+
+    async def top(self, category: str, limit: int,
+                  fetch: Callable[[int, str, int], Awaitable[List[Dict]]]) -> List[Dict]:
+        """Best `limit` users across all guilds as [{'user_id', 'guild_id', 'value'}]
+
+        `fetch(guild_id, category, depth)` is a coroutine returning a guild's
+        top list, best first. A user ranked in several guilds is listed once,
+        with their best entry.
+        """
+        cached = self._merged.get(category)
+        if cached is None or time.monotonic() - cached[0] > self.ttl:
+            cached = self._merged[category] = (time.monotonic(), await self._refresh(category, fetch))
+        return cached[1][:limit]
+
+    async def _refresh(self, category: str, fetch: Callable[[int, str, int], Awaitable[List[Dict]]]) -> List[Dict]:
+        tops = self._tops[category]
+        stale = self._stale[category]
+        # Guilds marked stale while a fetch is awaited stay in `stale` for the next refresh
+        pending = list(stale)
+        stale.difference_update(pending)
+        for i, guild_id in enumerate(pending):
+            try:
+                entries = await fetch(guild_id, category, self.depth)
+            except BaseException:
+                stale.update(pending[i:])
+                raise
+            tops[guild_id] = [
+                {'user_id': entry['user_id'], 'guild_id': guild_id, 'value': entry['value']}
+                for entry in entries
+            ]
+            self._members[category][guild_id] = {entry['user_id'] for entry in entries}
+
+        merged = []
+        seen = set()
+        for entry in heapq.merge(*tops.values(), key=lambda entry: -entry['value']):
+            if entry['user_id'] in seen:
+                continue
+            seen.add(entry['user_id'])
+            merged.append(entry)
+            if len(merged) == self.depth:
+                break
+        return merged
@@ -0,0 +1,38 @@
+import asyncio
+import weakref
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Tuple
+
+class UserLockManager:
+    """Per-user asyncio locks keyed by (guild_id, user_id)
+
+    Locks live in a WeakValueDictionary, so a lock only exists while some
+    coroutine holds or waits on it and memory stays proportional to the users
+    currently being mutated, not to every user ever seen.
+    """
+
+    def __init__(self):
+        self._locks: 'weakref.WeakValueDictionary[Tuple[int, int], asyncio.Lock]' = weakref.WeakValueDictionary()
+
+    def get(self, guild_id: int, user_id: int) -> asyncio.Lock:
+        key = (guild_id, user_id)
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        return lock
+
+    @asynccontextmanager
+    async def hold(self, guild_id: int, *user_ids: int):
+        """Hold the locks of one or more users of a guild.
+
+        Locks are always taken in ascending user id order, so two handlers
+        locking the same users can never deadlock each other.
+        """
+        locks = [self.get(guild_id, user_id) for user_id in sorted(set(user_ids))]
+        async with AsyncExitStack() as stack:
+            for lock in locks:
+                await stack.enter_async_context(lock)
+            yield
+
+    def __len__(self) -> int:
+        return len(self._locks)
@@ -0,0 +1,129 @@
+import asyncio
+import io
+import logging
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, Optional, Tuple
+from modules.imagegenerator import CasinoImageGenerator
+
+class RenderQueueFull(Exception):
+    """Raised when too many renders are already pending"""
+    pass
+
+# --- Worker process side ---
+
+_worker_generator: Optional[CasinoImageGenerator] = None
+
+def _init_worker():
+    global _worker_generator
+    # Pre-renders the static layers once per worker process
+    _worker_generator = CasinoImageGenerator()
+
+def _render(method: str, args: tuple) -> Tuple[bytes, List[Tuple[str, dict]], Dict[str, dict]]:
+    """Run one create_* method, returning the encoded image, the events it notified and the encoder's choices"""
+    events = []
+    _worker_generator.set_callback(lambda game_type, info: events.append((game_type, info)))
+    data = getattr(_worker_generator, method)(*args).getvalue()
+    return data, events, _worker_generator.encoder.choices
+
+# --- Event loop side ---
+
+class RenderService:
+    """Renders CasinoImageGenerator images in a pool of worker processes
+
+    `render` is awaitable and returns the encoded image. Outcomes cached by the
+    local generator are served without a round trip to the pool. At most
+    `max_pending` renders are queued or running; beyond that `render` raises
+    RenderQueueFull right away instead of letting an interaction miss its
+    deadline. Events notified inside a worker are replayed on the local
+    generator's callback.
+    """
+
+    def __init__(self, generator: CasinoImageGenerator, workers: int, max_pending: int):
+        self.generator = generator
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rendered = 0
+        self._latencies = deque(maxlen=256)
+        self._executor = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Forking a process that runs the event loop and database threads copies
+            # their locks mid-use; workers start from a clean interpreter instead
+            method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(method),
+                initializer=_init_worker
+            )
+        return self._executor
+
+    async def render(self, method: str, *args) -> io.BytesIO:
+        """Encoded image of generator.<method>(*args)"""
+        key = self.generator.outcome_key(method, args)
+        if key is not None and key in self.generator.outcome_cache:
+            # A cache hit never touches Pillow, and notifies as usual
+            return getattr(self.generator, method)(*args)
+        data, events, choices = await self._submit(method, args)
+        self.generator.encoder.choices.update(choices)
+        if key is not None:
+            self.generator.outcome_cache.put(key, data)
+        for game_type, info in events:
+            self.generator._notify(game_type, info)
+        return io.BytesIO(data)
+
+    async def warm(self, outcomes: Iterable[Tuple[str, tuple]]):
+        """Render uncached outcomes ahead of time, never filling more than half the queue"""
+        batch = []
+        for method, args in outcomes:
+            key = self.generator.outcome_key(method, args)
+            if key is None or key in self.generator.outcome_cache:
+                continue
+            batch.append((key, method, args))
+        chunk = max(1, self.max_pending // 2)
+        for i in range(0, len(batch), chunk):
+            jobs = batch[i:i+chunk]
+            results = await asyncio.gather(
+                *(self._submit(method, args) for _, method, args in jobs), return_exceptions=True
+            )
+            for (key, _, _), result in zip(jobs, results):
+                if not isinstance(result, BaseException):
+                    self.generator.outcome_cache.put(key, result[0])
+
+    async def _submit(self, method: str, args: tuple):
+        if self.pending >= self.max_pending:
+            raise RenderQueueFull(f"{self.pending} renders pending")
+        self.pending += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool(), _render, method, args)
+        except BrokenProcessPool:
+            logging.error("Render worker died, restarting the pool")
+            self._executor = None
+            raise
+        finally:
+            self.pending -= 1
+            self.rendered += 1
+            self._latencies.append(time.perf_counter() - started)
+
+    def stats(self) -> Dict[str, float]:
+        """Queue depth and render latency over the last renders, in milliseconds"""
+        latencies = sorted(self._latencies)
+        return {
+            'queue_depth': self.pending,
+            'rendered': self.rendered,
+            'cache_hits': self.generator.outcome_cache.hits,
+            'latency_avg_ms': sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+            'latency_p95_ms': latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+            'encodings': {kind: choice['encoding'] for kind, choice in self.generator.encoder.choices.items()},
+        }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,133 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+from PIL import Image
+
+ITEM_HEIGHT = 180  # pixels per symbol on the reel strip
+SPEED = 6  # pixels a reel moves per frame, per stop
+FRAME_MS = 50
+CROP_CACHE_SIZE = 256  # reel windows kept per SlotGif
+REEL_LEFT, REEL_TOP = 25, 100  # where the first reel sits under the facade
+
+def _flatten(img: Image.Image) -> Image.Image:
+    """RGBA over white, as RGB"""
+    base = Image.new('RGB', img.size, (255, 255, 255))
+    base.paste(img, mask=img.getchannel('A'))
+    return base
+
+class SlotGif:
+    """Animated spin GIF of the legacy !slots machine, rendered in memory
+
+    slot-face.png and slot-reel.png are loaded by `load` (call it off the
+    event loop before first use) and converted once to palette images sharing
+    one 256-colour palette, so frames are built by copying palette indices: no
+    per-frame compositing or quantising. Each frame pastes a cached window crop
+    of the reel for every column, then the facade through its (thresholded)
+    alpha mask. Frames that would repeat the previous one are merged into a
+    longer duration.
+    """
+
+    def __init__(self, assets_path: str):
+        self.assets_path = assets_path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._crops: 'OrderedDict[Tuple[int, int], Image.Image]' = OrderedDict()
+        self._crops_lock = threading.Lock()
+
+    def load(self):
+        """Load and convert the assets; does nothing once loaded"""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            facade = Image.open(os.path.join(self.assets_path, 'slot-face.png')).convert('RGBA')
+            reel = Image.open(os.path.join(self.assets_path, 'slot-reel.png')).convert('RGBA')
+            facade_rgb = _flatten(facade)
+            reel_rgb = _flatten(reel)
+
+            # One palette for every frame, taken from everything a frame can show
+            sample = Image.new('RGB', (max(facade.width, reel.width), facade.height + reel.height), (255, 255, 255))
+            sample.paste(facade_rgb, (0, 0))
+            sample.paste(reel_rgb, (0, facade.height))
+            self.palette = sample.quantize(colors=256, method=Image.Quantize.MEDIANCUT)
+
+            self.size = facade.size
+            self.reel_width, self.reel_height = reel.size
+            self.items = self.reel_height // ITEM_HEIGHT
+            self._reel = self._quantize(reel_rgb)
+            self._facade = self._quantize(facade_rgb)
+            self._facade_mask = facade.getchannel('A').point(lambda a: 255 if a >= 128 else 0, '1')
+            self._blank = self._quantize(Image.new('RGB', self.size, (255, 255, 255)))
+            self._loaded = True
+
+    def _quantize(self, img: Image.Image) -> Image.Image:
+        return img.quantize(palette=self.palette, dither=Image.Dither.NONE)
+
+    @property
+    def symbol_count(self) -> int:
+        """Symbols on the reel strip"""
+        self.load()
+        return self.items
+
+    def _window(self, offset: int) -> Optional[Tuple[int, int]]:
+        """Reel rows visible when a reel is scrolled by `offset`, or None if none are"""
+        top = max(0, offset - REEL_TOP)
+        bottom = min(self.reel_height, offset - REEL_TOP + self.size[1])
+        return (top, bottom) if bottom > top else None
+
+    def _crop(self, top: int, bottom: int) -> Image.Image:
+        key = (top, bottom)
+        with self._crops_lock:
+            crop = self._crops.get(key)
+            if crop is not None:
+                self._crops.move_to_end(key)
+                return crop
+        crop = self._reel.crop((0, top, self.reel_width, bottom))
+        with self._crops_lock:
+            self._crops[key] = crop
+            if len(self._crops) > CROP_CACHE_SIZE:
+                self._crops.popitem(last=False)
+        return crop
+
+    def _frame(self, offsets: Sequence[int]) -> Image.Image:
+        frame = self._blank.copy()
+        for column, offset in enumerate(offsets):
+            window = self._window(offset)
+            if window is None:
+                continue
+            top, bottom = window
+            frame.paste(self._crop(top, bottom), (REEL_LEFT + self.reel_width * column, REEL_TOP - offset + top))
+        frame.paste(self._facade, (0, 0), self._facade_mask)
+        return frame
+
+    def render(self, stops: Sequence[int], dedupe: bool = True) -> io.BytesIO:
+        """GIF of the reels spinning onto `stops` (one symbol index per reel)"""
+        self.load()
+        frames: List[Image.Image] = []
+        durations: List[int] = []
+        last_key = None
+        for i in range(1, ITEM_HEIGHT // SPEED + 1):
+            offsets = [SPEED * i * stop for stop in stops]
+            # A reel scrolled out of view looks the same at any offset
+            key = tuple(offset if self._window(offset) else None for offset in offsets)
+            if dedupe and key == last_key:
+                durations[-1] += FRAME_MS
+                continue
+            last_key = key
+            frames.append(self._frame(offsets))
+            durations.append(FRAME_MS)
+
+        buffer = io.BytesIO()
+        frames[0].save(
+            buffer,
+            format='GIF',
+            save_all=True,
+            append_images=frames[1:],
+            duration=durations,
+            optimize=False  # keep the shared palette as is
+        )
+        buffer.seek(0)
+        return buffer
@@ -0,0 +1,182 @@
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+from PIL import Image, ImageDraw, ImageFont
+from modules.fonts import get_font, resolve_font_path
+from modules.utils import SLOT_SYMBOLS, CARD_SUITS, CARD_RANKS, CARD_BACK, ROULETTE_COLOURS, MINING_MATERIALS
+
+CELL = 128  # side of one sprite in the atlas
+CARD_WIDTH, CARD_HEIGHT = 51, 71  # a 50x70 card plus its outline
+EMOJI_SIZE = 109  # the only pixel size NotoColorEmoji ships
+COIN_FACES = {'heads': '👑', 'tails': '🦅'}
+
+# Drawn instead of the emoji when no colour emoji font is installed:
+# (disc colour or None, label, label colour)
+FALLBACKS: Dict[str, Tuple[Optional[str], str, str]] = {
+    '🍒': ('#C62828', 'CH', '#FFFFFF'),
+    '🍋': ('#FBC02D', 'LE', '#000000'),
+    '🍊': ('#EF6C00', 'OR', '#FFFFFF'),
+    '🍇': ('#6A1B9A', 'GR', '#FFFFFF'),
+    '🔔': ('#FFB300', 'BELL', '#000000'),
+    '💎': ('#29B6F6', 'GEM', '#FFFFFF'),
+    '7️⃣': ('#1565C0', '7', '#FFFFFF'),
+    '♠️': (None, '♠', '#000000'),
+    '♥️': (None, '♥', '#D50000'),
+    '♦️': (None, '♦', '#D50000'),
+    '♣️': (None, '♣', '#000000'),
+    '🂠': ('#B71C1C', '?', '#FFFFFF'),
+    '🏆': ('#FFC107', 'CUP', '#000000'),
+    '⭐': (None, '★', '#FFD700'),
+    '🥈': ('#B0BEC5', '2', '#000000'),
+    '🔶': (None, '◆', '#FF9800'),
+    '💰': ('#8D6E63', '$', '#FFD700'),
+    '🪨': ('#757575', 'ROCK', '#FFFFFF'),
+    '⚫': ('#000000', '', '#FFFFFF'),
+    '🤎': ('#6D4C41', '', '#FFFFFF'),
+    '🔴': ('#D50000', '', '#FFFFFF'),
+    '🟢': ('#00C853', '', '#FFFFFF'),
+    '👑': (None, 'H', '#8B4513'),
+    '🦅': (None, 'T', '#8B4513'),
+}
+
+def atlas_symbols() -> Iterable[str]:
+    """Every symbol the image generator draws as a sprite"""
+    yield from SLOT_SYMBOLS
+    yield from CARD_SUITS
+    yield CARD_BACK
+    for materials in MINING_MATERIALS.values():
+        yield from materials
+    yield from ROULETTE_COLOURS.values()
+    yield from COIN_FACES.values()
+
+def _emoji_font() -> Optional[ImageFont.FreeTypeFont]:
+    if resolve_font_path('emoji') is None:
+        return None
+    return get_font(EMOJI_SIZE, 'emoji')
+
+class EmojiAtlas:
+    """Emoji rasterised once into a single RGBA sheet and pasted as sprites
+
+    Fonts that cannot draw emoji render them as tofu, and those that can are
+    slow at it, so each symbol is drawn once with the colour emoji font (or a
+    plain badge when none is installed) into a CELL x CELL slot of `sheet`.
+    Scaled crops of the sheet are cached per (symbol, size) and composited
+    with Image.paste. Symbols outside the atlas are rasterised on first use.
+    """
+
+    COLUMNS = 8
+
+    def __init__(self, symbols: Iterable[str]):
+        self._font = _emoji_font()
+        self._lock = threading.Lock()
+        self._sprites: Dict[Tuple[str, int], Image.Image] = {}
+        self._extra: Dict[str, Image.Image] = {}
+        self.boxes: Dict[str, Tuple[int, int, int, int]] = {}
+        unique = list(dict.fromkeys(symbols))
+        rows = max(1, -(-len(unique) // self.COLUMNS))
+        self.sheet = Image.new('RGBA', (self.COLUMNS * CELL, rows * CELL), (0, 0, 0, 0))
+        for i, symbol in enumerate(unique):
+            x, y = (i % self.COLUMNS) * CELL, (i // self.COLUMNS) * CELL
+            self.sheet.paste(self._rasterise(symbol), (x, y))
+            self.boxes[symbol] = (x, y, x + CELL, y + CELL)
+
+    def _rasterise(self, symbol: str) -> Image.Image:
+        """One CELL x CELL sprite of a symbol"""
+        cell = Image.new('RGBA', (CELL, CELL), (0, 0, 0, 0))
+        if self._font is not None:
+            # Colour glyphs are wider than EMOJI_SIZE, so draw on a larger scratch and fit the result
+            scratch = Image.new('RGBA', (CELL * 2, CELL * 2), (0, 0, 0, 0))
+            ImageDraw.Draw(scratch).text((CELL, CELL), symbol, font=self._font,
+                                         anchor="mm", embedded_color=True)
+            bbox = scratch.getbbox()
+            if bbox is not None:
+                glyph = scratch.crop(bbox)
+                glyph.thumbnail((CELL, CELL), Image.LANCZOS)
+                cell.paste(glyph, ((CELL - glyph.width) // 2, (CELL - glyph.height) // 2))
+                return cell
+        disc, label, label_color = FALLBACKS.get(symbol, ('#555555', '?', '#FFFFFF'))
+        draw = ImageDraw.Draw(cell)
+        if disc is not None:
+            draw.ellipse([8, 8, CELL - 8, CELL - 8], fill=disc, outline='#FFFFFF', width=4)
+        if label:
+            font = get_font(CELL * 3 // 4 if disc is None else CELL // 2 if len(label) <= 2 else CELL // 4)
+            draw.text((CELL // 2, CELL // 2), label, fill=label_color, font=font, anchor="mm")
+        return cell
+
+    def sprite(self, symbol: str, size: int) -> Image.Image:
+        """A symbol scaled to size x size"""
+        key = (symbol, size)
+        with self._lock:
+            sprite = self._sprites.get(key)
+            if sprite is None:
+                box = self.boxes.get(symbol)
+                if box is not None:
+                    source = self.sheet.crop(box)
+                else:
+                    if symbol not in self._extra:
+                        self._extra[symbol] = self._rasterise(symbol)
+                    source = self._extra[symbol]
+                sprite = source if size == CELL else source.resize((size, size), Image.LANCZOS)
+                self._sprites[key] = sprite
+            return sprite
+
+    def paste(self, img: Image.Image, symbol: str, center: Tuple[int, int], size: int):
+        """Composite a symbol onto `img`, centred on `center`"""
+        sprite = self.sprite(symbol, size)
+        img.paste(sprite, (center[0] - size // 2, center[1] - size // 2), sprite)
+
+@lru_cache(maxsize=None)
+def get_atlas() -> EmojiAtlas:
+    """Process-wide atlas of every symbol in atlas_symbols()"""
+    return EmojiAtlas(atlas_symbols())
+
+class CardSheet:
+    """All 52 cards and the card back, drawn once onto one sheet
+
+    Cards are named as generate_cards names them ('10♥️'); `cards` holds a
+    crop of the sheet per name. Names outside the deck are drawn on first use.
+    """
+
+    def __init__(self, atlas: EmojiAtlas):
+        self.atlas = atlas
+        names = [f"{rank}{suit}" for suit in CARD_SUITS for rank in CARD_RANKS] + [CARD_BACK]
+        columns = len(CARD_RANKS)
+        rows = -(-len(names) // columns)
+        self.sheet = Image.new('RGB', (columns * CARD_WIDTH, rows * CARD_HEIGHT))
+        self.cards: Dict[str, Image.Image] = {}
+        for i, name in enumerate(names):
+            x, y = (i % columns) * CARD_WIDTH, (i // columns) * CARD_HEIGHT
+            self._draw_card(self.sheet, name, x, y)
+            self.cards[name] = self.sheet.crop((x, y, x + CARD_WIDTH, y + CARD_HEIGHT))
+
+    def _draw_card(self, img: Image.Image, name: str, x: int, y: int):
+        draw = ImageDraw.Draw(img)
+        center = (x + CARD_WIDTH // 2, y + CARD_HEIGHT // 2)
+        if name == CARD_BACK:
+            # Face down
+            draw.rectangle([x, y, x + CARD_WIDTH - 1, y + CARD_HEIGHT - 1],
+                           fill='#1a1a1a', outline='#FFFFFF', width=2)
+            self.atlas.paste(img, CARD_BACK, center, 40)
+            return
+        suit = next((suit for suit in CARD_SUITS if name.endswith(suit)), '')
+        rank = name[:len(name) - len(suit)]
+        color = '#FF0000' if suit in ('♥️', '♦️') else '#000000'
+        draw.rectangle([x, y, x + CARD_WIDTH - 1, y + CARD_HEIGHT - 1],
+                       fill='#FFFFFF', outline='#000000', width=2)
+        draw.text((center[0], center[1] - 14), rank, fill=color, font=get_font(12), anchor="mm")
+        if suit:
+            self.atlas.paste(img, suit, (center[0], center[1] + 10), 24)
+
+    def card(self, name: str) -> Image.Image:
+        """Sprite of one card, or of the card back for CARD_BACK"""
+        sprite = self.cards.get(name)
+        if sprite is None:
+            sprite = Image.new('RGB', (CARD_WIDTH, CARD_HEIGHT))
+            self._draw_card(sprite, name, 0, 0)
+            self.cards[name] = sprite
+        return sprite
+
+@lru_cache(maxsize=None)
+def get_card_sheet() -> CardSheet:
+    """Process-wide card sheet, drawn with the shared emoji atlas"""
+    return CardSheet(get_atlas())
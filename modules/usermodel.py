@@ -7,6 +7,7 @@ from config import Config
 
 class UserModel:
     """User model wrapper for compatibility with existing code"""
+    __slots__ = ('_db_user', '_db_manager')
     
     def __init__(self, db_user: DBUser, db_manager: DataManager):
         self._db_user = db_user
@@ -56,116 +57,63 @@ class UserModel:
     
     @property
     def inventory(self) -> dict:
-        return self._db_user.inventory or {}
+        return self._db_user.inventory
     
     def add_item(self, item_id: str, amount: int = 1):
         """Add item to inventory"""
-        if not self._db_user.inventory:
-            self._db_user.inventory = {}
-        
-        if item_id in self._db_user.inventory:
-            self._db_user.inventory[item_id] += amount
-        else:
-            self._db_user.inventory[item_id] = amount
+        self._db_user.add_item(item_id, amount)
     
     def remove_item(self, item_id: str, amount: int = 1) -> bool:
         """Remove item from inventory, returns True if successful"""
-        if not self._db_user.inventory or item_id not in self._db_user.inventory:
-            return False
-        
-        if self._db_user.inventory[item_id] < amount:
-            return False
-        
-        self._db_user.inventory[item_id] -= amount
-        if self._db_user.inventory[item_id] <= 0:
-            del self._db_user.inventory[item_id]
-        
-        return True
+        return self._db_user.remove_item(item_id, amount)
     
     @property
     def mining_data(self) -> dict:
-        return self._db_user.mining or {}
+        return self._db_user.mining
     
     @property
     def mining_energy(self) -> int:
-        return self.mining_data.get('energy', 100)
+        return self._db_user.mining_energy
     
     @mining_energy.setter
     def mining_energy(self, value: int):
-        if not self._db_user.mining:
-            self._db_user.mining = {}
-        self._db_user.mining['energy'] = max(0, min(100, value))
+        self._db_user.mining_energy = value
     
     @property
     def stats(self) -> dict:
-        return self._db_user.stats or {}
+        return self._db_user.stats
     
     def update_stats(self, stat: str, value: int):
         """Update a specific stat"""
-        if not self._db_user.stats:
-            self._db_user.stats = {}
-        
-        if stat in self._db_user.stats:
-            self._db_user.stats[stat] += value
-        else:
-            self._db_user.stats[stat] = value
+        self._db_user.update_stats(stat, value)
     
     def is_on_cooldown(self, cooldown_type: str) -> bool:
         """Check if user is on cooldown for specific action"""
-        if not self._db_user.cooldowns:
-            return False
-        
-        if cooldown_type not in self._db_user.cooldowns:
-            return False
-        
-        last_used = datetime.fromisoformat(self._db_user.cooldowns[cooldown_type])
-        return datetime.now() < last_used
+        return self._db_user.is_on_cooldown(cooldown_type)
     
     def set_cooldown(self, cooldown_type: str, duration: timedelta):
         """Set cooldown for specific action"""
-        if not self._db_user.cooldowns:
-            self._db_user.cooldowns = {}
-        
-        self._db_user.cooldowns[cooldown_type] = (datetime.now() + duration).isoformat()
+        self._db_user.set_cooldown(cooldown_type, duration)
     
     def get_cooldown_remaining(self, cooldown_type: str) -> Optional[timedelta]:
         """Get remaining cooldown time"""
-        if not self.is_on_cooldown(cooldown_type):
-            return None
-        
-        last_used = datetime.fromisoformat(self._db_user.cooldowns[cooldown_type])
-        return last_used - datetime.now()
+        return self._db_user.get_cooldown_remaining(cooldown_type)
     
     def has_boost(self, boost_type: str) -> bool:
         """Check if user has active boost"""
-        if not self._db_user.boosts:
-            return False
-        
-        if boost_type not in self._db_user.boosts:
-            return False
-        
-        expires_at = datetime.fromisoformat(self._db_user.boosts[boost_type]['expires_at'])
-        return datetime.now() < expires_at
+        return self._db_user.has_boost(boost_type)
     
     def add_boost(self, boost_type: str, duration: timedelta, multiplier: float = 1.0):
         """Add boost to user"""
-        if not self._db_user.boosts:
-            self._db_user.boosts = {}
-        
-        self._db_user.boosts[boost_type] = {
-            'expires_at': (datetime.now() + duration).isoformat(),
-            'multiplier': multiplier
-        }
+        self._db_user.add_boost(boost_type, duration, multiplier)
     
     def get_boost_multiplier(self, boost_type: str) -> float:
         """Get boost multiplier if active"""
-        if not self.has_boost(boost_type):
-            return 1.0
-        
-        return self._db_user.boosts[boost_type]['multiplier']
+        return self._db_user.get_boost_multiplier(boost_type)
 
 class GuildModel:
     """Guild model wrapper for compatibility with existing code"""
+    __slots__ = ('_db_guild', '_db_manager')
     
     def __init__(self, db_guild: DBGuild, db_manager: DataManager):
         self._db_guild = db_guild
@@ -60,14 +60,15 @@ def create_game_embed(title: str, description: str = "") -> discord.Embed:
     """Create a game embed"""
     return create_embed(title, description, EmbedColors.GAME)
 
+CARD_SUITS = ['♠️', '♥️', '♦️', '♣️']
+CARD_RANKS = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
+CARD_BACK = '🂠'
+
 def generate_cards(num_cards: int = 1) -> List[Tuple[str, int]]:
     """Generate random playing cards"""
-    suits = ['♠️', '♥️', '♦️', '♣️']
-    ranks = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
-    
     deck = []
-    for suit in suits:
-        for i, rank in enumerate(ranks):
+    for suit in CARD_SUITS:
+        for i, rank in enumerate(CARD_RANKS):
             value = min(i + 1, 10) if rank != 'A' else 11  # Ace is 11 initially
             deck.append((f"{rank}{suit}", value))
     
@@ -90,11 +91,17 @@ def format_cards(cards: List[Tuple[str, int]]) -> str:
     """Format cards for display"""
     return " ".join(card[0] for card in cards)
 
+RED_NUMBERS = [1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36]
+ROULETTE_COLOURS = {'red': '🔴', 'black': '⚫', 'green': '🟢'}
+
+def roulette_colour(number: int) -> str:
+    """Colour of a roulette pocket: red, black or green"""
+    return 'red' if number in RED_NUMBERS else 'black' if number != 0 else 'green'
+
 def calculate_roulette_win(prediction: str, number: int, bet: int) -> Tuple[bool, int]:
     """Calculate roulette win amount"""
     # Determine color
-    red_numbers = [1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36]
-    is_red = number in red_numbers
+    is_red = number in RED_NUMBERS
     is_black = number != 0 and not is_red
     is_even = number % 2 == 0 and number != 0
     is_odd = number % 2 == 1
@@ -128,12 +135,22 @@ def calculate_roulette_win(prediction: str, number: int, bet: int) -> Tuple[bool
     winnings = bet * multiplier if won else 0
     return won, winnings
 
+SLOT_SYMBOLS = ['🍒', '🍋', '🍊', '🍇', '🔔', '💎', '7️⃣']
+SLOT_WEIGHTS = [25, 20, 18, 15, 12, 8, 2]  # Lower weights for better symbols
+
 def create_slots_reels() -> List[str]:
     """Generate slot machine reels"""
-    symbols = ['🍒', '🍋', '🍊', '🍇', '🔔', '💎', '7️⃣']
-    weights = [25, 20, 18, 15, 12, 8, 2]  # Lower weights for better symbols
+    return random.choices(SLOT_SYMBOLS, weights=SLOT_WEIGHTS, k=3)
+
+def slots_multiplier(won: bool, winnings: int, bet: int):
+    """Multiplier shown on the slots image for a spin"""
+    return winnings // bet if won and bet > 0 else 1.0
 
-    return random.choices(symbols, weights=weights, k=3)
+MINING_MATERIALS = {
+    'rare': ['💎', '🏆', '⭐'],
+    'uncommon': ['🥈', '🔶', '💰'],
+    'common': ['🪨', '⚫', '🤎'],
+}
 
 def calculate_slots_win(reels: List[str], bet: int) -> Tuple[bool, int]:
     """Calculate slot machine winnings"""